@@ -0,0 +1,413 @@
+"""
+Routes d'Administration - Application Villa à Vendre Marrakech
+
+Ce fichier regroupe les routes du panneau d'administration (protégées par
+mot de passe) : édition de la villa et des textes du site, upload des
+photos et des brochures PDF, amélioration de texte par IA.
+
+Les sous-systèmes lourds (ai_services, image_processing, pdf_extraction)
+sont importés à leur première utilisation, dans les routes qui en ont
+besoin : un worker qui ne sert que le site public ne les charge jamais.
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import logging
+import os
+import time
+import uuid
+
+from flask import Blueprint, abort, current_app, jsonify, render_template, request, send_file
+from sqlalchemy.exc import IntegrityError
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import secure_filename
+
+from app import login_required, safe_int
+from metrics import count_cache
+from models import db, Villa, VillaTranslation, PdfExtraction
+from profiler import REPORT_SORTS, list_profiles, profile_path, profile_report
+from request_timing import timed
+
+bp = Blueprint('admin', __name__)
+
+logger = logging.getLogger('villa.admin')
+
+MULTIPART_OVERHEAD_BYTES = 64 * 1024  # En-têtes multipart et champs du formulaire autour du PDF
+
+
+def extract_text_from_pdf(pdf_source):
+    """
+    Extrait le texte d'un PDF (chemin, bytes ou objet fichier).
+    Les pages sont réparties sur un pool de processus pour les gros documents,
+    dans la limite des plafonds PDF_MAX_PAGES et PDF_MAX_CHARS.
+
+    Returns:
+        dict: Texte extrait et statistiques par page (voir pdf_extraction.extract_pdf_text),
+        ou None en cas d'erreur de lecture
+    """
+    from pdf_extraction import extract_pdf_text
+
+    try:
+        with timed('pdf'):
+            return extract_pdf_text(
+                pdf_source,
+                max_pages=current_app.config['PDF_MAX_PAGES'],
+                max_chars=current_app.config['PDF_MAX_CHARS'],
+                workers=current_app.config['PDF_WORKERS'],
+                slow_page_seconds=current_app.config['PDF_SLOW_PAGE_SECONDS']
+            )
+    except Exception as e:
+        logger.warning(f"Error extracting PDF text: {e}", extra={'event': 'pdf_error'})
+        return None
+
+
+def save_changes(villa, values, message):
+    """
+    Enregistre seulement les champs modifiés d'une villa
+
+    Aucun commit n'est fait si rien n'a changé : la ligne, updated_at et les
+    textes restent intacts.
+
+    Returns:
+        Response: JSON {'success', 'message', 'changed': [champs modifiés]}
+    """
+    changed = villa.apply_changes(values)
+    if not changed:
+        db.session.rollback()
+        return jsonify({'success': True, 'message': 'Aucune modification à enregistrer.', 'changed': []})
+    
+    reference = villa.reference
+    db.session.commit()
+    logger.info(f"💾 Villa {reference}: {len(changed)} champ(s) modifié(s)",
+                extra={'event': 'villa_saved', 'reference': reference, 'changed': changed})
+    return jsonify({
+        'success': True,
+        'message': f'{message} ({len(changed)} champ(s) modifié(s))',
+        'changed': changed
+    })
+
+
+# ========== ROUTES ADMIN (PROTÉGÉES) ==========
+
+@bp.route('/admin')
+@login_required
+def admin():
+    """Panneau d'administration pour gérer la villa."""
+    villa = Villa.query.first()
+    return render_template('admin.html', villa=villa)
+
+@bp.route('/admin/save', methods=['POST'])
+@login_required
+def admin_save():
+    """Enregistre ou met à jour les données de la villa."""
+    data = request.form
+    
+    try:
+        villa = Villa.query.first()
+        if not villa:
+            villa = Villa()
+            db.session.add(villa)
+        
+        values = {
+            'reference': data.get('reference', ''),
+            'price': safe_int(data.get('price'), 0),
+            'location': data.get('location', ''),
+            'distance_city': data.get('distance_city', ''),
+            'terrain_area': safe_int(data.get('terrain_area'), 0),
+            'built_area': safe_int(data.get('built_area'), 0),
+            'bedrooms': safe_int(data.get('bedrooms'), 0),
+            'pool_size': data.get('pool_size', ''),
+            'contact_phone': data.get('contact_phone', ''),
+            'contact_email': data.get('contact_email', ''),
+            'contact_website': data.get('contact_website', ''),
+            'is_active': True
+        }
+        # Contenus principaux en français et en anglais (title, title_en...)
+        for field in Villa.CONTENT_FIELDS:
+            for lang in Villa.LANGUAGES:
+                name = Villa.attribute_name(field, lang)
+                values[name] = data.get(name, '')
+        
+        return save_changes(villa, values, 'Villa enregistrée avec succès !')
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': f'Erreur lors de la sauvegarde: {str(e)}'
+        }), 500
+
+@bp.route('/admin/upload', methods=['POST'])
+@login_required
+def upload_image():
+    """Upload et optimise une image de villa."""
+    from image_processing import allowed_file, optimize_image
+
+    if 'image' not in request.files:
+        return jsonify({'error': 'No file'}), 400
+    
+    file = request.files['image']
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+    
+    if file and file.filename and allowed_file(file.filename):
+        original_filename = secure_filename(file.filename)
+        unique_id = str(uuid.uuid4())[:8]
+        timestamp = str(int(time.time() * 1000))
+        base_name = os.path.splitext(original_filename)[0]
+        temp_filename = f"{timestamp}_{unique_id}_{base_name}.tmp"
+        temp_filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], temp_filename)
+        file.save(temp_filepath)
+        
+        with timed('image'):
+            final_filepath = optimize_image(temp_filepath)
+        final_filename = os.path.basename(final_filepath)
+        
+        villa = Villa.query.first()
+        if villa:
+            images = villa.get_images_list()
+            images.append(final_filename)
+            villa.set_images_list(images)
+            db.session.commit()
+        
+        return jsonify({'success': True, 'filename': final_filename})
+    
+    return jsonify({'error': 'Invalid file type'}), 400
+
+@bp.route('/admin/delete-image/<filename>', methods=['POST'])
+@login_required
+def delete_image(filename):
+    """Supprime une image de la base de données et du système de fichiers."""
+    villa = Villa.query.first()
+    if villa:
+        images = villa.get_images_list()
+        if filename in images:
+            images.remove(filename)
+            villa.set_images_list(images)
+            db.session.commit()
+            
+            filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            
+            return jsonify({'success': True})
+    
+    return jsonify({'error': 'Image not found'}), 404
+
+@bp.route('/admin/upload-pdf', methods=['POST'])
+@login_required
+def upload_pdf():
+    """
+    Upload un PDF, extrait le texte et utilise l'IA pour extraire les données de villa.
+    Traduit automatiquement le contenu français vers l'anglais pour remplir les deux langues.
+    
+    Les résultats sont mis en cache par empreinte SHA-256 du PDF : un même fichier
+    uploadé à nouveau est renvoyé instantanément, sauf si le champ 'force' est activé.
+    """
+    from ai_services import extract_villa_data_with_ai, translate_villa_data_to_english
+    from pdf_extraction import SpooledPdf, UploadTooLarge
+
+    max_bytes = current_app.config['PDF_MAX_BYTES']
+    # Le parseur de formulaire écrit le PDF directement dans un SpooledPdf :
+    # taille contrôlée pendant la réception, aucune copie intermédiaire
+    request.max_content_length = max_bytes + MULTIPART_OVERHEAD_BYTES
+    request.file_stream_factory = lambda: SpooledPdf(
+        max_bytes, spool_threshold=current_app.config['PDF_SPOOL_THRESHOLD'],
+        spool_dir=current_app.config['PDF_SPOOL_DIR'])
+    try:
+        files = request.files
+    except (UploadTooLarge, RequestEntityTooLarge):
+        return jsonify({'error': f"PDF too large (max {max_bytes // (1024 * 1024)} MB)"}), 413
+
+    if 'pdf' not in files:
+        return jsonify({'error': 'No PDF file'}), 400
+    
+    file = files['pdf']
+    if not file.filename or file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+    
+    if not file.filename.lower().endswith('.pdf'):
+        return jsonify({'error': 'File must be a PDF'}), 400
+    
+    force = request.form.get('force', '').lower() in ('1', 'true', 'on', 'yes')
+    
+    try:
+        # PDF déjà reçu par le parseur (mémoire ou fichier temporaire), sans fichier dans static/uploads
+        with file.stream as pdf:
+            cached = db.session.get(PdfExtraction, pdf.sha256)
+            if not force:
+                # Résultat complet (texte + IA), puis texte seul
+                cached_data = cached.get_villa_data() if cached else None
+                count_cache('pdf_extraction', bool(cached_data))
+                if cached_data:
+                    logger.info("⚡ PDF extraction cache hit", extra={'event': 'pdf_cache_hit', 'sha256': pdf.sha256[:12]})
+                    return jsonify({'success': True, 'data': cached_data, 'cached': True})
+                count_cache('pdf_text', bool(cached and cached.pdf_text))
+            
+            pdf_stats = None
+            if cached and cached.pdf_text and not force:
+                pdf_text = cached.pdf_text
+            else:
+                extraction = extract_text_from_pdf(pdf.source)
+                
+                pdf_text = extraction['text'] if extraction else ''
+                if not pdf_text.strip():
+                    return jsonify({'error': 'Could not extract text from PDF'}), 400
+                
+                pdf_stats = {k: v for k, v in extraction.items() if k != 'text'}
+                logger.info(f"📄 {extraction['pages_processed']}/{extraction['page_count']} pages extracted", extra={
+                    'event': 'pdf_extracted', 'sha256': pdf.sha256[:12], 'pages': extraction['pages_processed'],
+                    'page_count': extraction['page_count'], 'duration_ms': round(extraction['duration'] * 1000, 1)
+                })
+                
+                # Le texte est mis en cache tout de suite : un échec de l'IA ne force pas à relire le PDF
+                if not cached:
+                    cached = PdfExtraction(sha256=pdf.sha256)
+                    db.session.add(cached)
+                cached.pdf_text = pdf_text
+                cached.villa_data = None
+                try:
+                    db.session.commit()
+                except IntegrityError:
+                    # Même PDF envoyé en même temps : la ligne vient d'être créée par l'autre requête
+                    db.session.rollback()
+                    cached = db.session.get(PdfExtraction, pdf.sha256)
+        
+        # Transaction terminée : la connexion revient au pool pendant les appels IA (jusqu'à 2 x 120 s)
+        db.session.commit()
+        
+        logger.debug("🤖 Extracting French villa data with AI...")
+        villa_data = extract_villa_data_with_ai(pdf_text)
+        
+        if not villa_data:
+            return jsonify({'error': 'Could not extract villa data. Make sure OPENROUTER_API_KEY is configured.'}), 400
+        
+        logger.debug("🌍 Translating French content to English...")
+        english_translations = translate_villa_data_to_english(villa_data)
+        
+        if english_translations:
+            villa_data.update(english_translations)
+            logger.info(f"✅ Added {len(english_translations)} English translations to villa data",
+                        extra={'event': 'pdf_translated', 'fields': len(english_translations)})
+        else:
+            logger.warning("⚠️  Translation failed or returned no data - English fields will be empty",
+                           extra={'event': 'pdf_translation_empty'})
+        
+        cached.set_villa_data(villa_data)
+        db.session.commit()
+        
+        return jsonify({'success': True, 'data': villa_data, 'pdf_stats': pdf_stats, 'cached': False})
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Error processing PDF: {str(e)}'}), 500
+
+@bp.route('/api/enhance', methods=['POST'])
+@login_required
+def enhance():
+    """API pour améliorer un texte via IA (Mistral Large)."""
+    from ai_services import enhance_text_with_ai
+
+    data = request.json
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+    
+    text = data.get('text', '')
+    field = data.get('field', '')
+    
+    enhanced = enhance_text_with_ai(text, f"Contexte: {field}")
+    
+    return jsonify({'enhanced': enhanced})
+
+@bp.route('/admin/reset', methods=['POST'])
+@login_required
+def reset_data():
+    """Réinitialise complètement: supprime toutes les données et images."""
+    try:
+        confirmation = request.form.get('confirmation')
+        if confirmation != 'SUPPRIMER':
+            return jsonify({'error': 'Confirmation incorrecte'}), 400
+        
+        VillaTranslation.query.delete()
+        Villa.query.delete()
+        db.session.commit()
+        
+        upload_dir = current_app.config['UPLOAD_FOLDER']
+        if os.path.exists(upload_dir):
+            for filename in os.listdir(upload_dir):
+                file_path = os.path.join(upload_dir, filename)
+                if os.path.isfile(file_path):
+                    os.remove(file_path)
+        
+        return jsonify({'success': True, 'message': 'Toutes les données ont été supprimées'})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/admin/pool-stats')
+@login_required
+def pool_stats():
+    """Statistiques des pools de connexions du worker qui répond (taille, occupation, attente)."""
+    from db_pool import pool_statistics
+
+    return jsonify({
+        'pid': os.getpid(),
+        'role': current_app.config['APP_ROLE'],
+        'pools': pool_statistics(db.engines)
+    })
+
+@bp.route('/admin/profiles')
+@bp.route('/admin/profiles/<name>')
+@login_required
+def profiles(name=None):
+    """Profils de requêtes enregistrés (X-Profile: 1 ou ?_profile=1), et rapport de l'un d'eux."""
+    directory = current_app.config['PROFILE_DIR']
+    sort = request.args.get('sort', 'cumulative')
+    report = None
+    if name:
+        path = profile_path(directory, name)
+        if not path:
+            abort(404)
+        report = profile_report(path, sort)
+    return render_template('profiles.html', profiles=list_profiles(directory), selected=name,
+                           report=report, sort=sort, sorts=REPORT_SORTS)
+
+@bp.route('/admin/profiles/<name>/download')
+@login_required
+def download_profile(name):
+    """Télécharge un profil au format pstats (.prof)."""
+    path = profile_path(current_app.config['PROFILE_DIR'], name)
+    if not path:
+        abort(404)
+    return send_file(path, mimetype='application/octet-stream', as_attachment=True,
+                     download_name=f'{name}.prof')
+
+@bp.route('/admin/edit-website')
+@login_required
+def edit_website():
+    """Page d'édition des textes personnalisables du site web."""
+    villa = Villa.query.first()
+    return render_template('edit_website.html', villa=villa)
+
+@bp.route('/admin/save-website-text', methods=['POST'])
+@login_required
+def save_website_text():
+    """Enregistre les textes personnalisés du site web."""
+    try:
+        villa = Villa.query.first()
+        if not villa:
+            return jsonify({'success': False, 'error': 'Aucune villa trouvée. Créez d\'abord une villa.'}), 404
+        
+        # Contenus principaux et textes du site, en français et en anglais
+        values = {}
+        for field in Villa.LOCALIZED_FIELDS:
+            for lang in Villa.LANGUAGES:
+                name = Villa.attribute_name(field, lang)
+                values[name] = request.form.get(name, '')
+        
+        return save_changes(villa, values, 'Textes enregistrés avec succès !')
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': f'Erreur lors de la sauvegarde: {str(e)}'}), 500
@@ -0,0 +1,308 @@
+"""
+Services d'Intelligence Artificielle - Application Villa à Vendre Marrakech
+
+Ce fichier regroupe les appels à l'API OpenRouter :
+- extraction des données structurées d'une villa depuis le texte d'un PDF
+- amélioration de texte en français
+- traduction des contenus en anglais
+
+Il n'est importé qu'à la première utilisation (routes admin, import en
+masse) : les workers qui ne servent que le site public ne chargent pas
+la bibliothèque requests.
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import json
+import logging
+import os
+import time
+
+import requests
+
+from metrics import observe_ai_request
+from request_timing import timed
+
+# Point d'accès compatible OpenRouter (remplaçable pour un proxy ou un banc de test)
+OPENROUTER_URL = os.environ.get('OPENROUTER_URL', "https://openrouter.ai/api/v1/chat/completions")
+
+logger = logging.getLogger('villa.ai')
+
+
+def openrouter_post(step, **kwargs):
+    """
+    Appel à l'API OpenRouter (arguments de requests.post)
+
+    Chaque appel est chronométré pour la requête en cours sous le nom
+    'openrouter-<step>' (en-tête Server-Timing et journal des requêtes) et
+    compté dans les métriques Prometheus et le journal : succès (HTTP 200),
+    échec (autre statut, erreur réseau) ou délai dépassé.
+    """
+    model = kwargs['json']['model']
+    outcome = 'failure'
+    start = time.perf_counter()
+    try:
+        with timed(f'openrouter-{step}', model):
+            response = requests.post(OPENROUTER_URL, **kwargs)
+        if response.status_code == 200:
+            outcome = 'success'
+        return response
+    except requests.Timeout:
+        outcome = 'timeout'
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        observe_ai_request(step, model, outcome, seconds)
+        logger.info(f"OpenRouter {step}: {outcome}", extra={
+            'event': 'openrouter_call', 'operation': step, 'model': model,
+            'outcome': outcome, 'duration_ms': round(seconds * 1000, 1)
+        })
+
+
+def extract_villa_data_with_ai(pdf_text):
+    """
+    Extrait les données structurées d'une villa depuis du texte PDF via IA.
+    Utilise Claude 3.5 Sonnet via OpenRouter pour analyser le texte et
+    extraire toutes les informations dans un format JSON structuré.
+    Temps d'exécution: 60-90 secondes.
+    """
+    openrouter_key = os.environ.get('OPENROUTER_API_KEY')
+    if not openrouter_key:
+        return None
+    
+    try:
+        prompt = f"""Analyse ce texte extrait d'un PDF de vente de villa et extrait les informations structurées.
+
+Texte du PDF:
+{pdf_text}
+
+Réponds UNIQUEMENT avec un objet JSON valide contenant ces champs (mets des valeurs vides "" ou 0 si l'information n'est pas disponible):
+{{
+    "reference": "référence de la villa",
+    "title": "titre court et attractif de la villa",
+    "price": nombre entier du prix en euros,
+    "location": "ville ou région",
+    "distance_city": "distance depuis la ville principale",
+    "description": "description complète et attractive",
+    "terrain_area": nombre entier de la surface du terrain en m²,
+    "built_area": nombre entier de la surface construite en m²,
+    "bedrooms": nombre de chambres/suites,
+    "pool_size": "dimensions de la piscine",
+    "features": "liste des caractéristiques principales, une par ligne",
+    "equipment": "liste des équipements et confort, une par ligne",
+    "business_info": "informations sur l'exploitation commerciale",
+    "investment_benefits": "atouts pour investisseurs",
+    "documents": "documents disponibles",
+    "contact_phone": "numéro de téléphone",
+    "contact_email": "email",
+    "contact_website": "site web"
+}}"""
+
+        response = openrouter_post(
+            'extract',
+            headers={
+                "Authorization": f"Bearer {openrouter_key}",
+                "Content-Type": "application/json",
+                "HTTP-Referer": "https://villaeden.replit.app",
+                "X-Title": "Villa Eden Admin"
+            },
+            json={
+                "model": "anthropic/claude-3.5-sonnet",
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                "temperature": 0.3,
+                "max_tokens": 4000
+            },
+            timeout=90
+        )
+        
+        if response.status_code == 200:
+            result = response.json()
+            content = result['choices'][0]['message']['content'].strip()
+            
+            if content.startswith('```json'):
+                content = content[7:]
+            if content.startswith('```'):
+                content = content[3:]
+            if content.endswith('```'):
+                content = content[:-3]
+            content = content.strip()
+            
+            data = json.loads(content)
+            return data
+        else:
+            logger.warning(f"OpenRouter API error: {response.status_code}",
+                           extra={'event': 'ai_error', 'operation': 'extract', 'status': response.status_code})
+            return None
+    except Exception as e:
+        logger.warning(f"AI extraction error: {e}", extra={'event': 'ai_error', 'operation': 'extract'})
+        return None
+
+def enhance_text_with_ai(text, context=""):
+    """
+    Améliore un texte via IA pour l'immobilier de luxe.
+    Utilise Mistral Large via OpenRouter pour améliorer le texte
+    en français avec un style professionnel adapté au luxe.
+    """
+    openrouter_key = os.environ.get('OPENROUTER_API_KEY')
+    if not openrouter_key:
+        return text
+    
+    try:
+        response = openrouter_post(
+            'enhance',
+            headers={
+                "Authorization": f"Bearer {openrouter_key}",
+                "Content-Type": "application/json",
+                "HTTP-Referer": "https://villaeden.replit.app",
+                "X-Title": "Villa Eden Admin"
+            },
+            json={
+                "model": "mistralai/mistral-large-latest",
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": f"Améliore ce texte pour une annonce immobilière de luxe en français. {context}\n\nTexte: {text}\n\nRéponds uniquement avec le texte amélioré, sans explication ni commentaire."
+                    }
+                ],
+                "temperature": 0.7,
+                "max_tokens": 1000
+            },
+            timeout=45
+        )
+        
+        if response.status_code == 200:
+            result = response.json()
+            return result['choices'][0]['message']['content'].strip()
+        else:
+            logger.warning(f"OpenRouter API error: {response.status_code}",
+                           extra={'event': 'ai_error', 'operation': 'enhance', 'status': response.status_code})
+            return text
+    except Exception as e:
+        logger.warning(f"AI enhancement error: {e}", extra={'event': 'ai_error', 'operation': 'enhance'})
+        return text
+
+def translate_villa_data_to_english(french_data):
+    """
+    Traduit automatiquement toutes les données d'une villa du français vers l'anglais.
+    Utilise Claude 3.5 Sonnet via OpenRouter pour des traductions de haute qualité
+    adaptées au contexte de l'immobilier de luxe à Marrakech.
+    
+    Cette fonction traduit TOUS les champs nécessaires pour une expérience bilingue complète :
+    - Contenu principal : title, description, features, equipment, etc.
+    - Textes du site web : hero subtitle, contact button, WhatsApp button
+    - Section "Why Choose" : titres et descriptions des 4 cartes
+    - Section Contact : titre et sous-titre
+    
+    Args:
+        french_data: Dictionnaire contenant les données en français
+    
+    Returns:
+        Dictionnaire avec les mêmes clés mais suffixées par _en avec les traductions
+    """
+    openrouter_key = os.environ.get('OPENROUTER_API_KEY')
+    if not openrouter_key:
+        return {}
+    
+    try:
+        # Collecte de TOUS les champs à traduire (contenus principaux)
+        fields_to_translate = {
+            'title': french_data.get('title', ''),
+            'description': french_data.get('description', ''),
+            'features': french_data.get('features', ''),
+            'equipment': french_data.get('equipment', ''),
+            'business_info': french_data.get('business_info', ''),
+            'investment_benefits': french_data.get('investment_benefits', ''),
+            'documents': french_data.get('documents', ''),
+            # Textes personnalisables du site web
+            'hero_subtitle': french_data.get('hero_subtitle_fr', ''),
+            'contact_button': french_data.get('contact_button_fr', ''),
+            'description_title': french_data.get('description_title_fr', ''),
+            'whatsapp_button': french_data.get('whatsapp_button_fr', ''),
+            # Section "Why Choose This Villa"
+            'why_choose_title': french_data.get('why_choose_title_fr', ''),
+            'why_card1_title': french_data.get('why_card1_title_fr', ''),
+            'why_card1_desc': french_data.get('why_card1_desc_fr', ''),
+            'why_card2_title': french_data.get('why_card2_title_fr', ''),
+            'why_card2_desc': french_data.get('why_card2_desc_fr', ''),
+            'why_card3_title': french_data.get('why_card3_title_fr', ''),
+            'why_card3_desc': french_data.get('why_card3_desc_fr', ''),
+            'why_card4_title': french_data.get('why_card4_title_fr', ''),
+            'why_card4_desc': french_data.get('why_card4_desc_fr', ''),
+            # Section Contact
+            'contact_title': french_data.get('contact_title_fr', ''),
+            'contact_subtitle': french_data.get('contact_subtitle_fr', '')
+        }
+        
+        non_empty_fields = {k: v for k, v in fields_to_translate.items() if v and v.strip()}
+        
+        if not non_empty_fields:
+            return {}
+        
+        prompt = f"""Translate the following luxury villa real estate content from French to English. 
+Maintain the professional, luxurious tone appropriate for high-end Marrakech real estate.
+Preserve all line breaks and formatting exactly as shown.
+
+French content to translate:
+{json.dumps(non_empty_fields, ensure_ascii=False, indent=2)}
+
+Respond ONLY with a valid JSON object containing ALL translations, using the same keys with "_en" suffix.
+For example:
+- "title" becomes "title_en"
+- "hero_subtitle" becomes "hero_subtitle_en"
+- "why_card1_title" becomes "why_card1_title_en"
+
+Include ALL fields that were provided in the French content, with proper "_en" suffix."""
+
+        response = openrouter_post(
+            'translate',
+            headers={
+                "Authorization": f"Bearer {openrouter_key}",
+                "Content-Type": "application/json",
+                "HTTP-Referer": "https://villaeden.replit.app",
+                "X-Title": "Villa Eden Admin - Translation"
+            },
+            json={
+                "model": "anthropic/claude-3.5-sonnet",
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                "temperature": 0.3,
+                "max_tokens": 6000
+            },
+            timeout=120
+        )
+        
+        if response.status_code == 200:
+            result = response.json()
+            content = result['choices'][0]['message']['content'].strip()
+            
+            if content.startswith('```json'):
+                content = content[7:]
+            if content.startswith('```'):
+                content = content[3:]
+            if content.endswith('```'):
+                content = content[:-3]
+            content = content.strip()
+            
+            translations = json.loads(content)
+            logger.info(f"✅ Successfully translated {len(translations)} fields to English",
+                        extra={'event': 'ai_translated', 'fields': len(translations)})
+            return translations
+        else:
+            logger.warning(f"OpenRouter translation API error: {response.status_code}",
+                           extra={'event': 'ai_error', 'operation': 'translate', 'status': response.status_code})
+            return {}
+    except Exception as e:
+        logger.warning(f"Translation error: {e}", extra={'event': 'ai_error', 'operation': 'translate'})
+        return {}
@@ -13,6 +13,17 @@ Fonctionnalités principales:
 - Upload et optimisation automatique d'images
 - Base de données PostgreSQL pour le stockage des données
 
+Structure (fabrique d'application) :
+- app.py : create_app(), configuration, langue, décorateurs communs
+- public_routes.py : site public et API JSON (blueprint 'public')
+- admin_routes.py : panneau d'administration (blueprint 'admin')
+- ai_services.py, image_processing.py, pdf_extraction.py : importés par
+  les routes admin à leur première utilisation seulement
+
+Importer ce module ne crée pas l'application, ne charge ni PIL, ni PyPDF2,
+ni requests, et n'ouvre aucune connexion à la base : un worker gunicorn
+démarre vite et ne paie les sous-systèmes lourds que s'il les utilise.
+
 Développé par: MOA Digital Agency LLC
 Développeur: Aisance KALONJI
 Email: moa@myoneart.com
@@ -20,75 +31,28 @@ Web: www.myoneart.com
 """
 
 # ========== IMPORTS ==========
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, send_from_directory, g
+from flask import Flask, Request, request, redirect, url_for, session, g
 from flask_cors import CORS
-from models import db, Villa
+from werkzeug.middleware.proxy_fix import ProxyFix
+from models import db
+from db_routing import REPLICA_BIND, init_replica_routing
+from db_pool import engine_options
+import data_version  # noqa: F401  (version des données après chaque écriture des villas)
+from request_timing import init_request_timing
+from profiler import init_profiler
+from app_logging import init_logging
+from assets import init_assets
+from preload import init_preload
+import logging
 import os
-from werkzeug.utils import secure_filename
-from werkzeug.security import check_password_hash, generate_password_hash
-import requests
-import json
-from PIL import Image
-import time
-import uuid
-from PyPDF2 import PdfReader
+import tempfile
 from functools import wraps
-import shutil
 from dotenv import load_dotenv
 
 # Charger les variables d'environnement depuis le fichier .env (pour le VPS)
 load_dotenv()
 
-# ========== CONFIGURATION DE L'APPLICATION ==========
-app = Flask(__name__)
-CORS(app)  # Active CORS pour permettre les requêtes cross-origin
-
-# ========== CONFIGURATION DE LA BASE DE DONNÉES ==========
-# Configure database URL
-# Essaie DATABASE_URL en premier, sinon construit l'URL depuis les variables PG* individuelles
-database_url = os.environ.get('DATABASE_URL')
-if not database_url:
-    # Build DATABASE_URL from individual PostgreSQL variables (for VPS deployment)
-    pg_user = os.environ.get('PGUSER', 'postgres')
-    pg_password = os.environ.get('PGPASSWORD', '')
-    pg_host = os.environ.get('PGHOST', 'localhost')
-    pg_port = os.environ.get('PGPORT', '5432')
-    pg_database = os.environ.get('PGDATABASE', 'villa_sales')
-    
-    if pg_password:
-        database_url = f'postgresql://{pg_user}:{pg_password}@{pg_host}:{pg_port}/{pg_database}'
-    else:
-        database_url = f'postgresql://{pg_user}@{pg_host}:{pg_port}/{pg_database}'
-    
-    print(f"Built DATABASE_URL from PG* variables: postgresql://{pg_user}:***@{pg_host}:{pg_port}/{pg_database}")
-
-# Fix for postgres:// vs postgresql:// (Heroku compatibility)
-if database_url and database_url.startswith('postgres://'):
-    database_url = database_url.replace('postgres://', 'postgresql://', 1)
-
-app.config['SQLALCHEMY_DATABASE_URI'] = database_url
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-    'pool_pre_ping': True,
-    'pool_recycle': 300,
-    'pool_size': 10,
-    'max_overflow': 20
-}
-app.config['UPLOAD_FOLDER'] = 'static/uploads'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
-app.secret_key = os.environ.get("SESSION_SECRET")
-
-# Extensions de fichiers autorisées pour les uploads d'images
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp'}
-
-# Mot de passe admin configurable via variable d'environnement
-ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', '@4dm1n')
-
-# Initialise SQLAlchemy avec l'application Flask
-db.init_app(app)
-
-# Crée le dossier d'upload s'il n'existe pas
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+logger = logging.getLogger('villa.app')
 
 # ========== GESTION MULTILINGUE ==========
 
@@ -184,7 +148,10 @@ def get_browser_language():
     return 'fr'
 
 def get_current_language():
-    """Retourne la langue courante (depuis la session ou détection auto)."""
+    """Retourne la langue courante (paramètre ?lang= des liens hreflang, session ou détection auto)."""
+    requested = request.args.get('lang')
+    if requested in ('fr', 'en'):
+        session['language'] = requested
     if 'language' not in session:
         session['language'] = get_browser_language()
     return session.get('language', 'fr')
@@ -194,29 +161,21 @@ def get_translations():
     lang = get_current_language()
     return TRANSLATIONS.get(lang, TRANSLATIONS['fr'])
 
-@app.before_request
-def before_request():
-    """Exécuté avant chaque requête pour initialiser la langue."""
-    g.lang = get_current_language()
-    g.t = get_translations()
-
-@app.route('/set-language/<lang>')
-def set_language(lang):
-    """Change la langue de l'interface."""
-    if lang in ['fr', 'en']:
-        session['language'] = lang
-    return redirect(request.referrer or url_for('index'))
-
 # ========== VALIDATION DES VARIABLES D'ENVIRONNEMENT ==========
-def validate_required_env_vars():
+def validate_required_env_vars(require_ai=True):
     """
     Vérifie que toutes les variables d'environnement obligatoires sont définies.
     Arrête l'application avec un message clair si une variable manque.
+
+    Args:
+        require_ai (bool): Exiger la clé OpenRouter (False pour les scripts sans appel IA)
     """
     required_vars = {
         'OPENROUTER_API_KEY': 'Clé API OpenRouter requise pour les fonctionnalités IA (extraction PDF, amélioration de texte)',
         'SESSION_SECRET': 'Clé secrète de session requise pour la sécurité de l\'application'
     }
+    if not require_ai:
+        del required_vars['OPENROUTER_API_KEY']
     
     missing_vars = []
     for var_name, description in required_vars.items():
@@ -224,51 +183,13 @@ def validate_required_env_vars():
             missing_vars.append(f"  ❌ {var_name}: {description}")
     
     if missing_vars:
-        print("\n" + "="*80)
-        print("🚨 ERREUR: Variables d'environnement manquantes")
-        print("="*80)
-        print("\nLes variables suivantes sont obligatoires mais non définies:\n")
-        for var in missing_vars:
-            print(var)
-        print("\n" + "="*80)
-        print("💡 Configurez ces variables dans les Secrets Replit")
-        print("="*80 + "\n")
+        logger.error("🚨 Variables d'environnement obligatoires non définies:\n" + "\n".join(missing_vars)
+                     + "\n💡 Configurez ces variables dans les Secrets Replit",
+                     extra={'event': 'missing_env_vars',
+                            'variables': [name for name in required_vars if not os.environ.get(name)]})
         raise SystemExit("Application arrêtée: variables d'environnement manquantes")
     
-    print("✅ All required environment variables are configured")
-
-# ========== INITIALISATION DE LA BASE DE DONNÉES ==========
-def init_db():
-    """Initialize database tables if they don't exist"""
-    with app.app_context():
-        try:
-            # Import all models to ensure they're registered
-            from models import Villa
-            
-            # Create all tables
-            db.create_all()
-            print("✅ Database tables initialized successfully")
-            
-            # Try to count villas, but don't fail if there's an error
-            try:
-                villa_count = Villa.query.count()
-                print(f"📊 Current villas in database: {villa_count}")
-            except Exception as count_error:
-                print(f"⚠️  Could not count villas (table may need migration): {count_error}")
-                print("💡 Run 'python fix_database.py' to fix missing columns")
-            
-        except Exception as e:
-            print(f"❌ Error initializing database: {e}")
-            print("⚠️  Make sure PostgreSQL is running and credentials are correct")
-            print("💡 If you see 'column does not exist', run: python fix_database.py")
-            # Don't raise - allow app to continue
-            pass
-
-# Valide les variables d'environnement requises au démarrage
-validate_required_env_vars()
-
-# Initialise la base de données au démarrage de l'application
-init_db()
+    logger.debug("✅ All required environment variables are configured")
 
 # ========== DÉCORATEURS ET FONCTIONS UTILITAIRES ==========
 
@@ -280,337 +201,10 @@ def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if not session.get('admin_logged_in'):
-            return redirect(url_for('login'))
+            return redirect(url_for('public.login'))
         return f(*args, **kwargs)
     return decorated_function
 
-def allowed_file(filename):
-    """Vérifie si le fichier a une extension autorisée."""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
-def optimize_image(filepath):
-    """
-    Optimise une image pour le web:
-    - Convertit en RGB si nécessaire
-    - Redimensionne à max 1920x1080
-    - Convertit en JPEG avec qualité 85
-    - Supprime le fichier original
-    """
-    try:
-        img = Image.open(filepath)
-        if img.mode in ('RGBA', 'LA', 'P'):
-            img = img.convert('RGB')
-        img.thumbnail((1920, 1080), Image.Resampling.LANCZOS)
-        
-        base, ext = os.path.splitext(filepath)
-        new_filepath = base + '.jpg'
-        img.save(new_filepath, 'JPEG', quality=85, optimize=True)
-        
-        if filepath != new_filepath and os.path.exists(filepath):
-            os.remove(filepath)
-        
-        return new_filepath
-    except Exception as e:
-        print(f"Error optimizing image: {e}")
-        return filepath
-
-def extract_text_from_pdf(pdf_path):
-    """Extrait tout le texte d'un fichier PDF en utilisant PyPDF2."""
-    try:
-        reader = PdfReader(pdf_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text
-    except Exception as e:
-        print(f"Error extracting PDF text: {e}")
-        return ""
-
-def extract_villa_data_with_ai(pdf_text):
-    """
-    Extrait les données structurées d'une villa depuis du texte PDF via IA.
-    Utilise Claude 3.5 Sonnet via OpenRouter pour analyser le texte et
-    extraire toutes les informations dans un format JSON structuré.
-    Temps d'exécution: 60-90 secondes.
-    """
-    openrouter_key = os.environ.get('OPENROUTER_API_KEY')
-    if not openrouter_key:
-        return None
-    
-    try:
-        prompt = f"""Analyse ce texte extrait d'un PDF de vente de villa et extrait les informations structurées.
-
-Texte du PDF:
-{pdf_text}
-
-Réponds UNIQUEMENT avec un objet JSON valide contenant ces champs (mets des valeurs vides "" ou 0 si l'information n'est pas disponible):
-{{
-    "reference": "référence de la villa",
-    "title": "titre court et attractif de la villa",
-    "price": nombre entier du prix en euros,
-    "location": "ville ou région",
-    "distance_city": "distance depuis la ville principale",
-    "description": "description complète et attractive",
-    "terrain_area": nombre entier de la surface du terrain en m²,
-    "built_area": nombre entier de la surface construite en m²,
-    "bedrooms": nombre de chambres/suites,
-    "pool_size": "dimensions de la piscine",
-    "features": "liste des caractéristiques principales, une par ligne",
-    "equipment": "liste des équipements et confort, une par ligne",
-    "business_info": "informations sur l'exploitation commerciale",
-    "investment_benefits": "atouts pour investisseurs",
-    "documents": "documents disponibles",
-    "contact_phone": "numéro de téléphone",
-    "contact_email": "email",
-    "contact_website": "site web"
-}}"""
-
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {openrouter_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://villaeden.replit.app",
-                "X-Title": "Villa Eden Admin"
-            },
-            json={
-                "model": "anthropic/claude-3.5-sonnet",
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                "temperature": 0.3,
-                "max_tokens": 4000
-            },
-            timeout=90
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            content = result['choices'][0]['message']['content'].strip()
-            
-            if content.startswith('```json'):
-                content = content[7:]
-            if content.startswith('```'):
-                content = content[3:]
-            if content.endswith('```'):
-                content = content[:-3]
-            content = content.strip()
-            
-            data = json.loads(content)
-            return data
-        else:
-            print(f"OpenRouter API error: {response.status_code}")
-            return None
-    except Exception as e:
-        print(f"AI extraction error: {e}")
-        return None
-
-def enhance_text_with_ai(text, context=""):
-    """
-    Améliore un texte via IA pour l'immobilier de luxe.
-    Utilise Mistral Large via OpenRouter pour améliorer le texte
-    en français avec un style professionnel adapté au luxe.
-    """
-    openrouter_key = os.environ.get('OPENROUTER_API_KEY')
-    if not openrouter_key:
-        return text
-    
-    try:
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {openrouter_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://villaeden.replit.app",
-                "X-Title": "Villa Eden Admin"
-            },
-            json={
-                "model": "mistralai/mistral-large-latest",
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": f"Améliore ce texte pour une annonce immobilière de luxe en français. {context}\n\nTexte: {text}\n\nRéponds uniquement avec le texte amélioré, sans explication ni commentaire."
-                    }
-                ],
-                "temperature": 0.7,
-                "max_tokens": 1000
-            },
-            timeout=45
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            return result['choices'][0]['message']['content'].strip()
-        else:
-            print(f"OpenRouter API error: {response.status_code}")
-            return text
-    except Exception as e:
-        print(f"AI enhancement error: {e}")
-        return text
-
-def translate_villa_data_to_english(french_data):
-    """
-    Traduit automatiquement toutes les données d'une villa du français vers l'anglais.
-    Utilise Claude 3.5 Sonnet via OpenRouter pour des traductions de haute qualité
-    adaptées au contexte de l'immobilier de luxe à Marrakech.
-    
-    Cette fonction traduit TOUS les champs nécessaires pour une expérience bilingue complète :
-    - Contenu principal : title, description, features, equipment, etc.
-    - Textes du site web : hero subtitle, contact button, WhatsApp button
-    - Section "Why Choose" : titres et descriptions des 4 cartes
-    - Section Contact : titre et sous-titre
-    
-    Args:
-        french_data: Dictionnaire contenant les données en français
-    
-    Returns:
-        Dictionnaire avec les mêmes clés mais suffixées par _en avec les traductions
-    """
-    openrouter_key = os.environ.get('OPENROUTER_API_KEY')
-    if not openrouter_key:
-        return {}
-    
-    try:
-        # Collecte de TOUS les champs à traduire (contenus principaux)
-        fields_to_translate = {
-            'title': french_data.get('title', ''),
-            'description': french_data.get('description', ''),
-            'features': french_data.get('features', ''),
-            'equipment': french_data.get('equipment', ''),
-            'business_info': french_data.get('business_info', ''),
-            'investment_benefits': french_data.get('investment_benefits', ''),
-            'documents': french_data.get('documents', ''),
-            # Textes personnalisables du site web
-            'hero_subtitle': french_data.get('hero_subtitle_fr', ''),
-            'contact_button': french_data.get('contact_button_fr', ''),
-            'description_title': french_data.get('description_title_fr', ''),
-            'whatsapp_button': french_data.get('whatsapp_button_fr', ''),
-            # Section "Why Choose This Villa"
-            'why_choose_title': french_data.get('why_choose_title_fr', ''),
-            'why_card1_title': french_data.get('why_card1_title_fr', ''),
-            'why_card1_desc': french_data.get('why_card1_desc_fr', ''),
-            'why_card2_title': french_data.get('why_card2_title_fr', ''),
-            'why_card2_desc': french_data.get('why_card2_desc_fr', ''),
-            'why_card3_title': french_data.get('why_card3_title_fr', ''),
-            'why_card3_desc': french_data.get('why_card3_desc_fr', ''),
-            'why_card4_title': french_data.get('why_card4_title_fr', ''),
-            'why_card4_desc': french_data.get('why_card4_desc_fr', ''),
-            # Section Contact
-            'contact_title': french_data.get('contact_title_fr', ''),
-            'contact_subtitle': french_data.get('contact_subtitle_fr', '')
-        }
-        
-        non_empty_fields = {k: v for k, v in fields_to_translate.items() if v and v.strip()}
-        
-        if not non_empty_fields:
-            return {}
-        
-        prompt = f"""Translate the following luxury villa real estate content from French to English. 
-Maintain the professional, luxurious tone appropriate for high-end Marrakech real estate.
-Preserve all line breaks and formatting exactly as shown.
-
-French content to translate:
-{json.dumps(non_empty_fields, ensure_ascii=False, indent=2)}
-
-Respond ONLY with a valid JSON object containing ALL translations, using the same keys with "_en" suffix.
-For example:
-- "title" becomes "title_en"
-- "hero_subtitle" becomes "hero_subtitle_en"
-- "why_card1_title" becomes "why_card1_title_en"
-
-Include ALL fields that were provided in the French content, with proper "_en" suffix."""
-
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {openrouter_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://villaeden.replit.app",
-                "X-Title": "Villa Eden Admin - Translation"
-            },
-            json={
-                "model": "anthropic/claude-3.5-sonnet",
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                "temperature": 0.3,
-                "max_tokens": 6000
-            },
-            timeout=120
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            content = result['choices'][0]['message']['content'].strip()
-            
-            if content.startswith('```json'):
-                content = content[7:]
-            if content.startswith('```'):
-                content = content[3:]
-            if content.endswith('```'):
-                content = content[:-3]
-            content = content.strip()
-            
-            translations = json.loads(content)
-            print(f"✅ Successfully translated {len(translations)} fields to English")
-            return translations
-        else:
-            print(f"OpenRouter translation API error: {response.status_code}")
-            return {}
-    except Exception as e:
-        print(f"Translation error: {e}")
-        return {}
-
-# ========== ROUTES PUBLIQUES ==========
-
-@app.route('/')
-def index():
-    """Page d'accueil publique affichant la villa active."""
-    villa = Villa.query.filter_by(is_active=True).first()
-    return render_template('index.html', villa=villa)
-
-@app.route('/robots.txt')
-def robots():
-    return send_from_directory('static', 'robots.txt', mimetype='text/plain')
-
-@app.route('/sitemap.xml')
-def sitemap():
-    return send_from_directory('static', 'sitemap.xml', mimetype='application/xml')
-
-# ========== ROUTES D'AUTHENTIFICATION ==========
-
-@app.route('/login', methods=['GET', 'POST'])
-def login():
-    """Page de connexion administrateur avec vérification du mot de passe."""
-    if request.method == 'POST':
-        password = request.form.get('password')
-        if password == ADMIN_PASSWORD:
-            session['admin_logged_in'] = True
-            return redirect(url_for('admin'))
-        else:
-            return render_template('login.html', error='Mot de passe incorrect')
-    return render_template('login.html')
-
-@app.route('/logout')
-def logout():
-    session.pop('admin_logged_in', None)
-    return redirect(url_for('login'))
-
-# ========== ROUTES ADMIN (PROTÉGÉES) ==========
-
-@app.route('/admin')
-@login_required
-def admin():
-    """Panneau d'administration pour gérer la villa."""
-    villa = Villa.query.first()
-    return render_template('admin.html', villa=villa)
-
 def safe_int(value, default=0):
     """Convertit une valeur en entier de manière sécurisée, retourne default si échec."""
     try:
@@ -620,293 +214,192 @@ def safe_int(value, default=0):
     except (ValueError, TypeError):
         return default
 
-@app.route('/admin/save', methods=['POST'])
-@login_required
-def admin_save():
-    """Enregistre ou met à jour les données de la villa."""
-    data = request.form
-    
-    try:
-        villa = Villa.query.first()
-        if not villa:
-            villa = Villa()
-            db.session.add(villa)
-        
-        villa.reference = data.get('reference', '')
-        villa.title = data.get('title', '')
-        villa.title_en = data.get('title_en', '')
-        villa.price = safe_int(data.get('price'), 0)
-        villa.location = data.get('location', '')
-        villa.distance_city = data.get('distance_city', '')
-        villa.description = data.get('description', '')
-        villa.description_en = data.get('description_en', '')
-        villa.terrain_area = safe_int(data.get('terrain_area'), 0)
-        villa.built_area = safe_int(data.get('built_area'), 0)
-        villa.bedrooms = safe_int(data.get('bedrooms'), 0)
-        villa.pool_size = data.get('pool_size', '')
-        villa.features = data.get('features', '')
-        villa.features_en = data.get('features_en', '')
-        villa.equipment = data.get('equipment', '')
-        villa.equipment_en = data.get('equipment_en', '')
-        villa.business_info = data.get('business_info', '')
-        villa.business_info_en = data.get('business_info_en', '')
-        villa.investment_benefits = data.get('investment_benefits', '')
-        villa.investment_benefits_en = data.get('investment_benefits_en', '')
-        villa.documents = data.get('documents', '')
-        villa.documents_en = data.get('documents_en', '')
-        villa.contact_phone = data.get('contact_phone', '')
-        villa.contact_email = data.get('contact_email', '')
-        villa.contact_website = data.get('contact_website', '')
-        villa.is_active = True
-        
-        db.session.commit()
-        
-        return jsonify({
-            'success': True,
-            'message': 'Villa enregistrée avec succès !'
-        })
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({
-            'success': False,
-            'error': f'Erreur lors de la sauvegarde: {str(e)}'
-        }), 500
-
-@app.route('/admin/upload', methods=['POST'])
-@login_required
-def upload_image():
-    """Upload et optimise une image de villa."""
-    if 'image' not in request.files:
-        return jsonify({'error': 'No file'}), 400
-    
-    file = request.files['image']
-    if file.filename == '':
-        return jsonify({'error': 'No selected file'}), 400
-    
-    if file and file.filename and allowed_file(file.filename):
-        original_filename = secure_filename(file.filename)
-        unique_id = str(uuid.uuid4())[:8]
-        timestamp = str(int(time.time() * 1000))
-        base_name = os.path.splitext(original_filename)[0]
-        temp_filename = f"{timestamp}_{unique_id}_{base_name}.tmp"
-        temp_filepath = os.path.join(app.config['UPLOAD_FOLDER'], temp_filename)
-        file.save(temp_filepath)
-        
-        final_filepath = optimize_image(temp_filepath)
-        final_filename = os.path.basename(final_filepath)
-        
-        villa = Villa.query.first()
-        if villa:
-            images = villa.get_images_list()
-            images.append(final_filename)
-            villa.set_images_list(images)
-            db.session.commit()
-        
-        return jsonify({'success': True, 'filename': final_filename})
-    
-    return jsonify({'error': 'Invalid file type'}), 400
-
-@app.route('/admin/delete-image/<filename>', methods=['POST'])
-@login_required
-def delete_image(filename):
-    """Supprime une image de la base de données et du système de fichiers."""
-    villa = Villa.query.first()
-    if villa:
-        images = villa.get_images_list()
-        if filename in images:
-            images.remove(filename)
-            villa.set_images_list(images)
-            db.session.commit()
-            
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            if os.path.exists(filepath):
-                os.remove(filepath)
-            
-            return jsonify({'success': True})
-    
-    return jsonify({'error': 'Image not found'}), 404
+class AppRequest(Request):
+    """
+    Requête Flask dont une route peut choisir où le parseur de formulaire
+    écrit les fichiers uploadés.
+
+    Une route qui affecte file_stream_factory avant de lire request.files
+    reçoit dans file.stream l'objet retourné par cette fabrique, rempli au
+    fil de la lecture du corps (voir upload_pdf et SpooledPdf). Sans
+    fabrique, le comportement de Werkzeug est inchangé.
+    """
+    file_stream_factory = None
+
+    def _get_file_stream(self, total_content_length, content_type,
+                         filename=None, content_length=None):
+        if self.file_stream_factory is not None:
+            return self.file_stream_factory()
+        return super()._get_file_stream(total_content_length, content_type,
+                                        filename, content_length)
+
+# ========== FABRIQUE D'APPLICATION ==========
 
-@app.route('/admin/upload-pdf', methods=['POST'])
-@login_required
-def upload_pdf():
+def create_app(config=None):
     """
-    Upload un PDF, extrait le texte et utilise l'IA pour extraire les données de villa.
-    Traduit automatiquement le contenu français vers l'anglais pour remplir les deux langues.
+    Crée et configure l'application Flask
+
+    Args:
+        config (dict): Valeurs de configuration remplaçant celles de l'environnement
+                       (tests, scripts, benchmarks)
+
+    Returns:
+        Flask: Application prête à servir (aucune connexion à la base n'est ouverte)
     """
-    if 'pdf' not in request.files:
-        return jsonify({'error': 'No PDF file'}), 400
-    
-    file = request.files['pdf']
-    if not file.filename or file.filename == '':
-        return jsonify({'error': 'No selected file'}), 400
-    
-    if not file.filename.lower().endswith('.pdf'):
-        return jsonify({'error': 'File must be a PDF'}), 400
-    
-    temp_filepath = None
-    try:
-        temp_filename = f"temp_{uuid.uuid4()}.pdf"
-        temp_filepath = os.path.join(app.config['UPLOAD_FOLDER'], temp_filename)
-        file.save(temp_filepath)
-        
-        print("📄 Extracting text from PDF...")
-        pdf_text = extract_text_from_pdf(temp_filepath)
-        
-        os.remove(temp_filepath)
-        
-        if not pdf_text:
-            return jsonify({'error': 'Could not extract text from PDF'}), 400
-        
-        print("🤖 Extracting French villa data with AI...")
-        villa_data = extract_villa_data_with_ai(pdf_text)
-        
-        if not villa_data:
-            return jsonify({'error': 'Could not extract villa data. Make sure OPENROUTER_API_KEY is configured.'}), 400
-        
-        print("🌍 Translating French content to English...")
-        english_translations = translate_villa_data_to_english(villa_data)
-        
-        if english_translations:
-            villa_data.update(english_translations)
-            print(f"✅ Added {len(english_translations)} English translations to villa data")
+    app = Flask(__name__)
+    app.request_class = AppRequest
+    CORS(app)  # Active CORS pour permettre les requêtes cross-origin
+
+    # ========== CONFIGURATION DE LA BASE DE DONNÉES ==========
+    # Configure database URL
+    # Essaie DATABASE_URL en premier, sinon construit l'URL depuis les variables PG* individuelles
+    database_url = os.environ.get('DATABASE_URL')
+    built_from_pg_variables = not database_url
+    if not database_url:
+        # Build DATABASE_URL from individual PostgreSQL variables (for VPS deployment)
+        pg_user = os.environ.get('PGUSER', 'postgres')
+        pg_password = os.environ.get('PGPASSWORD', '')
+        pg_host = os.environ.get('PGHOST', 'localhost')
+        pg_port = os.environ.get('PGPORT', '5432')
+        pg_database = os.environ.get('PGDATABASE', 'villa_sales')
+
+        if pg_password:
+            database_url = f'postgresql://{pg_user}:{pg_password}@{pg_host}:{pg_port}/{pg_database}'
         else:
-            print("⚠️  Translation failed or returned no data - English fields will be empty")
-        
-        return jsonify({'success': True, 'data': villa_data})
-    
-    except Exception as e:
-        if temp_filepath and os.path.exists(temp_filepath):
-            os.remove(temp_filepath)
-        return jsonify({'error': f'Error processing PDF: {str(e)}'}), 500
-
-@app.route('/api/enhance', methods=['POST'])
-@login_required
-def enhance():
-    """API pour améliorer un texte via IA (Mistral Large)."""
-    data = request.json
-    if not data:
-        return jsonify({'error': 'No data provided'}), 400
-    
-    text = data.get('text', '')
-    field = data.get('field', '')
-    
-    enhanced = enhance_text_with_ai(text, f"Contexte: {field}")
-    
-    return jsonify({'enhanced': enhanced})
-
-@app.route('/admin/reset', methods=['POST'])
-@login_required
-def reset_data():
-    """Réinitialise complètement: supprime toutes les données et images."""
-    try:
-        confirmation = request.form.get('confirmation')
-        if confirmation != 'SUPPRIMER':
-            return jsonify({'error': 'Confirmation incorrecte'}), 400
-        
-        Villa.query.delete()
-        db.session.commit()
-        
-        upload_dir = app.config['UPLOAD_FOLDER']
-        if os.path.exists(upload_dir):
-            for filename in os.listdir(upload_dir):
-                file_path = os.path.join(upload_dir, filename)
-                if os.path.isfile(file_path):
-                    os.remove(file_path)
-        
-        return jsonify({'success': True, 'message': 'Toutes les données ont été supprimées'})
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({'error': str(e)}), 500
-
-@app.route('/admin/edit-website')
-@login_required
-def edit_website():
-    """Page d'édition des textes personnalisables du site web."""
-    villa = Villa.query.first()
-    return render_template('edit_website.html', villa=villa)
-
-@app.route('/admin/save-website-text', methods=['POST'])
-@login_required
-def save_website_text():
-    """Enregistre les textes personnalisés du site web."""
-    try:
-        villa = Villa.query.first()
-        if not villa:
-            return jsonify({'success': False, 'error': 'Aucune villa trouvée. Créez d\'abord une villa.'}), 404
-        
-        # Main content - French
-        villa.title = request.form.get('title', '')
-        villa.description = request.form.get('description', '')
-        villa.features = request.form.get('features', '')
-        villa.equipment = request.form.get('equipment', '')
-        villa.business_info = request.form.get('business_info', '')
-        villa.investment_benefits = request.form.get('investment_benefits', '')
-        villa.documents = request.form.get('documents', '')
-        
-        # Main content - English
-        villa.title_en = request.form.get('title_en', '')
-        villa.description_en = request.form.get('description_en', '')
-        villa.features_en = request.form.get('features_en', '')
-        villa.equipment_en = request.form.get('equipment_en', '')
-        villa.business_info_en = request.form.get('business_info_en', '')
-        villa.investment_benefits_en = request.form.get('investment_benefits_en', '')
-        villa.documents_en = request.form.get('documents_en', '')
-        
-        # French texts
-        villa.hero_subtitle_fr = request.form.get('hero_subtitle_fr', '')
-        villa.contact_button_fr = request.form.get('contact_button_fr', '')
-        villa.description_title_fr = request.form.get('description_title_fr', '')
-        villa.whatsapp_button_fr = request.form.get('whatsapp_button_fr', '')
-        villa.why_choose_title_fr = request.form.get('why_choose_title_fr', '')
-        villa.why_card1_title_fr = request.form.get('why_card1_title_fr', '')
-        villa.why_card1_desc_fr = request.form.get('why_card1_desc_fr', '')
-        villa.why_card2_title_fr = request.form.get('why_card2_title_fr', '')
-        villa.why_card2_desc_fr = request.form.get('why_card2_desc_fr', '')
-        villa.why_card3_title_fr = request.form.get('why_card3_title_fr', '')
-        villa.why_card3_desc_fr = request.form.get('why_card3_desc_fr', '')
-        villa.why_card4_title_fr = request.form.get('why_card4_title_fr', '')
-        villa.why_card4_desc_fr = request.form.get('why_card4_desc_fr', '')
-        villa.contact_title_fr = request.form.get('contact_title_fr', '')
-        villa.contact_subtitle_fr = request.form.get('contact_subtitle_fr', '')
-        
-        # English texts
-        villa.hero_subtitle_en = request.form.get('hero_subtitle_en', '')
-        villa.contact_button_en = request.form.get('contact_button_en', '')
-        villa.description_title_en = request.form.get('description_title_en', '')
-        villa.whatsapp_button_en = request.form.get('whatsapp_button_en', '')
-        villa.why_choose_title_en = request.form.get('why_choose_title_en', '')
-        villa.why_card1_title_en = request.form.get('why_card1_title_en', '')
-        villa.why_card1_desc_en = request.form.get('why_card1_desc_en', '')
-        villa.why_card2_title_en = request.form.get('why_card2_title_en', '')
-        villa.why_card2_desc_en = request.form.get('why_card2_desc_en', '')
-        villa.why_card3_title_en = request.form.get('why_card3_title_en', '')
-        villa.why_card3_desc_en = request.form.get('why_card3_desc_en', '')
-        villa.why_card4_title_en = request.form.get('why_card4_title_en', '')
-        villa.why_card4_desc_en = request.form.get('why_card4_desc_en', '')
-        villa.contact_title_en = request.form.get('contact_title_en', '')
-        villa.contact_subtitle_en = request.form.get('contact_subtitle_en', '')
-        
-        db.session.commit()
-        
-        return jsonify({'success': True, 'message': 'Textes enregistrés avec succès !'})
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({'success': False, 'error': f'Erreur lors de la sauvegarde: {str(e)}'}), 500
-
-# ========== API JSON ==========
-
-@app.route('/api/villa', methods=['GET'])
-def get_villa():
-    """API JSON pour récupérer les données de la villa active."""
-    villa = Villa.query.filter_by(is_active=True).first()
-    if villa:
-        return jsonify(villa.to_dict())
-    return jsonify({'error': 'No villa found'}), 404
+            database_url = f'postgresql://{pg_user}@{pg_host}:{pg_port}/{pg_database}'
+
+    # Fix for postgres:// vs postgresql:// (Heroku compatibility)
+    if database_url and database_url.startswith('postgres://'):
+        database_url = database_url.replace('postgres://', 'postgresql://', 1)
+
+    # Réplique en lecture optionnelle pour les pages publiques (voir db_routing.py)
+    replica_url = os.environ.get('DATABASE_REPLICA_URL')
+    if replica_url and replica_url.startswith('postgres://'):
+        replica_url = replica_url.replace('postgres://', 'postgresql://', 1)
+
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Pools de connexions dimensionnés selon le rôle du processus (voir db_pool.py)
+    app.config['APP_ROLE'] = os.environ.get('APP_ROLE', 'all')
+    pool_size = os.environ.get('DB_POOL_SIZE')
+    max_overflow = os.environ.get('DB_MAX_OVERFLOW')
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+        database_url,
+        role=app.config['APP_ROLE'],
+        pool_size=int(pool_size) if pool_size else None,
+        max_overflow=int(max_overflow) if max_overflow else None,
+        pool_timeout=int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        pgbouncer=os.environ.get('DB_PGBOUNCER', '').lower() in ('1', 'true', 'yes'),
+        green=os.environ.get('GUNICORN_WORKER_CLASS', 'sync').lower() == 'gevent'
+    )
+    if replica_url:
+        # Flask-SQLAlchemy n'applique SQLALCHEMY_ENGINE_OPTIONS qu'à la base principale
+        replica = dict(app.config['SQLALCHEMY_ENGINE_OPTIONS'], url=replica_url)
+        if replica_url.startswith('postgresql'):
+            # Une réplique injoignable ne doit pas bloquer la requête qui mesure son retard
+            replica['connect_args'] = dict(replica.get('connect_args', {}), connect_timeout=2)
+        app.config['SQLALCHEMY_BINDS'] = {REPLICA_BIND: replica}
+    # Retard maximal accepté pour la réplique, et fréquence de sa mesure (secondes)
+    app.config['REPLICA_MAX_LAG_SECONDS'] = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 5))
+    app.config['REPLICA_CHECK_SECONDS'] = float(os.environ.get('REPLICA_CHECK_SECONDS', 5))
+    app.config['UPLOAD_FOLDER'] = 'static/uploads'
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+    # Extraction PDF : plafonds de pages/caractères et taille du pool de processus
+    app.config['PDF_MAX_PAGES'] = int(os.environ.get('PDF_MAX_PAGES', 100))
+    app.config['PDF_MAX_CHARS'] = int(os.environ.get('PDF_MAX_CHARS', 200000))
+    app.config['PDF_WORKERS'] = int(os.environ.get('PDF_WORKERS', 0)) or None
+    app.config['PDF_SLOW_PAGE_SECONDS'] = float(os.environ.get('PDF_SLOW_PAGE_SECONDS', 2.0))
+    # Uploads PDF traités en mémoire, ou dans le répertoire temporaire système (hors racine web) au-delà du seuil
+    app.config['PDF_MAX_BYTES'] = int(os.environ.get('PDF_MAX_BYTES', app.config['MAX_CONTENT_LENGTH']))
+    app.config['PDF_SPOOL_THRESHOLD'] = int(os.environ.get('PDF_SPOOL_THRESHOLD', 4 * 1024 * 1024))
+    app.config['PDF_SPOOL_DIR'] = os.environ.get('PDF_SPOOL_DIR') or None
+    app.secret_key = os.environ.get("SESSION_SECRET")
+
+    # Mot de passe admin configurable via variable d'environnement
+    app.config['ADMIN_PASSWORD'] = os.environ.get('ADMIN_PASSWORD', '@4dm1n')
+    # Jeton du collecteur Prometheus pour /metrics (sinon réservé à l'administrateur connecté)
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+    # Profils de requêtes demandés par l'administrateur (hors racine web) et nombre conservé
+    app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'villa-profiles')
+    app.config['PROFILE_KEEP'] = int(os.environ.get('PROFILE_KEEP', 50))
+    # URL publique du site (sitemap) : obligatoire en production, sinon sitemap reconstruit à chaque requête
+    app.config['SITE_URL'] = os.environ.get('SITE_URL') or None
+    # Fichier dont l'état donne la version des données (caches du sitemap...), partagé par les workers
+    app.config['DATA_VERSION_FILE'] = os.environ.get('DATA_VERSION_FILE') or os.path.join(app.instance_path, 'data_version')
+    # CSS critique de la page publique inséré dans la page, reste de la feuille chargé sans bloquer (voir assets.py)
+    app.config['CRITICAL_CSS'] = os.environ.get('CRITICAL_CSS', '1').lower() in ('1', 'true', 'yes')
+    # Réponse 103 Early Hints avant les pages de villa (si le serveur et le proxy la transmettent, voir preload.py)
+    app.config['EARLY_HINTS'] = os.environ.get('EARLY_HINTS', '').lower() in ('1', 'true', 'yes')
+    # Proxys de confiance devant l'application (Nginx, Replit) : adresse du client depuis X-Forwarded-For.
+    # 0 par défaut : sans proxy, X-Forwarded-For vient du client et ne doit pas être cru (voir .env / .replit)
+    app.config['PROXY_COUNT'] = int(os.environ.get('PROXY_COUNT', 0))
+    # Limitation de débit (voir rate_limit.py) : règles, fichier partagé par les workers, requêtes publiques simultanées
+    app.config['RATE_LIMITS'] = os.environ.get('RATE_LIMITS')  # None : règles par défaut de rate_limit.py
+    app.config['RATE_LIMIT_FILE'] = os.environ.get('RATE_LIMIT_FILE') or None
+    app.config['RATE_LIMIT_PUBLIC_CONCURRENCY'] = int(os.environ.get('RATE_LIMIT_PUBLIC_CONCURRENCY', 0))
+    # Type de workers gunicorn (voir gunicorn.conf.py) : sync sert une requête à la fois par worker
+    app.config['WORKER_CLASS'] = os.environ.get('GUNICORN_WORKER_CLASS', 'sync').lower()
+    # Journaux JSON : niveau minimal et échantillonnage des événements fréquents (ex. "request=0.1")
+    app.config['LOG_LEVEL'] = os.environ.get('LOG_LEVEL', 'INFO')
+    app.config['LOG_SAMPLING'] = os.environ.get('LOG_SAMPLING', '')
+    # Clé OpenRouter exigée au démarrage (désactivé par les scripts sans IA, ex. import_brochures --dry-run)
+    app.config['AI_REQUIRED'] = True
+
+    if config:
+        app.config.update(config)
+
+    if app.config['PROXY_COUNT']:
+        # Adresse du client, schéma et hôte d'origine (URL en https derrière Nginx)
+        proxies = app.config['PROXY_COUNT']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies, x_host=proxies)
+
+    # Initialise SQLAlchemy avec l'application Flask (connexion ouverte à la première requête)
+    db.init_app(app)
+    init_logging(app)
+    if built_from_pg_variables:
+        # Ni l'hôte ni l'utilisateur dans le journal
+        logger.info("🔧 DATABASE_URL construite depuis les variables PG*", extra={'event': 'database_url_built'})
+    init_profiler(app)
+    init_request_timing(app)
+    # Importé ici, après load_dotenv() : prometheus_client lit PROMETHEUS_MULTIPROC_DIR à son chargement
+    from metrics import init_metrics
+    from rate_limit import init_rate_limiting
+    init_metrics(app)
+    init_rate_limiting(app)
+    init_replica_routing(app)
+    init_assets(app)
+    init_preload(app)
+
+    # Crée le dossier d'upload s'il n'existe pas
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+
+    # Valide les variables d'environnement requises au démarrage
+    validate_required_env_vars(require_ai=app.config['AI_REQUIRED'])
+    if not app.config['SITE_URL'] and not app.testing:
+        logger.warning("⚠️  SITE_URL non défini : sitemap.xml reconstruit à chaque requête, à définir en production")
+
+    @app.before_request
+    def before_request():
+        """Exécuté avant chaque requête pour initialiser la langue."""
+        g.lang = get_current_language()
+        g.t = get_translations()
+
+    # Blueprints importés ici : ils importent eux-mêmes safe_int / login_required depuis ce module
+    from public_routes import bp as public_bp
+    from admin_routes import bp as admin_bp
+    app.register_blueprint(public_bp)
+    app.register_blueprint(admin_bp)
+
+    # Le schéma de la base n'est pas vérifié ici : les migrations sont appliquées
+    # une seule fois au déploiement (python migrations.py, lancé par update_vps.sh)
+    return app
 
 # ========== POINT D'ENTRÉE DÉVELOPPEMENT ==========
 if __name__ == '__main__':
-    # Crée les tables de la base de données si elles n'existent pas
+    app = create_app()
+    # Applique les migrations de schéma en attente (serveur de développement)
+    from migrations import run_migrations
     with app.app_context():
-        db.create_all()
+        run_migrations(db.engine)
     # Lance le serveur de développement Flask
     app.run(host='0.0.0.0', port=5000, debug=True)
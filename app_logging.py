@@ -0,0 +1,222 @@
+"""
+Journalisation Structurée - Application Villa à Vendre Marrakech
+
+Ce fichier configure les journaux de l'application (loggers 'villa.*') :
+
+- non bloquant : les routes déposent chaque entrée dans une file en
+  mémoire ; un thread d'arrière-plan par worker formate et écrit sur la
+  sortie standard. Un journald lent ne ralentit plus les requêtes ; si la
+  file est pleine, l'entrée est abandonnée (et comptée) plutôt que
+  d'attendre. Sous gevent, ce thread reste un vrai thread système (pool de
+  threads gevent) : l'écriture sur la sortie standard ne bloque jamais la
+  boucle des greenlets.
+- JSON : une ligne par entrée, avec horodatage, niveau, logger, message,
+  identifiant de la requête et champs passés dans extra= (durées, pages...)
+- identifiant de requête : repris de l'en-tête X-Request-ID (proxy) ou
+  généré, et renvoyé dans la réponse
+- LOG_LEVEL : niveau minimal (INFO par défaut)
+- LOG_SAMPLING : proportion conservée par type d'événement très fréquent,
+  ex. "request=0.1" (une requête sur dix dans le journal des requêtes) ;
+  les avertissements et erreurs sont toujours conservés
+
+Usage:
+    logger = logging.getLogger('villa.admin')
+    logger.info("📄 PDF extrait", extra={'event': 'pdf_extracted', 'pages': 12, 'duration_ms': 840.2})
+
+Les scripts (migrations.py, import_brochures.py...) gardent leur sortie
+console : sans init_logging(), les avertissements des loggers 'villa.*'
+s'affichent simplement sur la sortie d'erreur.
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+
+from flask import g, has_request_context, request
+
+ROOT_LOGGER = 'villa'
+
+# Entrées en attente d'écriture au maximum (au-delà, abandonnées)
+QUEUE_SIZE = 10000
+
+# Identifiant de requête accepté depuis le proxy
+REQUEST_ID = re.compile(r'^[\w.-]{1,64}$')
+
+# Attributs d'un LogRecord qui ne sont pas des champs passés dans extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+# Configuration du processus courant (un worker gunicorn = un thread d'écriture)
+_state = {'pid': None, 'listener': None, 'handler': None}
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par entrée, avec les champs passés dans extra=."""
+
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Ajoute l'identifiant de la requête en cours (thread de la requête, avant la file)."""
+
+    def filter(self, record):
+        if has_request_context() and 'request_id' in g and not hasattr(record, 'request_id'):
+            record.request_id = g.request_id
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Ne garde qu'une proportion des événements fréquents (INFO et DEBUG seulement)."""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        rate = self.rates.get(getattr(record, 'event', None))
+        if rate is None or record.levelno >= logging.WARNING:
+            return True
+        return random.random() < rate
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler qui n'attend jamais : file pleine = entrée abandonnée."""
+
+    dropped = 0
+
+    def prepare(self, record):
+        # Message figé dans le thread de la requête ; le formatage JSON se fait dans le thread d'écriture
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        # SimpleQueue n'a pas de taille maximale : la limite est vérifiée ici
+        if self.queue.qsize() >= QUEUE_SIZE:
+            DroppingQueueHandler.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+
+class NativeQueueListener(logging.handlers.QueueListener):
+    """QueueListener dont le thread d'écriture est un thread système du pool de gevent (workers gevent)."""
+
+    def start(self):
+        from gevent.threadpool import ThreadPool
+
+        self._pool = ThreadPool(1)
+        self._thread = self._pool.spawn(self._monitor)
+
+    def stop(self):
+        self.enqueue_sentinel()
+        self._thread.get()
+        self._thread = None
+        self._pool.kill()
+
+
+def _gevent_patched():
+    """True dans un worker gevent (threading remplacé par des greenlets)."""
+    monkey = sys.modules.get('gevent.monkey')
+    return bool(monkey and monkey.is_module_patched('threading'))
+
+
+def parse_sampling(value):
+    """
+    Proportions d'échantillonnage depuis LOG_SAMPLING
+
+    Exemple: "request=0.1, pdf_cache_hit=0.5" -> {'request': 0.1, 'pdf_cache_hit': 0.5}
+    """
+    rates = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            event, rate = item.split('=', 1)
+            rates[event.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+def configure_logging(level='INFO', sampling=None, stream=None):
+    """
+    Installe la file et le thread d'écriture pour les loggers 'villa.*' de ce processus
+
+    Sans effet si c'est déjà fait dans ce processus (un worker gunicorn issu
+    d'un fork refait sa propre configuration : les threads ne survivent pas au fork).
+    """
+    if _state['pid'] == os.getpid():
+        return
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter())
+    if _gevent_patched():
+        from gevent.monkey import get_original
+
+        # File et verrou natifs, partagés entre les greenlets et le thread d'écriture
+        entries = get_original('queue', 'SimpleQueue')()
+        output.lock = get_original('threading', 'RLock')()
+        listener_class = NativeQueueListener
+    else:
+        entries = queue.SimpleQueue()
+        listener_class = logging.handlers.QueueListener
+    handler = DroppingQueueHandler(entries)
+    handler.addFilter(RequestContextFilter())
+    handler.addFilter(SamplingFilter(sampling or {}))
+    listener = listener_class(handler.queue, output)
+    listener.start()
+
+    logger = logging.getLogger(ROOT_LOGGER)
+    if _state['handler'] is not None:
+        logger.removeHandler(_state['handler'])
+    logger.addHandler(handler)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.propagate = False
+    _state.update(pid=os.getpid(), listener=listener, handler=handler)
+
+
+@atexit.register
+def _flush_logs():
+    """Écrit les entrées encore en file à l'arrêt du processus."""
+    if _state['listener'] is not None and _state['pid'] == os.getpid():
+        _state['listener'].stop()
+
+
+def _assign_request_id():
+    supplied = request.headers.get('X-Request-ID', '')
+    g.request_id = supplied if REQUEST_ID.match(supplied) else uuid.uuid4().hex[:16]
+
+
+def _return_request_id(response):
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+
+def init_logging(app):
+    """Configure les journaux du worker et l'identifiant de requête (avant les autres hooks)."""
+    configure_logging(app.config['LOG_LEVEL'], parse_sampling(app.config['LOG_SAMPLING']))
+    app.before_request(_assign_request_id)
+    app.after_request(_return_request_id)
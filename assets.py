@@ -0,0 +1,385 @@
+"""
+Assets Statiques - Application Villa à Vendre Marrakech
+
+Ce fichier construit et sert les CSS / JS du site avec un cache navigateur
+d'un an :
+
+- construction (python assets.py, lancée par update_vps.sh) : chaque
+  fichier de ASSETS est minifié, nommé d'après l'empreinte de son contenu
+  (css/style.3f2a9c1b7d4e.css) et écrit dans static/dist/ avec ses
+  versions précompressées .gz et .br (paquet brotli, optionnel), puis
+  static/dist/manifest.json associe chaque chemin source à son nom final.
+  Les fichiers de la construction précédente sont conservés (pages déjà
+  servies pendant le redémarrage), les plus anciens sont supprimés.
+- CSS critique : les règles de CRITICAL_SELECTORS (en-tête et hero de la
+  page publique, visibles sans défiler) sont extraites de style.css dans
+  css/style.critical.<empreinte>.css ; index.html les insère dans la page et
+  charge style.css sans bloquer le premier affichage (CRITICAL_CSS=0 pour
+  revenir à la feuille bloquante)
+- templates : {{ asset('css/style.css') }} donne l'URL du fichier construit,
+  ou /static/css/style.css tant que rien n'est construit (développement)
+- service : /static/dist/ répond avec Cache-Control immutable et un an de
+  max-age (le nom change avec le contenu), en .br ou .gz selon
+  Accept-Encoding
+
+Après une modification d'un CSS ou d'un JS, relancer python assets.py.
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import sys
+
+from flask import current_app, request, send_from_directory, url_for
+from markupsafe import Markup
+from werkzeug.security import safe_join
+
+# Fichiers construits (chemins relatifs à static/)
+ASSETS = ['css/style.css', 'css/admin.css', 'js/admin.js']
+
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+
+# Cache des fichiers construits : leur nom change avec leur contenu
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Encodages précompressés, par ordre de préférence
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Règles affichées avant tout défilement : sélecteurs commençant par ces préfixes
+CRITICAL_SELECTORS = {
+    'css/style.css': ('*', ':root', 'html', 'body', '.container', '.hero-', '.subtitle-large', '.search-',
+                      '.btn-search', '.empty-state', '.btn-admin'),
+}
+
+# ========== MINIFICATION ==========
+
+CSS_TOKEN = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*[\s\S]*?\*/)|(\s+)|([{};,>:]|[^"'/\s{};,>:]+|/)''')
+
+# Caractères autour desquels les espaces sont inutiles en CSS (après ':' seulement : ' :hover' compte)
+CSS_TIGHT = set('{};,>')
+
+
+def minify_css(source):
+    """Supprime commentaires et espaces superflus (chaînes conservées telles quelles)."""
+    output = []
+    pending_space = False
+    for string, comment, space, other in CSS_TOKEN.findall(source):
+        if comment:
+            continue
+        if space:
+            pending_space = True
+            continue
+        token = string or other
+        if pending_space and output and output[-1] not in CSS_TIGHT and output[-1] != ':' \
+                and token not in CSS_TIGHT and not output[-1].endswith('(') and not token.startswith(')'):
+            output.append(' ')
+        pending_space = False
+        if token == '}' and output and output[-1] == ';':
+            output.pop()
+        output.append(token)
+    return ''.join(output).strip() + '\n'
+
+
+# Après ces caractères ou mots-clés, une barre oblique ouvre une expression régulière
+JS_REGEX_AFTER = set('(,=:[!&|?{};+-*%<>~^')
+JS_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void',
+                     'throw', 'instanceof', 'yield', 'await'}
+
+# Caractères autour desquels les espaces sont inutiles en JS
+JS_TIGHT = set('{}()[];,:=')
+
+
+def _end_of_quoted(source, start):
+    """Index après la chaîne, le gabarit (`...`) ou l'expression régulière commençant à start."""
+    quote = source[start]
+    index = start + 1
+    in_class = False
+    while index < len(source):
+        char = source[index]
+        if char == '\\':
+            index += 2
+            continue
+        if quote == '/':
+            if char == '[':
+                in_class = True
+            elif char == ']':
+                in_class = False
+            elif char == '/' and not in_class:
+                index += 1
+                while index < len(source) and (source[index].isalnum() or source[index] == '_'):
+                    index += 1
+                return index
+        elif char == quote:
+            return index + 1
+        index += 1
+    raise ValueError(f"Chaîne non terminée à la position {start}")
+
+
+def minify_js(source):
+    """
+    Minification prudente : commentaires, indentation, lignes vides et
+    espaces superflus supprimés
+
+    Les fins de ligne sont gardées (insertion automatique des
+    points-virgules) sauf après { ; et , où elles ne changent rien.
+    Chaînes, gabarits et expressions régulières sont recopiés tels quels.
+    """
+    output = []
+    previous = ''  # Dernier élément significatif écrit (pour distinguer division et expression régulière)
+    pending_space = pending_newline = False
+    index = 0
+    while index < len(source):
+        char = source[index]
+        following = source[index + 1] if index + 1 < len(source) else ''
+        if char == '/' and following == '/':
+            end = source.find('\n', index)
+            index = len(source) if end == -1 else end
+            continue
+        if char == '/' and following == '*':
+            end = source.find('*/', index + 2)
+            if end == -1:
+                raise ValueError(f"Commentaire non terminé à la position {index}")
+            if '\n' in source[index:end]:
+                pending_newline = True
+            else:
+                pending_space = True
+            index = end + 2
+            continue
+        if char == '\n':
+            pending_newline = True
+            index += 1
+            continue
+        if char in ' \t\r':
+            pending_space = True
+            index += 1
+            continue
+
+        if char in '\'"`' or (char == '/' and (not previous or previous[-1] in JS_REGEX_AFTER
+                                                or previous in JS_REGEX_KEYWORDS)):
+            end = _end_of_quoted(source, index)
+        elif char.isalnum() or char in '_$':
+            end = index
+            while end < len(source) and (source[end].isalnum() or source[end] in '_$'):
+                end += 1
+        else:
+            end = index + 1
+        token = source[index:end]
+
+        if output:
+            last = output[-1][-1]
+            if pending_newline and last not in '{;,':
+                output.append('\n')
+            elif (pending_space or pending_newline) and last not in JS_TIGHT and token[0] not in JS_TIGHT:
+                output.append(' ')
+        pending_space = pending_newline = False
+        output.append(token)
+        previous = token
+        index = end
+    return ''.join(output) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+CSS_STRING = re.compile(r'''(?:"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')''')
+
+
+def _css_blocks(css):
+    """Blocs de premier niveau d'un CSS minifié : [(sélecteurs ou @règle, contenu)]."""
+    blocks = []
+    depth = start = opened = index = 0
+    while index < len(css):
+        char = css[index]
+        if char in '"\'':
+            index = CSS_STRING.match(css, index).end()
+            continue
+        if char == '{':
+            if depth == 0:
+                opened = index
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                blocks.append((css[start:opened].strip(), css[opened + 1:index]))
+                start = index + 1
+        index += 1
+    return blocks
+
+
+def extract_critical_css(css, prefixes):
+    """
+    Règles dont un sélecteur commence par l'un des préfixes
+
+    Les @media sont conservées avec leurs seules règles critiques ; les
+    autres @règles (@font-face, @keyframes) sont gardées entières.
+    """
+    output = []
+    for prelude, body in _css_blocks(css):
+        if prelude.startswith('@media'):
+            inner = extract_critical_css(body, prefixes)
+            if inner:
+                output.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@') or any(selector.strip().startswith(prefixes)
+                                            for selector in prelude.split(',')):
+            output.append(f'{prelude}{{{body}}}')
+    return ''.join(output)
+
+
+def critical_path(path):
+    """Clé du manifeste du CSS critique d'une feuille (css/style.css -> css/style.critical.css)."""
+    base, extension = os.path.splitext(path)
+    return f'{base}.critical{extension}'
+
+# ========== CONSTRUCTION ==========
+
+
+def _compress_brotli(data):
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli.compress(data, quality=11)
+
+
+def build_assets(static_dir, assets=ASSETS):
+    """
+    Construit les assets dans static/dist/ et écrit le manifeste
+
+    Returns:
+        dict: {chemin source: {'file', 'bytes', 'minified', 'gzip', 'brotli'}}
+    """
+    dist_dir = os.path.join(static_dir, DIST_DIR)
+    manifest_path = os.path.join(dist_dir, MANIFEST)
+    previous = load_manifest(manifest_path)
+
+    manifest, report = {}, {}
+    for path in assets:
+        with open(os.path.join(static_dir, path), encoding='utf-8') as handle:
+            source = handle.read()
+        base, extension = os.path.splitext(path)
+        data = MINIFIERS[extension](source).encode('utf-8')
+        name = f'{base}.{hashlib.sha256(data).hexdigest()[:12]}{extension}'
+        target = os.path.join(dist_dir, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as handle:
+            handle.write(data)
+        gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+        with open(target + '.gz', 'wb') as handle:
+            handle.write(gzipped)
+        brotli_data = _compress_brotli(data)
+        if brotli_data is not None:
+            with open(target + '.br', 'wb') as handle:
+                handle.write(brotli_data)
+        manifest[path] = name
+        report[path] = {'file': name, 'bytes': len(source.encode('utf-8')), 'minified': len(data),
+                        'gzip': len(gzipped), 'brotli': len(brotli_data) if brotli_data is not None else None}
+
+        if path in CRITICAL_SELECTORS:
+            # Inséré dans la page : ni version compressée ni cache navigateur à prévoir
+            critical = extract_critical_css(data.decode('utf-8'), CRITICAL_SELECTORS[path]).encode('utf-8')
+            critical_name = f'{base}.critical.{hashlib.sha256(critical).hexdigest()[:12]}{extension}'
+            with open(os.path.join(dist_dir, critical_name), 'wb') as handle:
+                handle.write(critical)
+            manifest[critical_path(path)] = critical_name
+            report[path]['critical'] = len(critical)
+
+    temporary = manifest_path + '.tmp'
+    with open(temporary, 'w') as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+    os.replace(temporary, manifest_path)
+
+    # Garder cette construction et la précédente, supprimer le reste
+    keep = {MANIFEST} | {
+        name + suffix for name in set(manifest.values()) | set(previous.values()) for suffix in ('', '.gz', '.br')
+    }
+    for root, _, filenames in os.walk(dist_dir):
+        for filename in filenames:
+            relative = os.path.relpath(os.path.join(root, filename), dist_dir).replace(os.sep, '/')
+            if relative not in keep:
+                os.remove(os.path.join(root, filename))
+    return report
+
+
+# ========== TEMPLATES ET SERVICE ==========
+
+
+def load_manifest(path):
+    """Manifeste des assets construits ({} s'il n'y en a pas)."""
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def asset_url(path):
+    """URL d'un asset : fichier construit (empreinte) ou fichier source si rien n'est construit."""
+    built = current_app.extensions['assets'].get(path)
+    if built:
+        return url_for('assets', filename=built)
+    return url_for('static', filename=path)
+
+
+def critical_css(path):
+    """CSS critique d'une feuille, à insérer dans un <style> ('' sans construction ou si CRITICAL_CSS=0)."""
+    return current_app.extensions['critical_css'].get(path, '')
+
+
+def serve_asset(filename):
+    """Fichier de static/dist/, précompressé si le navigateur l'accepte, en cache pour un an."""
+    directory = os.path.join(current_app.static_folder, DIST_DIR)
+    mimetype = mimetypes.guess_type(filename)[0]
+    for encoding, suffix in ENCODINGS:
+        compressed = safe_join(directory, filename + suffix)
+        if encoding in request.accept_encodings and compressed and os.path.isfile(compressed):
+            response = send_from_directory(directory, filename + suffix, mimetype=mimetype,
+                                           max_age=IMMUTABLE_MAX_AGE)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(directory, filename, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def init_assets(app):
+    """Charge le manifeste et le CSS critique, déclare {{ asset(...) }}, {{ critical_css(...) }} et /static/dist/."""
+    dist_dir = os.path.join(app.static_folder, DIST_DIR)
+    manifest = load_manifest(os.path.join(dist_dir, MANIFEST))
+    app.extensions['assets'] = manifest
+    app.extensions['critical_css'] = {}
+    if app.config.get('CRITICAL_CSS', True):
+        for path in CRITICAL_SELECTORS:
+            built = manifest.get(critical_path(path))
+            try:
+                with open(os.path.join(dist_dir, built or ''), encoding='utf-8') as handle:
+                    app.extensions['critical_css'][path] = Markup(handle.read())
+            except OSError:
+                continue
+    app.add_template_global(asset_url, 'asset')
+    app.add_template_global(critical_css)
+    app.add_url_rule(f'{app.static_url_path}/{DIST_DIR}/<path:filename>', 'assets', serve_asset)
+
+
+if __name__ == '__main__':
+    static = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    results = build_assets(static)
+    for source, result in results.items():
+        brotli_size = f"{result['brotli']:>7}" if result['brotli'] is not None else '      -'
+        print(f"📦 {source:<16} {result['bytes']:>7} -> {result['minified']:>7} octets "
+              f"(gzip {result['gzip']:>6}, brotli {brotli_size})  {result['file']}")
+        if 'critical' in result:
+            print(f"   {'':<16} CSS critique (inséré dans la page) : {result['critical']} octets")
+    if any(result['brotli'] is None for result in results.values()):
+        print("ℹ️  Paquet brotli absent : seules les versions .gz sont écrites (pip install brotli)")
+    sys.exit(0)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Latence des pages publiques pendant des appels IA lents : workers sync vs gevent
+
+Pour chaque type de worker gunicorn (--worker-classes), mesure la page
+d'accueil (/) :
+1. au repos
+2. pendant que --ai-calls administrateurs attendent chacun une réponse IA
+   de --ai-delay secondes (POST /api/enhance en boucle)
+
+Les appels IA sont servis par un faux OpenRouter local (OPENROUTER_URL) qui
+répond après --ai-delay secondes : aucun accès réseau ni clé API. Avec des
+workers sync, chaque appel en attente immobilise un worker et la page
+d'accueil attend son tour (« - » : aucune réponse dans la fenêtre mesurée) ;
+avec gevent, les appels ne coûtent que des greenlets et la latence de /
+doit rester stable. Les pages
+publiques lisent PostgreSQL (psycopg2) : le banc vérifie aussi que les
+requêtes SQL ne bloquent pas le worker gevent.
+
+La villa de test de load_test.py est insérée puis supprimée (sauf --keep).
+
+Usage:
+    python benchmarks/async_workers.py --database-url postgresql://postgres@localhost/villa_load
+    python benchmarks/async_workers.py --database-url ... --workers 2 --ai-calls 32 --ai-delay 10
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from load_test import delete_villa, free_port, prepare_database, run_level, start_server  # noqa: E402
+
+ADMIN_PASSWORD = 'benchmark'
+
+
+def fake_openrouter(delay):
+    """Faux OpenRouter : répond à chaque appel après `delay` secondes."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(delay)
+            body = json.dumps({'choices': [{'message': {'content': 'Texte amélioré'}}]}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', free_port()), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def admin_cookie(port):
+    """Ouvre une session administrateur et renvoie son cookie."""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    connection.request('POST', '/login', body=urllib.parse.urlencode({'password': ADMIN_PASSWORD}),
+                       headers={'Content-Type': 'application/x-www-form-urlencoded'})
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    cookie = response.getheader('Set-Cookie', '').split(';', 1)[0]
+    if response.status != 302 or not cookie:
+        raise SystemExit(f"❌ Connexion administrateur refusée (statut {response.status})")
+    return cookie
+
+
+def ai_client(port, cookie, stop, completed, lock):
+    """Appelle /api/enhance en boucle jusqu'à `stop`."""
+    body = json.dumps({'text': 'Belle villa avec piscine', 'field': 'description'})
+    while not stop.is_set():
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=300)
+        try:
+            connection.request('POST', '/api/enhance', body=body,
+                               headers={'Content-Type': 'application/json', 'Cookie': cookie})
+            response = connection.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            ok = False
+        finally:
+            connection.close()
+        with lock:
+            completed['ok' if ok else 'errors'] += 1
+
+
+def measure(port, args):
+    """Mesure / au repos puis pendant les appels IA."""
+    idle = run_level(port, '/', args.concurrency, args.warmup, args.duration)
+
+    cookie = admin_cookie(port)
+    stop, lock = threading.Event(), threading.Lock()
+    completed = {'ok': 0, 'errors': 0}
+    clients = [threading.Thread(target=ai_client, args=(port, cookie, stop, completed, lock), daemon=True)
+               for _ in range(args.ai_calls)]
+    for thread in clients:
+        thread.start()
+    # Les appels IA occupent le serveur avant le début de la mesure
+    time.sleep(min(args.ai_delay / 2, 2))
+    busy = run_level(port, '/', args.concurrency, args.warmup, args.duration)
+    stop.set()
+    for thread in clients:
+        thread.join(args.ai_delay * 2 + 30)
+    return {'idle': idle, 'ai_in_flight': busy, 'ai_calls': dict(completed)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence de / pendant des appels IA lents (sync vs gevent)")
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'),
+                        help="Base PostgreSQL de test (défaut: DATABASE_URL)")
+    parser.add_argument('--worker-classes', default='sync,gevent', help="Types de workers comparés")
+    parser.add_argument('--workers', type=int, default=2, help="Workers gunicorn")
+    parser.add_argument('--ai-calls', type=int, default=16, help="Appels IA simultanés")
+    parser.add_argument('--ai-delay', type=float, default=5, help="Durée d'un appel IA (secondes)")
+    parser.add_argument('--concurrency', type=int, default=4, help="Clients simultanés sur /")
+    parser.add_argument('--duration', type=float, default=10, help="Durée mesurée (secondes)")
+    parser.add_argument('--warmup', type=float, default=1, help="Chauffe non comptée (secondes)")
+    parser.add_argument('--output', help="Écrit les résultats dans ce fichier JSON")
+    parser.add_argument('--keep', action='store_true', help="Conserver la villa de test")
+    args = parser.parse_args()
+
+    if not args.database_url or not args.database_url.startswith('postgres'):
+        parser.error("une base PostgreSQL est nécessaire (--database-url postgresql://...)")
+
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ.setdefault('SESSION_SECRET', 'benchmark')
+    os.environ['OPENROUTER_API_KEY'] = 'benchmark'
+    os.environ['ADMIN_PASSWORD'] = ADMIN_PASSWORD
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('RATE_LIMITS', 'off')
+
+    stub = fake_openrouter(args.ai_delay)
+    prepare_database()
+    results = {}
+    try:
+        print(f"🚦 {args.workers} workers, {args.ai_calls} appels IA de {args.ai_delay:g}s, "
+              f"{args.concurrency} clients sur / pendant {args.duration:g}s")
+        print(f"\n{'Workers':<9}{'phase':<14}{'req/s':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'erreurs':>9}  (ms)")
+        for worker_class in [name.strip() for name in args.worker_classes.split(',') if name.strip()]:
+            env = dict(os.environ, GUNICORN_WORKER_CLASS=worker_class,
+                       OPENROUTER_URL=f'http://127.0.0.1:{stub.server_port}/api/v1/chat/completions')
+            port = free_port()
+            server = start_server(ROOT, env, port, args.workers)
+            try:
+                results[worker_class] = measure(port, args)
+            finally:
+                server.terminate()
+                server.wait()
+            for phase in ('idle', 'ai_in_flight'):
+                result = results[worker_class][phase]
+                latencies = ''.join(f"{result[name]:>9.1f}" if result[name] is not None else f"{'-':>9}"
+                                    for name in ('p50_ms', 'p95_ms', 'p99_ms'))
+                print(f"{worker_class:<9}{phase:<14}{result['rps']:>8.1f}{latencies}{result['errors']:>9}")
+            calls = results[worker_class]['ai_calls']
+            print(f"{'':<9}appels IA terminés : {calls['ok']} ({calls['errors']} erreurs)")
+    finally:
+        stub.shutdown()
+        if not args.keep:
+            delete_villa()
+
+    if args.output:
+        report = {
+            'environment': {
+                'workers': args.workers, 'ai_calls': args.ai_calls, 'ai_delay': args.ai_delay,
+                'concurrency': args.concurrency, 'duration': args.duration,
+                'cpus': os.cpu_count(), 'python': platform.python_version(),
+            },
+            'results': results,
+        }
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Premier affichage de la page publique : CSS critique inséré vs feuille bloquante
+
+Lance l'application avec gunicorn (assets construits par assets.py, villa
+de test de load_test.py), puis charge / dans Chrome sans interface,
+--runs fois pour chaque variante :
+- blocking : CRITICAL_CSS=0, <link rel="stylesheet"> vers style.css
+- critical : CRITICAL_CSS=1, styles du hero dans la page, style.css chargé
+  sans bloquer
+
+Chaque chargement utilise un profil Chrome neuf (cache vide) et un réseau
+simulé (--latency ms par aller-retour, --download-kbps), et mesure le
+first-contentful-paint (FCP) et l'événement load. Chrome est piloté par
+--remote-debugging-pipe (protocole DevTools sur deux descripteurs) : aucune
+dépendance Python supplémentaire. Chrome est cherché dans --chrome,
+CHROME_PATH, le PATH puis le cache de Puppeteer (~/.cache/puppeteer).
+
+Sans --database-url, une base SQLite temporaire est utilisée ; la villa de
+test est supprimée à la fin (sauf --keep).
+
+Usage:
+    python benchmarks/critical_css.py
+    python benchmarks/critical_css.py --runs 10 --latency 150 --download-kbps 1600
+    python benchmarks/critical_css.py --database-url postgresql://postgres@localhost/villa_load --output fcp.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import select
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from load_test import delete_villa, free_port, prepare_database, start_server  # noqa: E402
+
+VARIANTS = (('blocking', '0'), ('critical', '1'))
+
+CHROME_NAMES = ('chromium', 'chromium-browser', 'google-chrome', 'google-chrome-stable', 'chrome-headless-shell')
+
+# Instants mesurés (ms depuis le début de la navigation)
+TIMINGS_SCRIPT = (
+    "JSON.stringify({"
+    "fcp: (performance.getEntriesByName('first-contentful-paint')[0] || {}).startTime || null, "
+    "load: performance.getEntriesByType('navigation')[0].loadEventStart"
+    "})"
+)
+
+
+def find_chrome(explicit=None):
+    candidates = [explicit, os.environ.get('CHROME_PATH')] + [shutil.which(name) for name in CHROME_NAMES]
+    candidates += sorted(glob.glob(os.path.expanduser('~/.cache/puppeteer/chrome*/*/*/chrome*')))
+    for candidate in candidates:
+        if candidate and os.path.isfile(candidate) and os.access(candidate, os.X_OK):
+            return candidate
+    raise SystemExit("❌ Chrome introuvable (--chrome ou CHROME_PATH)")
+
+
+class Chrome:
+    """Chrome sans interface piloté par le protocole DevTools (messages JSON séparés par \\0)."""
+
+    def __init__(self, path):
+        to_chrome_read, self._to_chrome = os.pipe()
+        self._from_chrome, from_chrome_write = os.pipe()
+        self._profile = tempfile.mkdtemp(prefix='villa-chrome-')
+
+        def use_pipe_descriptors():
+            # Chrome lit les commandes sur le descripteur 3 et répond sur le 4
+            reader, writer = os.dup(to_chrome_read), os.dup(from_chrome_write)
+            os.dup2(reader, 3)
+            os.dup2(writer, 4)
+
+        arguments = [path, '--headless=new', '--remote-debugging-pipe', f'--user-data-dir={self._profile}',
+                     '--no-first-run', '--no-default-browser-check', '--disable-gpu', '--window-size=1366,768',
+                     'about:blank']
+        if hasattr(os, 'geteuid') and os.geteuid() == 0:
+            arguments.insert(1, '--no-sandbox')
+        self.process = subprocess.Popen(arguments, preexec_fn=use_pipe_descriptors, close_fds=False,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        os.close(to_chrome_read)
+        os.close(from_chrome_write)
+        self._buffer = b''
+        self._events = []
+        self._next_id = 0
+
+    def _read_message(self, deadline):
+        while b'\0' not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([self._from_chrome], [], [], remaining)[0]:
+                raise TimeoutError("Chrome ne répond pas")
+            chunk = os.read(self._from_chrome, 65536)
+            if not chunk:
+                raise RuntimeError("Chrome s'est arrêté")
+            self._buffer += chunk
+        message, self._buffer = self._buffer.split(b'\0', 1)
+        return json.loads(message)
+
+    def send(self, method, params=None, session=None, timeout=30):
+        self._next_id += 1
+        message = {'id': self._next_id, 'method': method, 'params': params or {}}
+        if session:
+            message['sessionId'] = session
+        os.write(self._to_chrome, json.dumps(message).encode() + b'\0')
+        deadline = time.monotonic() + timeout
+        while True:
+            reply = self._read_message(deadline)
+            if reply.get('id') == self._next_id:
+                if 'error' in reply:
+                    raise RuntimeError(f"{method}: {reply['error'].get('message')}")
+                return reply.get('result', {})
+            self._events.append(reply)
+
+    def wait_event(self, method, session, timeout=60):
+        deadline = time.monotonic() + timeout
+        while True:
+            for event in self._events:
+                if event.get('method') == method and event.get('sessionId') == session:
+                    self._events.remove(event)
+                    return event.get('params', {})
+            self._events.append(self._read_message(deadline))
+
+    def close(self):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        os.close(self._to_chrome)
+        os.close(self._from_chrome)
+        shutil.rmtree(self._profile, ignore_errors=True)
+
+
+def load_page(chrome_path, url, latency, download_kbps):
+    """Charge url dans un Chrome neuf et renvoie FCP et load (ms depuis le début de la navigation)."""
+    chrome = Chrome(chrome_path)
+    try:
+        target = chrome.send('Target.createTarget', {'url': 'about:blank'})['targetId']
+        session = chrome.send('Target.attachToTarget', {'targetId': target, 'flatten': True})['sessionId']
+        chrome.send('Page.enable', session=session)
+        chrome.send('Network.enable', session=session)
+        throughput = download_kbps * 1000 / 8
+        chrome.send('Network.emulateNetworkConditions', {
+            'offline': False, 'latency': latency,
+            'downloadThroughput': throughput, 'uploadThroughput': throughput,
+        }, session=session)
+        chrome.send('Page.navigate', {'url': url}, session=session)
+        chrome.wait_event('Page.loadEventFired', session)
+        timings = {}
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            result = chrome.send('Runtime.evaluate', {'expression': TIMINGS_SCRIPT, 'returnByValue': True},
+                                 session=session)
+            timings = json.loads(result['result']['value'])
+            if timings['fcp'] is not None:
+                break
+            time.sleep(0.1)
+        return {'fcp_ms': timings.get('fcp'), 'load_ms': timings.get('load')}
+    finally:
+        chrome.close()
+
+
+def summarize(samples):
+    result = {}
+    for name in ('fcp_ms', 'load_ms'):
+        values = [sample[name] for sample in samples if sample[name] is not None]
+        result[name] = {
+            'median': round(statistics.median(values), 1) if values else None,
+            'min': round(min(values), 1) if values else None,
+            'max': round(max(values), 1) if values else None,
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FCP de / : CSS critique inséré vs feuille bloquante")
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'),
+                        help="Base de test (défaut: DATABASE_URL, sinon SQLite temporaire)")
+    parser.add_argument('--chrome', help="Exécutable Chrome / Chromium")
+    parser.add_argument('--runs', type=int, default=5, help="Chargements par variante")
+    parser.add_argument('--latency', type=float, default=150, help="Aller-retour réseau simulé (ms)")
+    parser.add_argument('--download-kbps', type=float, default=1600, help="Débit descendant simulé (kbit/s)")
+    parser.add_argument('--output', help="Écrit les résultats dans ce fichier JSON")
+    parser.add_argument('--keep', action='store_true', help="Conserver la villa de test")
+    args = parser.parse_args()
+
+    chrome_path = find_chrome(args.chrome)
+    sqlite_path = None
+    if not args.database_url:
+        handle, sqlite_path = tempfile.mkstemp(prefix='villa-fcp-', suffix='.db')
+        os.close(handle)
+        args.database_url = f'sqlite:///{sqlite_path}'
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ.setdefault('SESSION_SECRET', 'benchmark')
+    os.environ.setdefault('OPENROUTER_API_KEY', 'benchmark')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('RATE_LIMITS', 'off')
+
+    from assets import build_assets
+    build_assets(os.path.join(ROOT, 'static'))
+    prepare_database()
+    results = {}
+    try:
+        print(f"🌐 {os.path.basename(chrome_path)}, {args.runs} chargements par variante, "
+              f"{args.latency:g} ms d'aller-retour, {args.download_kbps:g} kbit/s")
+        print(f"\n{'Variante':<10}{'FCP médian':>12}{'min':>9}{'max':>9}{'load médian':>13}  (ms)")
+        for name, flag in VARIANTS:
+            port = free_port()
+            server = start_server(ROOT, dict(os.environ, CRITICAL_CSS=flag), port, 1)
+            try:
+                samples = [load_page(chrome_path, f'http://127.0.0.1:{port}/', args.latency, args.download_kbps)
+                           for _ in range(args.runs)]
+            finally:
+                server.terminate()
+                server.wait()
+            results[name] = dict(summarize(samples), samples=samples)
+            fcp, load = results[name]['fcp_ms'], results[name]['load_ms']
+            print(f"{name:<10}{fcp['median'] or 0:>12.1f}{fcp['min'] or 0:>9.1f}{fcp['max'] or 0:>9.1f}"
+                  f"{load['median'] or 0:>13.1f}")
+    finally:
+        if not args.keep:
+            delete_villa()
+        if sqlite_path:
+            os.remove(sqlite_path)
+
+    if args.output:
+        report = {
+            'environment': {
+                'runs': args.runs, 'latency_ms': args.latency, 'download_kbps': args.download_kbps,
+                'chrome': os.path.basename(chrome_path), 'cpus': os.cpu_count(),
+                'python': platform.python_version(),
+            },
+            'results': results,
+        }
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la lecture publique d'une villa dans une langue
+
+Les textes localisés sont stockés dans villa_translation ; une lecture
+publique charge la ligne villa (Villa.public_options() : colonnes communes
++ indicateurs de présence, identiques pour toutes les langues) puis les
+textes d'une seule langue avec Villa.load_translations(). Chaque langue est
+comparée à la lecture de tous les textes de la villa (ligne "toutes", ce
+que chargeait une page quand la ligne villa portait les textes FR et EN).
+Mesure :
+- volume transféré (ligne villa, puis textes)
+- temps de requête + hydratation ORM par lecture complète
+
+Une villa de test aux textes réalistes (FR + EN) est insérée puis supprimée.
+
+Usage:
+    python benchmarks/language_projection.py
+    python benchmarks/language_projection.py --database-url postgresql://user@localhost/villa_bench --iterations 2000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCH_REFERENCE = 'BENCH-PROJECTION'
+
+
+def seed_villa(Villa, db):
+    """Insère une villa dont chaque texte a une taille réaliste."""
+    villa = Villa(reference=BENCH_REFERENCE, price=2500000, location='Palmeraie, Marrakech',
+                  is_active=True, bedrooms=6, built_area=650, terrain_area=5000, pool_size='15m x 7m')
+    villa.set_images_list([f'villa_{i:02d}.jpg' for i in range(24)])
+    long_fields = {'description', 'features', 'equipment', 'business_info', 'investment_benefits', 'documents'}
+    for lang in Villa.LANGUAGES:
+        for field in Villa.LOCALIZED_FIELDS:
+            size = 2500 if field in long_fields or field.endswith('_desc') else 80
+            villa.set_text(field, lang, (f'{lang} {field} ' * 200)[:size])
+    db.session.add(villa)
+    db.session.commit()
+
+
+def row_bytes(row):
+    return sum(len(str(value).encode()) for value in row if value is not None)
+
+
+def measure(db, Villa, VillaTranslation, lang, iterations):
+    """
+    Temps moyen (ms) d'une lecture publique complète, et volume reçu
+    
+    Args:
+        lang (str): Langue lue, ou None pour les textes de toutes les langues
+    
+    Returns:
+        tuple: (ms, colonnes villa, octets villa, textes chargés, octets textes)
+    """
+    statement = db.select(Villa).options(*Villa.public_options()).filter_by(reference=BENCH_REFERENCE)
+    connection = db.session.connection()
+    raw = connection.execute(statement).first()
+    texts_statement = db.select(VillaTranslation.lang, VillaTranslation.field, VillaTranslation.text) \
+        .join(Villa).filter(Villa.reference == BENCH_REFERENCE)
+    if lang:
+        texts_statement = texts_statement.filter(VillaTranslation.lang == lang)
+    texts = connection.execute(texts_statement).all()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        villa = db.session.execute(statement).scalar_one()
+        if lang:
+            Villa.load_translations([villa], lang)
+        else:
+            db.session.execute(db.select(VillaTranslation).filter_by(villa_id=villa.id)).scalars().all()
+        db.session.expunge_all()
+    ms = (time.perf_counter() - start) / iterations * 1000
+    return ms, len(raw), row_bytes(raw), len(texts), sum(row_bytes(row) for row in texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du chargement projeté par langue")
+    parser.add_argument('--database-url', default=os.environ.get(
+        'DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'villa_bench.db')))
+    parser.add_argument('--iterations', type=int, default=1000)
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ.setdefault('SESSION_SECRET', 'benchmark')
+    os.environ.setdefault('OPENROUTER_API_KEY', 'benchmark')
+
+    from app import create_app
+    from models import Villa, VillaTranslation, db
+    from migrations import run_migrations
+
+    with create_app().app_context():
+        run_migrations(db.engine)
+        for villa in Villa.query.filter_by(reference=BENCH_REFERENCE):
+            db.session.delete(villa)
+        db.session.commit()
+        seed_villa(Villa, db)
+        try:
+            print(f"{'Langue':<8}{'colonnes':>10}{'octets villa':>14}{'textes':>8}{'octets textes':>15}{'ms/lecture':>12}")
+            for lang in Villa.LANGUAGES + (None,):
+                ms, columns, size, text_count, text_size = measure(db, Villa, VillaTranslation, lang, args.iterations)
+                print(f"{lang or 'toutes':<8}{columns:>10}{size:>14}{text_count:>8}{text_size:>15}{ms:>12.3f}")
+        finally:
+            for villa in Villa.query.filter_by(reference=BENCH_REFERENCE):
+                db.session.delete(villa)
+            db.session.commit()
+
+
+if __name__ == '__main__':
+    main()
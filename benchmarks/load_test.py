@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Test de charge HTTP des routes publiques sous gunicorn
+
+Lance l'application avec gunicorn sur un port local, insère une villa de
+test réaliste (textes FR + EN, 24 photos), puis pour chaque route
+(/, /api/villa, /sitemap.xml, /robots.txt) et chaque niveau de
+concurrence envoie des requêtes en continu pendant --duration secondes
+(après --warmup secondes non comptées) et mesure :
+- requêtes par seconde (réponses 200)
+- latence p50 / p95 / p99
+- erreurs (statut différent de 200, connexion refusée, délai dépassé)
+
+Aucun accès réseau : le serveur écoute sur 127.0.0.1 et le client utilise
+http.client (threads, une connexion par thread). La villa de test est
+supprimée à la fin (sauf --keep) ; pour que / la serve, utiliser une base
+dédiée sans autre villa active. La limitation de débit est désactivée
+(RATE_LIMITS=off, sauf si la variable est définie).
+
+Comparaison entre versions : --save-baseline enregistre les résultats dans
+benchmarks/baselines/load_test.json (à committer) ; les exécutions
+suivantes les comparent et échouent (code de sortie 1) si le débit baisse
+ou si le p95 ou le taux d'erreurs augmente de plus de --threshold (toute
+erreur est une régression si la référence n'en avait aucune). Les mesures ne sont
+comparables que sur la même machine, avec les mêmes --workers et niveaux.
+--root permet de mesurer une autre copie du projet (ex. `git archive`).
+
+Usage:
+    python benchmarks/load_test.py --database-url postgresql://postgres@localhost/villa_load
+    python benchmarks/load_test.py --database-url ... --levels 1,8,32 --duration 20 --save-baseline
+    python benchmarks/load_test.py --database-url ... --routes /,/api/villa --threshold 0.1
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BENCH_REFERENCE = 'BENCH-LOAD'
+ROUTES = ['/', '/api/villa', '/sitemap.xml', '/robots.txt']
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baselines', 'load_test.json')
+
+# Textes d'une annonce réelle (tailles comparables à une brochure importée)
+DESCRIPTION = {
+    'fr': ("Nichée au cœur de la Palmeraie, cette villa contemporaine de 650 m² sur un parc "
+           "arboré de 5 000 m² offre des volumes généreux baignés de lumière. ") * 12,
+    'en': ("Nestled in the heart of the Palmeraie, this 650 m² contemporary villa set in "
+           "5,000 m² of landscaped grounds offers generous, light-filled volumes. ") * 12,
+}
+FEATURES = {
+    'fr': "\n".join(['6 suites avec salle de bain', 'Piscine chauffée 15m x 7m', 'Hammam traditionnel',
+                     'Vue sur l\'Atlas', 'Cuisine équipée', 'Salle de cinéma'] * 3),
+    'en': "\n".join(['6 en-suite bedrooms', 'Heated 15m x 7m pool', 'Traditional hammam',
+                     'Atlas mountains view', 'Fitted kitchen', 'Home cinema'] * 3),
+}
+
+
+def seed_villa(Villa, db):
+    """Insère la villa de test : textes de longueur réaliste et 24 photos."""
+    villa = Villa(reference=BENCH_REFERENCE, price=2500000, location='Palmeraie, Marrakech',
+                  distance_city='15 min du centre', is_active=True, bedrooms=6, built_area=650,
+                  terrain_area=5000, pool_size='15m x 7m', contact_phone='+212 600 000 000',
+                  contact_email='contact@example.com')
+    villa.set_images_list([f'1729500000{i:03d}_{i:08x}_villa_photo_{i:02d}.jpg' for i in range(24)])
+    for lang in Villa.LANGUAGES:
+        for field in Villa.LOCALIZED_FIELDS:
+            if field == 'description':
+                text = DESCRIPTION[lang]
+            elif field in ('features', 'equipment'):
+                text = FEATURES[lang]
+            elif field in ('business_info', 'investment_benefits', 'documents') or field.endswith('_desc'):
+                text = DESCRIPTION[lang][:600]
+            else:
+                text = f'{field.replace("_", " ").capitalize()} ({lang})'
+            villa.set_text(field, lang, text)
+    db.session.add(villa)
+    db.session.commit()
+
+
+def prepare_database():
+    """Applique les migrations et (ré)insère la villa de test."""
+    from app import create_app
+    from migrations import run_migrations
+    from models import Villa, db
+
+    with create_app().app_context():
+        run_migrations(db.engine)
+        Villa.query.filter_by(reference=BENCH_REFERENCE).delete()
+        db.session.commit()
+        seed_villa(Villa, db)
+        others = Villa.query.filter(Villa.is_active.is_(True), Villa.reference != BENCH_REFERENCE).count()
+        if others:
+            print(f"⚠️  {others} autre(s) villa(s) active(s) dans la base : / peut servir une autre villa")
+
+
+def delete_villa():
+    from app import create_app
+    from models import Villa, db
+
+    with create_app().app_context():
+        Villa.query.filter_by(reference=BENCH_REFERENCE).delete()
+        db.session.commit()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(root, env, port, workers):
+    """Démarre gunicorn et attend qu'il réponde."""
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--bind', f'127.0.0.1:{port}',
+         '--log-level', 'warning', 'main:app'],
+        cwd=root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"❌ gunicorn s'est arrêté :\n{server.stderr.read()}")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            connection.request('GET', '/robots.txt')
+            if connection.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit("❌ gunicorn ne répond pas après 30 s")
+
+
+def client(port, path, deadline, measure_from, latencies, errors, lock):
+    """Envoie des requêtes en boucle jusqu'à deadline ; ne garde que celles lancées après measure_from."""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    own_latencies, own_errors = [], 0
+    while True:
+        start = time.perf_counter()
+        if start >= deadline:
+            break
+        try:
+            connection.request('GET', path, headers={'Accept-Language': 'fr'})
+            response = connection.getresponse()
+            response.read()
+            ok = response.status == 200
+            if response.will_close:
+                connection.close()
+        except (OSError, http.client.HTTPException):
+            ok = False
+            connection.close()
+        if start >= measure_from:
+            if ok:
+                own_latencies.append(time.perf_counter() - start)
+            else:
+                own_errors += 1
+    connection.close()
+    with lock:
+        latencies.extend(own_latencies)
+        errors[0] += own_errors
+
+
+def percentile(values, ratio):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(ratio * (len(ordered) - 1))))]
+
+
+def run_level(port, path, concurrency, warmup, duration):
+    """Charge une route avec `concurrency` clients simultanés."""
+    latencies, errors, lock = [], [0], threading.Lock()
+    measure_from = time.perf_counter() + warmup
+    deadline = measure_from + duration
+    threads = [threading.Thread(target=client, args=(port, path, deadline, measure_from, latencies, errors, lock))
+               for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result = {'requests': len(latencies), 'errors': errors[0], 'rps': round(len(latencies) / duration, 1)}
+    for name, ratio in (('p50_ms', 0.5), ('p95_ms', 0.95), ('p99_ms', 0.99)):
+        result[name] = round(percentile(latencies, ratio) * 1000, 2) if latencies else None
+    return result
+
+
+def error_rate(result):
+    """Part des requêtes en erreur (statut différent de 200, connexion refusée, délai dépassé)."""
+    attempts = result['requests'] + result['errors']
+    return result['errors'] / attempts if attempts else 0.0
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare aux résultats de référence
+
+    Returns:
+        list: Régressions (débit en baisse, p95 ou taux d'erreurs en hausse de plus
+              de threshold ; toute erreur si la référence n'en avait aucune)
+    """
+    regressions = []
+    for path, levels in results.items():
+        for level, current in levels.items():
+            reference = baseline.get(path, {}).get(level)
+            if not reference:
+                continue
+            if current['rps'] < reference['rps'] * (1 - threshold):
+                regressions.append(f"{path} x{level}: {current['rps']} req/s (référence {reference['rps']})")
+            if current['p95_ms'] is not None and reference['p95_ms'] is not None \
+                    and current['p95_ms'] > reference['p95_ms'] * (1 + threshold):
+                regressions.append(f"{path} x{level}: p95 {current['p95_ms']} ms (référence {reference['p95_ms']})")
+            current_rate, reference_rate = error_rate(current), error_rate(reference)
+            if current['errors'] and current_rate > reference_rate * (1 + threshold):
+                regressions.append(f"{path} x{level}: {current_rate:.2%} d'erreurs "
+                                   f"({current['errors']}, référence {reference_rate:.2%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge HTTP des routes publiques")
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'),
+                        help="Base PostgreSQL de test (défaut: DATABASE_URL)")
+    parser.add_argument('--root', default=ROOT, help="Répertoire du projet servi (défaut: ce dépôt)")
+    parser.add_argument('--routes', default=','.join(ROUTES), help="Routes testées, séparées par des virgules")
+    parser.add_argument('--levels', default='1,4,16,32', help="Niveaux de concurrence")
+    parser.add_argument('--workers', type=int, default=4, help="Workers gunicorn")
+    parser.add_argument('--duration', type=float, default=10, help="Durée mesurée par niveau (secondes)")
+    parser.add_argument('--warmup', type=float, default=2, help="Chauffe non comptée par niveau (secondes)")
+    parser.add_argument('--output', help="Écrit les résultats dans ce fichier JSON")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Résultats de référence")
+    parser.add_argument('--save-baseline', action='store_true', help="Remplace la référence par ces résultats")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Régression tolérée (0.2 = -20%% de débit, +20%% de p95 ou d'erreurs)")
+    parser.add_argument('--keep', action='store_true', help="Conserver la villa de test")
+    args = parser.parse_args()
+
+    if not args.database_url or not args.database_url.startswith('postgres'):
+        parser.error("une base PostgreSQL est nécessaire (--database-url postgresql://...)")
+
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ.setdefault('SESSION_SECRET', 'benchmark')
+    os.environ.setdefault('OPENROUTER_API_KEY', 'benchmark')
+    # Tous les clients viennent de 127.0.0.1 : la limitation de débit fausserait la mesure
+    os.environ.setdefault('RATE_LIMITS', 'off')
+    routes = [route.strip() for route in args.routes.split(',') if route.strip()]
+    levels = [int(level) for level in args.levels.split(',')]
+
+    prepare_database()
+    port = free_port()
+    server = start_server(os.path.abspath(args.root), dict(os.environ), port, args.workers)
+    results = {}
+    try:
+        print(f"🚦 gunicorn {args.workers} workers, {args.duration:g}s par niveau ({args.warmup:g}s de chauffe)")
+        print(f"\n{'Route':<16}{'clients':>8}{'req/s':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'erreurs':>9}  (ms)")
+        for path in routes:
+            results[path] = {}
+            for level in levels:
+                result = run_level(port, path, level, args.warmup, args.duration)
+                results[path][str(level)] = result
+                print(f"{path:<16}{level:>8}{result['rps']:>10.1f}{result['p50_ms'] or 0:>9.1f}"
+                      f"{result['p95_ms'] or 0:>9.1f}{result['p99_ms'] or 0:>9.1f}{result['errors']:>9}")
+    finally:
+        server.terminate()
+        server.wait()
+        if not args.keep:
+            delete_villa()
+
+    report = {
+        'environment': {
+            'workers': args.workers, 'duration': args.duration, 'warmup': args.warmup,
+            'cpus': os.cpu_count(), 'python': platform.python_version(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as handle:
+            json.dump(report, handle, indent=2)
+            handle.write('\n')
+        print(f"\n💾 Référence enregistrée : {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print("\nℹ️  Pas de référence : --save-baseline pour en enregistrer une")
+        return
+
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    if baseline['environment']['workers'] != args.workers:
+        print(f"\n⚠️  Référence mesurée avec {baseline['environment']['workers']} workers")
+    regressions = compare(results, baseline['results'], args.threshold)
+    if regressions:
+        print(f"\n❌ Régressions de plus de {args.threshold:.0%} par rapport à {args.baseline} :")
+        for regression in regressions:
+            print(f"   {regression}")
+        sys.exit(1)
+    print(f"\n✅ Aucune régression de plus de {args.threshold:.0%} par rapport à la référence")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark des traitements lourds : optimisation d'images et extraction PDF
+
+Mesure optimize_image() (image_processing) et extract_pdf_text()
+(pdf_extraction, appelée par extract_text_from_pdf des routes admin avec
+les plafonds de la configuration) sur un corpus de fichiers de test :
+- images JPEG / PNG / WebP en 1280x720, 1920x1080 et 4000x3000, plus un
+  PNG avec transparence (RGBA) et un PNG en palette (P)
+- PDF texte (brochures de 10 et 60 pages) et PDF scannés (pages image
+  sans texte, 10 pages)
+
+Le corpus est généré de façon déterministe dans --corpus (réutilisé s'il
+existe déjà). Chaque cas est mesuré dans un nouveau processus Python :
+- temps : médiane et minimum sur --repeat exécutions (après une première
+  exécution non comptée)
+- mémoire : hausse du pic de mémoire résidente (RSS) du processus, et pic
+  des processus du pool d'extraction PDF le cas échéant
+- octets produits : taille du JPEG écrit, ou du texte extrait (UTF-8)
+
+Les résultats sont écrits en JSON (--output, par défaut
+benchmarks/results/media_<date>_<commit>.json) et --compare affiche
+l'écart avec un fichier de résultats précédent.
+
+Usage:
+    python benchmarks/media_processing.py
+    python benchmarks/media_processing.py --repeat 10 --only image
+    python benchmarks/media_processing.py --compare benchmarks/results/media_20261001_ab12cd3.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# (nom, format PIL, mode, largeur, hauteur)
+IMAGE_CASES = [
+    (f'{name}_{width}x{height}.{extension}', fmt, 'RGB', width, height)
+    for width, height in ((1280, 720), (1920, 1080), (4000, 3000))
+    for name, fmt, extension in (('photo', 'JPEG', 'jpg'), ('photo', 'PNG', 'png'), ('photo', 'WEBP', 'webp'))
+] + [
+    ('rgba_1920x1080.png', 'PNG', 'RGBA', 1920, 1080),
+    ('palette_1920x1080.png', 'PNG', 'P', 1920, 1080),
+]
+
+# (nom, type, pages)
+PDF_CASES = [
+    ('brochure_10p.pdf', 'text', 10),
+    ('brochure_60p.pdf', 'text', 60),
+    ('scan_10p.pdf', 'scan', 10),
+]
+
+WORDS = ('villa piscine jardin suite hammam terrasse Marrakech Palmeraie salon cuisine '
+         'chambre vue Atlas marbre zellige tadelakt golf patio oliveraie').split()
+
+
+# ========== GÉNÉRATION DU CORPUS ==========
+
+def photo(width, height, seed):
+    """Image ressemblant à une photo : dégradés, formes floues et grain (se compresse comme une vraie)."""
+    from PIL import Image, ImageDraw, ImageFilter
+
+    rng = random.Random(seed)
+    image = Image.merge('RGB', [
+        Image.linear_gradient('L').resize((width, height)),
+        Image.radial_gradient('L').resize((width, height)),
+        Image.linear_gradient('L').rotate(90).resize((width, height)),
+    ])
+    draw = ImageDraw.Draw(image)
+    for _ in range(60):
+        x, y = rng.randrange(width), rng.randrange(height)
+        radius = rng.randrange(width // 40, width // 6)
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius),
+                     fill=tuple(rng.randrange(256) for _ in range(3)))
+    image = image.filter(ImageFilter.GaussianBlur(width / 200))
+    # Grain de quelques pixels : il survit au redimensionnement, comme le détail d'une vraie photo
+    grain = Image.effect_noise((width // 3, height // 3), 32).resize((width, height), Image.Resampling.BICUBIC)
+    return Image.blend(image, grain.convert('RGB'), 0.15)
+
+
+def text_pdf(pages, seed, lines=48):
+    """PDF texte minimal (police Helvetica), une brochure de `pages` pages."""
+    rng = random.Random(seed)
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        content = ["BT /F1 10 Tf 40 800 Td 14 TL"]
+        for _ in range(lines):
+            content.append(f"({' '.join(rng.choice(WORDS) for _ in range(14))}) Tj T*")
+        content.append("ET")
+        stream = "\n".join(content)
+        number = len(objects) + 1
+        kids.append(number)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {number + 1} 0 R >>")
+        objects.append(f"<< /Length {len(stream.encode())} >>\nstream\n{stream}\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{kid} 0 R' for kid in kids)}] /Count {pages} >>"
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(f"{number} 0 obj\n{body}\nendobj\n".encode('latin-1'))
+    xref = output.tell()
+    output.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        output.write(f"{offset:010d} 00000 n \n".encode())
+    output.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return output.getvalue()
+
+
+def build_corpus(directory):
+    """Génère les fichiers manquants du corpus."""
+    os.makedirs(directory, exist_ok=True)
+    for index, (name, fmt, mode, width, height) in enumerate(IMAGE_CASES):
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            continue
+        image = photo(width, height, seed=index)
+        if mode == 'RGBA':
+            image.putalpha(image.convert('L'))
+        elif mode == 'P':
+            image = image.quantize(colors=256)
+        image.save(path, fmt, **({'quality': 92} if fmt in ('JPEG', 'WEBP') else {}))
+    for index, (name, kind, pages) in enumerate(PDF_CASES):
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            continue
+        if kind == 'text':
+            with open(path, 'wb') as handle:
+                handle.write(text_pdf(pages, seed=index))
+        else:
+            scans = [photo(1240, 1754, seed=100 + page).convert('L') for page in range(pages)]
+            scans[0].save(path, 'PDF', resolution=150, save_all=True, append_images=scans[1:])
+
+
+# ========== MESURE D'UN CAS (processus dédié) ==========
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    """Pic de mémoire résidente en Mo (ru_maxrss est en Ko sous Linux, en octets sous macOS)."""
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_image_case(path, repeat):
+    from image_processing import optimize_image
+
+    work = tempfile.mkdtemp(prefix='villa-bench-')
+    try:
+        def once():
+            # optimize_image() remplace le fichier : chaque exécution part d'une copie (non chronométrée)
+            copy = shutil.copy(path, os.path.join(work, os.path.basename(path)))
+            start = time.perf_counter()
+            output = optimize_image(copy)
+            seconds = time.perf_counter() - start
+            size = os.path.getsize(output)
+            os.remove(output)
+            return seconds, size
+        return measure(once, repeat)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def run_pdf_case(path, repeat, workers):
+    from pdf_extraction import extract_pdf_text
+
+    def once():
+        start = time.perf_counter()
+        result = extract_pdf_text(path, workers=workers)
+        return time.perf_counter() - start, len(result['text'].encode())
+    return measure(once, repeat)
+
+
+def measure(once, repeat):
+    rss_before = peak_rss_mb()
+    once()  # Première exécution non comptée (imports, caches)
+    timings, output_bytes = [], 0
+    for _ in range(repeat):
+        seconds, output_bytes = once()
+        timings.append(seconds)
+    timings.sort()
+    return {
+        'median_ms': round(timings[len(timings) // 2] * 1000, 2),
+        'min_ms': round(timings[0] * 1000, 2),
+        'peak_rss_mb': round(max(peak_rss_mb() - rss_before, 0), 1),
+        'pool_peak_rss_mb': round(peak_rss_mb(resource.RUSAGE_CHILDREN), 1),
+        'output_bytes': output_bytes,
+    }
+
+
+def run_case(kind, path, repeat, workers):
+    """Mesure un cas dans un nouveau processus (pic mémoire propre au cas)."""
+    command = [sys.executable, os.path.abspath(__file__), '--run-case', kind, path,
+               '--repeat', str(repeat)]
+    if workers is not None:
+        command += ['--pdf-workers', str(workers)]
+    output = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+# ========== RAPPORT ==========
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def print_comparison(results, previous_path):
+    with open(previous_path) as handle:
+        previous = {case['name']: case for case in json.load(handle)['cases']}
+    print(f"\nÉcart avec {previous_path} (temps médian) :")
+    for case in results:
+        before = previous.get(case['name'])
+        if not before:
+            continue
+        change = (case['median_ms'] - before['median_ms']) / before['median_ms'] * 100
+        print(f"   {case['name']:<28}{before['median_ms']:>10.1f} → {case['median_ms']:>8.1f} ms ({change:+.0f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark images et extraction PDF")
+    parser.add_argument('--corpus', default=os.path.join(tempfile.gettempdir(), 'villa_bench_corpus'),
+                        help="Répertoire du corpus généré (réutilisé s'il existe)")
+    parser.add_argument('--repeat', type=int, default=5, help="Exécutions mesurées par cas")
+    parser.add_argument('--only', choices=('image', 'pdf'), help="Ne mesurer qu'un type de cas")
+    parser.add_argument('--pdf-workers', type=int, help="Processus d'extraction PDF (défaut: automatique)")
+    parser.add_argument('--output', help="Fichier JSON des résultats")
+    parser.add_argument('--compare', help="Résultats précédents à comparer")
+    parser.add_argument('--run-case', nargs=2, metavar=('TYPE', 'FICHIER'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        kind, path = args.run_case
+        result = run_image_case(path, args.repeat) if kind == 'image' \
+            else run_pdf_case(path, args.repeat, args.pdf_workers)
+        print(json.dumps(result))
+        return
+
+    start = time.perf_counter()
+    build_corpus(args.corpus)
+    print(f"📁 Corpus : {args.corpus} ({time.perf_counter() - start:.1f}s)")
+
+    cases = []
+    if args.only != 'pdf':
+        cases += [('image', name) for name, *_ in IMAGE_CASES]
+    if args.only != 'image':
+        cases += [('pdf', name) for name, *_ in PDF_CASES]
+
+    print(f"\n{'Cas':<28}{'entrée':>10}{'médiane':>10}{'min':>9}{'pic RSS':>9}{'pool':>7}{'sortie':>10}")
+    print(f"{'':<28}{'(Ko)':>10}{'(ms)':>10}{'(ms)':>9}{'(Mo)':>9}{'(Mo)':>7}{'(Ko)':>10}")
+    results = []
+    for kind, name in cases:
+        path = os.path.join(args.corpus, name)
+        result = run_case(kind, path, args.repeat, args.pdf_workers)
+        result.update(name=name, type=kind, input_bytes=os.path.getsize(path))
+        results.append(result)
+        print(f"{name:<28}{result['input_bytes'] / 1024:>10.0f}{result['median_ms']:>10.1f}{result['min_ms']:>9.1f}"
+              f"{result['peak_rss_mb']:>9.1f}{result['pool_peak_rss_mb']:>7.1f}{result['output_bytes'] / 1024:>10.1f}")
+
+    from PIL import Image
+    import PyPDF2
+
+    commit = git_commit()
+    report = {
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'environment': {
+            'python': platform.python_version(), 'pillow': Image.__version__,
+            'pypdf2': PyPDF2.__version__, 'cpus': os.cpu_count(), 'repeat': args.repeat,
+            'pdf_workers': args.pdf_workers,
+        },
+        'cases': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"media_{time.strftime('%Y%m%d_%H%M%S')}_{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as handle:
+        json.dump(report, handle, indent=2)
+    print(f"\n💾 Résultats : {output}")
+
+    if args.compare:
+        print_comparison(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la recherche plein texte (villa_search.search_villas)
+
+Génère un corpus synthétique de villas (textes FR + EN : phrases génériques
+et prestations tirées au sort, chacune présente dans ~20% des villas), puis
+compare pour plusieurs requêtes :
+- la recherche plein texte (tsvector + index GIN, classement + extraits)
+- un balayage ILIKE '%terme%' classé équivalent sur les mêmes textes
+
+Le plan d'exécution indique si l'index GIN de la langue est utilisé.
+Nécessite PostgreSQL ; les villas générées sont supprimées à la fin
+(sauf --keep).
+
+Usage:
+    python benchmarks/search_fulltext.py --database-url postgresql://user@localhost/villa_bench
+    python benchmarks/search_fulltext.py --database-url ... --villas 20000 --iterations 50
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCH_PREFIX = 'BENCH-FTS-'
+
+# Prestations (FR, EN) : chaque villa en reçoit AMENITIES_PER_VILLA, soit ~20% des villas par prestation
+AMENITIES = [
+    ('piscine chauffée', 'heated swimming pool'), ('piscine à débordement', 'infinity pool'),
+    ('hammam traditionnel', 'traditional hammam'), ('suite parentale', 'master suite'),
+    ('dressing', 'walk-in closet'), ('cheminée', 'fireplace'), ('cuisine équipée', 'fitted kitchen'),
+    ('terrasse panoramique', 'panoramic terrace'), ('vue sur l\'Atlas', 'Atlas mountains view'),
+    ('proche du golf', 'close to the golf course'), ('domaine sécurisé', 'gated estate'),
+    ('gardien', 'caretaker'), ('climatisation réversible', 'reversible air conditioning'),
+    ('chauffage au sol', 'underfloor heating'), ('murs en tadelakt', 'tadelakt walls'),
+    ('zellige', 'zellige tiles'), ('sols en marbre', 'marble floors'), ('double garage', 'double garage'),
+    ('pool house', 'pool house'), ('salle de cinéma', 'home cinema'), ('salle de sport', 'gym'),
+    ('spa', 'spa'), ('jacuzzi', 'jacuzzi'), ('oliveraie', 'olive grove'), ('palmeraie privée', 'private palm grove'),
+    ('court de tennis', 'tennis court'), ('potager', 'vegetable garden'), ('écuries', 'stables'),
+    ('maison de gardien', 'staff house'), ('panneaux solaires', 'solar panels'),
+    ('forage', 'private well'), ('patio', 'patio'), ('bibliothèque', 'library'),
+    ('cave à vin', 'wine cellar'), ('rooftop', 'rooftop'), ('ascenseur', 'lift'),
+    ('proche de l\'aéroport', 'close to the airport'), ('rénovée par un architecte', 'architect-renovated'),
+    ('location saisonnière', 'holiday rental'), ('titre foncier', 'land title deed'),
+]
+AMENITIES_PER_VILLA = 8
+
+# Phrases génériques (présentes partout, comme dans de vraies annonces)
+FILLER = {
+    'fr': ['Cette magnifique villa offre des volumes généreux et une belle luminosité.',
+           'Les espaces de réception s\'ouvrent sur le jardin.',
+           'Une propriété idéale pour une résidence principale ou secondaire.',
+           'Les finitions sont soignées et les matériaux de qualité.',
+           'Le calme absolu à quelques minutes de la ville.'],
+    'en': ['This beautiful villa offers generous volumes and plenty of light.',
+           'The reception areas open onto the garden.',
+           'An ideal property for a main or second home.',
+           'The finishes are careful and the materials high quality.',
+           'Absolute peace a few minutes from the city.'],
+}
+TITLE_WORDS = {
+    'fr': ['Villa', 'Riad', 'Propriété', 'Demeure', 'contemporaine', 'de prestige', 'Palmeraie', 'Amelkis'],
+    'en': ['Villa', 'Riad', 'Estate', 'Mansion', 'contemporary', 'luxury', 'Palmeraie', 'Amelkis'],
+}
+
+QUERIES = {
+    'fr': ['piscine chauffée', 'hammam', 'golf -aéroport', '"suite parentale"', 'zellige tadelakt marbre'],
+    'en': ['heated swimming pool', 'hammam', 'golf -airport', '"master suite"', 'zellige tadelakt marble'],
+}
+
+
+def villa_texts(rng, lang, amenities):
+    """Titre, description (~150 mots), caractéristiques et équipements d'une villa."""
+    index = 0 if lang == 'fr' else 1
+    names = [amenity[index] for amenity in amenities]
+    description = []
+    for name in names:
+        description.extend(rng.sample(FILLER[lang], 3))
+        description.append(f"{name.capitalize()}.")
+    return {
+        'title': ' '.join(rng.sample(TITLE_WORDS[lang], 3)),
+        'description': ' '.join(description),
+        'features': '\n'.join(names[:4]),
+        'equipment': '\n'.join(names[4:]),
+    }
+
+
+def seed_corpus(db, Villa, VillaTranslation, count, seed):
+    """Insère `count` villas actives et leurs textes FR + EN par lots."""
+    rng = random.Random(seed)
+    batch = 500
+    for start in range(0, count, batch):
+        villas = [{
+            'reference': f'{BENCH_PREFIX}{i:06d}', 'price': rng.randrange(1_000_000, 20_000_000, 50_000),
+            'location': rng.choice(['Palmeraie', 'Route de Fès', 'Amelkis', 'Ourika', 'Agdal']),
+            'bedrooms': rng.randint(2, 9), 'is_active': True
+        } for i in range(start, min(start + batch, count))]
+        ids = db.session.execute(
+            db.insert(Villa).returning(Villa.id), villas
+        ).scalars().all()
+        rows = []
+        for villa_id in ids:
+            amenities = rng.sample(AMENITIES, AMENITIES_PER_VILLA)
+            for lang in ('fr', 'en'):
+                for field, value in villa_texts(rng, lang, amenities).items():
+                    rows.append({'villa_id': villa_id, 'lang': lang, 'field': field, 'text': value})
+        db.session.execute(db.insert(VillaTranslation), rows)
+        db.session.commit()
+    db.session.execute(db.text('ANALYZE villa'))
+    db.session.execute(db.text('ANALYZE villa_translation'))
+    db.session.commit()
+
+
+def ilike_search(db, query, lang, limit):
+    """
+    Référence sans index : mêmes villas (tous les termes positifs) classées
+    par nombre de textes correspondants, donc balayage complet des textes.
+    """
+    terms = [term for term in query.replace('"', ' ').split() if not term.startswith('-')]
+    having = ' AND '.join(f"bool_or(t.text ILIKE :term{i})" for i in range(len(terms)))
+    matched = ' OR '.join(f"t.text ILIKE :term{i}" for i in range(len(terms)))
+    params = {'lang': lang, 'limit': limit}
+    params.update({f'term{i}': f'%{term}%' for i, term in enumerate(terms)})
+    return db.session.execute(db.text(f"""
+        SELECT t.villa_id, count(*) FILTER (WHERE {matched}) AS rank
+        FROM villa_translation t JOIN villa v ON v.id = t.villa_id
+        WHERE v.is_active AND t.lang = :lang AND t.field IN ('title', 'description', 'features', 'equipment')
+        GROUP BY t.villa_id HAVING {having}
+        ORDER BY rank DESC, t.villa_id LIMIT :limit
+    """), params).all()
+
+
+def timed(function, iterations):
+    """Durées (ms) de `iterations` appels et résultat du dernier."""
+    durations = []
+    result = None
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = function()
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations, result
+
+
+def percentile(values, ratio):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(ratio * (len(ordered) - 1))))]
+
+
+def uses_search_index(db, query, lang):
+    """True si le plan de sélection des candidats passe par l'index GIN de la langue."""
+    from villa_search import search_config
+    plan = db.session.execute(db.text(
+        f"EXPLAIN SELECT DISTINCT villa_id FROM villa_translation "
+        f"WHERE lang = '{lang}' AND search_vector @@ websearch_to_tsquery(CAST(:config AS regconfig), :query)"
+    ), {'config': search_config(lang), 'query': query}).scalars().all()
+    return any(f'ix_villa_translation_search_{lang}' in line for line in plan)
+
+
+def delete_corpus(db, Villa, VillaTranslation):
+    ids = db.select(Villa.id).where(Villa.reference.like(f'{BENCH_PREFIX}%'))
+    db.session.execute(db.delete(VillaTranslation).where(VillaTranslation.villa_id.in_(ids)))
+    db.session.execute(db.delete(Villa).where(Villa.reference.like(f'{BENCH_PREFIX}%')))
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la recherche plein texte")
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'),
+                        help="Base PostgreSQL de test (défaut: DATABASE_URL)")
+    parser.add_argument('--villas', type=int, default=5000, help="Taille du corpus synthétique")
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep', action='store_true', help="Conserver le corpus généré")
+    args = parser.parse_args()
+
+    if not args.database_url or not args.database_url.startswith('postgres'):
+        parser.error("une base PostgreSQL est nécessaire (--database-url postgresql://...)")
+
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ.setdefault('SESSION_SECRET', 'benchmark')
+    os.environ.setdefault('OPENROUTER_API_KEY', 'benchmark')
+
+    from app import create_app
+    from models import Villa, VillaTranslation, db
+    from migrations import run_migrations
+    from villa_search import search_villas
+
+    with create_app().app_context():
+        run_migrations(db.engine)
+        delete_corpus(db, Villa, VillaTranslation)
+
+        start = time.perf_counter()
+        seed_corpus(db, Villa, VillaTranslation, args.villas, args.seed)
+        print(f"📦 Corpus: {args.villas} villas x 2 langues "
+              f"({time.perf_counter() - start:.1f}s, tsvector générés à l'insertion)")
+        try:
+            print(f"\n{'Langue':<7}{'Requête':<28}{'index':>6}{'résultats':>10}"
+                  f"{'FTS p50':>9}{'FTS p95':>9}{'ILIKE p50':>11}{'ILIKE p95':>11}  (ms)")
+            for lang, queries in QUERIES.items():
+                for query in queries:
+                    fts, hits = timed(lambda: search_villas(query, lang, args.limit), args.iterations)
+                    like, _ = timed(lambda: ilike_search(db, query, lang, args.limit), args.iterations)
+                    print(f"{lang:<7}{query:<28}{'oui' if uses_search_index(db, query, lang) else 'non':>6}"
+                          f"{len(hits):>10}{percentile(fts, 0.5):>9.1f}{percentile(fts, 0.95):>9.1f}"
+                          f"{percentile(like, 0.5):>11.1f}{percentile(like, 0.95):>11.1f}")
+        finally:
+            if not args.keep:
+                delete_corpus(db, Villa, VillaTranslation)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark du démarrage d'un worker (import de l'application et première requête)
+
+Chaque mesure est faite dans un nouveau processus Python, comme un worker
+gunicorn qui démarre :
+- import : `import app` puis create_app()
+- première requête : GET / (page publique) avec le client de test Flask
+- modules lourds (PIL, PyPDF2, requests) chargés après la page publique
+
+La base est un fichier SQLite temporaire migré au préalable (sauf
+--database-url). --root permet de mesurer une autre copie du projet (par
+exemple une version précédente extraite avec `git archive`) pour comparer.
+
+Usage:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 20
+    python benchmarks/startup.py --root /tmp/ancienne_version
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+HEAVY_MODULES = ('PIL', 'PyPDF2', 'requests')
+
+# Exécuté dans un processus neuf : mesures renvoyées en JSON sur la dernière ligne
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app as application
+factory = getattr(application, 'create_app', None)
+# Versions antérieures à la fabrique : l'application est créée à l'import
+flask_app = factory() if factory else application.app
+imported = time.perf_counter()
+response = flask_app.test_client().get('/', headers={'Accept-Language': 'fr'})
+first_request = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'first_request_ms': (first_request - imported) * 1000,
+    'status': response.status_code,
+    'modules': [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+def run_probe(root, env):
+    """Lance une mesure dans un nouveau processus et renvoie son résultat."""
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE % (HEAVY_MODULES,)],
+        cwd=root, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du démarrage d'un worker")
+    parser.add_argument('--root', default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        help="Répertoire du projet à mesurer (défaut: ce dépôt)")
+    parser.add_argument('--runs', type=int, default=10, help="Nombre de processus mesurés")
+    parser.add_argument('--database-url', help="Base à utiliser (défaut: SQLite temporaire)")
+    args = parser.parse_args()
+
+    root = os.path.abspath(args.root)
+    database_file = None
+    database_url = args.database_url
+    if not database_url:
+        database_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+        database_url = f'sqlite:///{database_file}'
+
+    env = dict(os.environ, DATABASE_URL=database_url)
+    env.setdefault('SESSION_SECRET', 'benchmark')
+    env.setdefault('OPENROUTER_API_KEY', 'benchmark')
+
+    try:
+        if os.path.exists(os.path.join(root, 'migrations.py')):
+            subprocess.run([sys.executable, 'migrations.py'], cwd=root, env=env,
+                           capture_output=True, check=True)
+        # Premier processus non compté : fichiers .pyc et cache disque chauds
+        run_probe(root, env)
+        results = [run_probe(root, env) for _ in range(args.runs)]
+    finally:
+        if database_file:
+            os.unlink(database_file)
+
+    imports = [result['import_ms'] for result in results]
+    requests_ms = [result['first_request_ms'] for result in results]
+    print(f"🚀 Démarrage de {root} ({args.runs} processus)")
+    print(f"   import + création de l'app : médiane {median(imports):7.1f} ms "
+          f"(min {min(imports):.1f}, max {max(imports):.1f})")
+    print(f"   première requête GET /     : médiane {median(requests_ms):7.1f} ms "
+          f"(min {min(requests_ms):.1f}, max {max(requests_ms):.1f}), HTTP {results[-1]['status']}")
+    loaded = results[-1]['modules']
+    print(f"   modules lourds chargés     : {', '.join(loaded) if loaded else 'aucun'}")
+
+
+if __name__ == '__main__':
+    main()
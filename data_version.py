@@ -0,0 +1,135 @@
+"""
+Version des Données - Application Villa à Vendre Marrakech
+
+Ce fichier permet de mettre en cache, dans chaque worker, des contenus
+dérivés des villas (sitemap...) et de les régénérer seulement quand les
+données changent :
+
+- la version est l'état d'un petit fichier (DATA_VERSION_FILE, dossier
+  instance/ par défaut) : la lire ne coûte qu'un stat(), sans requête SQL,
+  et tous les workers comme les scripts (import_brochures.py...) la
+  partagent
+- le fichier est remplacé après chaque transaction validée qui modifie
+  une villa ou ses textes, y compris les suppressions en masse
+  (Query.delete)
+- chaque consultation est comptée dans villa_cache_requests_total (voir
+  metrics.py), le premier élément de la clé nommant le cache
+
+Usage:
+    xml = cached(('sitemap',), lambda: build_sitemap(...))
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import logging
+import os
+import tempfile
+import threading
+
+from flask import current_app, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+logger = logging.getLogger('villa.data')
+
+# Tables dont la modification change la version
+WATCHED_TABLES = {'villa', 'villa_translation'}
+
+# Contenus mis en cache dans ce worker : clé -> (version, valeur)
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def current_version(path=None):
+    """
+    Version courante des données
+
+    Returns:
+        tuple: (inode, date de modification) du fichier, (0, 0) s'il n'existe pas encore
+    """
+    try:
+        stat = os.stat(path or current_app.config['DATA_VERSION_FILE'])
+    except FileNotFoundError:
+        return (0, 0)
+    return (stat.st_ino, stat.st_mtime_ns)
+
+
+def bump_version(path=None):
+    """Change la version (nouveau fichier remplaçant l'ancien : nouvel inode à chaque fois)."""
+    path = path or current_app.config['DATA_VERSION_FILE']
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=directory, prefix='.data_version-')
+    os.close(handle)
+    os.replace(temporary, path)
+
+
+def cached(key, build):
+    """
+    Valeur mise en cache pour la version courante des données
+
+    La version est lue avant build() : une modification pendant la
+    construction sera prise en compte à l'appel suivant.
+
+    Args:
+        key (tuple): Clé dont le premier élément nomme le cache ('sitemap', ...)
+        build: Fonction sans argument qui calcule la valeur
+    """
+    # Importé ici : prometheus_client doit être chargé après load_dotenv() (voir app.py)
+    from metrics import count_cache
+
+    version = current_version()
+    entry = _cache.get(key)
+    hit = entry is not None and entry[0] == version
+    count_cache(key[0], hit)
+    if hit:
+        return entry[1]
+    value = build()
+    with _cache_lock:
+        _cache[key] = (version, value)
+    return value
+
+
+def peek(key):
+    """Valeur en cache pour la version courante des données, sans la construire (None sinon)."""
+    entry = _cache.get(key)
+    if entry is not None and entry[0] == current_version():
+        return entry[1]
+    return None
+
+
+def _touches_watched_tables(mappers):
+    return any(mapper.local_table.name in WATCHED_TABLES for mapper in mappers)
+
+
+@event.listens_for(Session, 'after_flush')
+def _note_flush(session, flush_context):
+    objects = list(session.new) + list(session.dirty) + list(session.deleted)
+    if any(getattr(obj, '__tablename__', None) in WATCHED_TABLES for obj in objects):
+        session.info['data_changed'] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _note_bulk_statement(orm_execute_state):
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) \
+            and _touches_watched_tables(orm_execute_state.all_mappers):
+        orm_execute_state.session.info['data_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_after_commit(session):
+    if session.info.pop('data_changed', False) and has_app_context() \
+            and current_app.config.get('DATA_VERSION_FILE'):
+        try:
+            bump_version()
+        except OSError as e:
+            # Les données sont enregistrées : seuls les caches restent sur l'ancienne version
+            logger.warning(f"⚠️  Version des données non mise à jour: {e}", extra={'event': 'data_version_error'})
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changes(session):
+    session.info.pop('data_changed', None)
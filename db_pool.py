@@ -0,0 +1,190 @@
+"""
+Pools de Connexions - Application Villa à Vendre Marrakech
+
+Ce fichier règle les pools de connexions SQLAlchemy selon le rôle du
+processus et mesure leur utilisation :
+
+- APP_ROLE : 'public' (pages publiques), 'admin' (panneau d'administration)
+  ou 'all' (un seul service pour tout, par défaut). Chaque rôle a sa taille
+  de pool par défaut ; DB_POOL_SIZE / DB_MAX_OVERFLOW la remplacent.
+  Avec des workers gunicorn synchrones, un worker ne sert qu'une requête à
+  la fois : quelques connexions suffisent (prévoir une connexion par thread
+  avec des workers gthread). Avec des workers gevent, un worker sert de
+  nombreuses requêtes à la fois : les tailles de GREEN_POOL_SIZES
+  s'appliquent (GUNICORN_WORKER_CLASS=gevent).
+- DB_PGBOUNCER : mode compatible PgBouncer (pooling par transaction) : pas
+  de pre-ping (PgBouncer vérifie ses connexions serveur) et pas de requêtes
+  préparées côté serveur (psycopg 3), dont le cache ne survit pas au
+  changement de connexion serveur entre deux transactions.
+- TimedQueuePool : pool standard qui compte les prises de connexion, leur
+  temps d'attente et les dépassements de délai (voir /admin/pool-stats).
+- make_psycopg2_green : rend psycopg2 coopératif sous gevent (workers
+  gunicorn -k gevent, voir gunicorn.conf.py). Sans cela, chaque requête SQL
+  bloque tout le worker, donc toutes ses requêtes en cours.
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+# Taille par défaut du pool (pool_size, max_overflow) par rôle de processus
+POOL_SIZES = {
+    'public': (2, 3),  # Une requête courte par page (workers synchrones)
+    'admin': (1, 2),   # Un administrateur, requêtes plus longues (PDF, IA)
+    'all': (3, 5),     # Service unique public + admin
+}
+
+# Tailles par rôle avec des workers gevent : autant de requêtes SQL simultanées
+# que de connexions, les autres greenlets attendent (DB_POOL_TIMEOUT)
+GREEN_POOL_SIZES = {
+    'public': (10, 10),
+    'admin': (2, 3),
+    'all': (10, 10),
+}
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool qui mesure l'attente de chaque prise de connexion."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self._timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self._checkouts += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+
+    def statistics(self):
+        """
+        État du pool et mesures depuis le démarrage du worker
+
+        Returns:
+            dict: size, checked_out, checked_in, overflow, max_overflow,
+                  checkouts, timeouts, wait_ms_avg, wait_ms_max, wait_ms_total
+        """
+        with self._stats_lock:
+            checkouts, timeouts = self._checkouts, self._timeouts
+            wait_total, wait_max = self._wait_total, self._wait_max
+        return {
+            'size': self.size(),
+            'checked_out': self.checkedout(),
+            'checked_in': self.checkedin(),
+            'overflow': max(self.overflow(), 0),
+            'max_overflow': self._max_overflow,
+            'checkouts': checkouts,
+            'timeouts': timeouts,
+            'wait_ms_avg': round(wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+            'wait_ms_max': round(wait_max * 1000, 3),
+            'wait_ms_total': round(wait_total * 1000, 3),
+        }
+
+
+def engine_options(database_url, role='all', pool_size=None, max_overflow=None,
+                   pool_timeout=10, pgbouncer=False, green=False):
+    """
+    Options des moteurs SQLAlchemy (SQLALCHEMY_ENGINE_OPTIONS)
+
+    Args:
+        database_url (str): URL de la base principale
+        role (str): Rôle du processus ('public', 'admin' ou 'all')
+        pool_size (int): Connexions gardées ouvertes (None = défaut du rôle)
+        max_overflow (int): Connexions supplémentaires temporaires (None = défaut du rôle)
+        pool_timeout (int): Attente maximale d'une connexion libre (secondes)
+        pgbouncer (bool): Mode compatible PgBouncer (pooling par transaction)
+        green (bool): Workers gevent (tailles de GREEN_POOL_SIZES)
+
+    Returns:
+        dict: Options passées à create_engine (base principale et réplique)
+    """
+    if role not in POOL_SIZES:
+        raise ValueError(f"APP_ROLE invalide: {role} (attendu: {', '.join(POOL_SIZES)})")
+    default_size, default_overflow = (GREEN_POOL_SIZES if green else POOL_SIZES)[role]
+    options = {
+        'poolclass': TimedQueuePool,
+        'pool_size': default_size if pool_size is None else pool_size,
+        'max_overflow': default_overflow if max_overflow is None else max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': 300,
+        'pool_pre_ping': not pgbouncer,
+    }
+    if pgbouncer and database_url and make_url(database_url).get_driver_name() == 'psycopg':
+        # psycopg 3 prépare les requêtes répétées côté serveur : désactivé derrière PgBouncer
+        options['connect_args'] = {'prepare_threshold': None}
+    return options
+
+
+def _gevent_wait(connection, timeout=None):
+    """Attend le serveur PostgreSQL en rendant la main aux autres greenlets."""
+    from gevent.socket import wait_read, wait_write
+    from psycopg2 import OperationalError, extensions
+
+    while True:
+        state = connection.poll()
+        if state == extensions.POLL_OK:
+            return
+        if state == extensions.POLL_READ:
+            wait_read(connection.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(connection.fileno(), timeout=timeout)
+        else:
+            raise OperationalError(f"Bad result from poll: {state!r}")
+
+
+def make_psycopg2_green():
+    """
+    Installe l'attente coopérative de psycopg2 (à appeler dans un worker gevent)
+
+    psycopg2 est une extension C : le monkey-patching de gevent ne couvre pas
+    ses sockets. Avec ce callback, la connexion, les requêtes et la lecture
+    des résultats cèdent la main pendant l'attente du serveur. Sans effet si
+    psycopg2 n'est pas installé (psycopg 3 utilise les sockets patchés).
+    """
+    try:
+        from psycopg2 import extensions
+    except ImportError:
+        return False
+    extensions.set_wait_callback(_gevent_wait)
+    return True
+
+
+def pool_statistics(engines):
+    """
+    Statistiques des pools de ce worker
+
+    Args:
+        engines (dict): Moteurs Flask-SQLAlchemy ({None: principale, 'replica': ...})
+
+    Returns:
+        dict: {'primary': {...}, 'replica': {...}}
+    """
+    statistics = {}
+    for key, engine in engines.items():
+        name = key or 'primary'
+        if isinstance(engine.pool, TimedQueuePool):
+            statistics[name] = engine.pool.statistics()
+        else:
+            statistics[name] = {'status': engine.pool.status()}
+    return statistics
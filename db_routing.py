@@ -0,0 +1,169 @@
+"""
+Routage Lecture / Écriture - Application Villa à Vendre Marrakech
+
+Ce fichier envoie les lectures publiques vers une réplique PostgreSQL en
+lecture seule (DATABASE_REPLICA_URL, optionnelle) et garde tout le reste sur
+la base principale :
+
+- réplique : requêtes GET/HEAD des routes publiques (blueprint 'public')
+  pour les visiteurs non connectés
+- principale : routes d'administration, administrateur connecté (aperçu
+  des modifications), toute écriture (flush, INSERT/UPDATE/DELETE), et un
+  visiteur dont la session vient d'écrire (lecture après écriture, pendant
+  REPLICA_MAX_LAG_SECONDS + REPLICA_CHECK_SECONDS)
+
+Le retard de la réplique est mesuré au plus une fois toutes les
+REPLICA_CHECK_SECONDS par worker ; au-delà de REPLICA_MAX_LAG_SECONDS, ou
+si elle ne répond pas, les lectures repassent sur la base principale
+jusqu'à la vérification suivante.
+
+Sans DATABASE_REPLICA_URL, toutes les requêtes utilisent la base principale.
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import logging
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.sql.dml import UpdateBase
+
+logger = logging.getLogger('villa.db')
+
+# Clé de la réplique dans SQLALCHEMY_BINDS
+REPLICA_BIND = 'replica'
+
+# Blueprints dont les lectures peuvent être servies par la réplique
+REPLICA_BLUEPRINTS = ('public',)
+
+# Retard de réexécution du WAL (secondes) ; 0 si la réplique est à jour ou n'en est pas une
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+# État de la réplique dans ce worker, partagé par ses threads
+_replica_state = {'checked_at': 0.0, 'usable': False, 'lag': None}
+_replica_lock = threading.Lock()
+
+
+class RoutingSession(Session):
+    """Session SQLAlchemy qui lit sur la réplique quand la requête le permet."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and not isinstance(clause, UpdateBase)
+                and has_request_context() and g.get('db_replica')):
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _remember_write(session, flush_context):
+    """Note qu'une écriture a eu lieu pendant la requête (lecture après écriture)."""
+    if has_request_context():
+        g.db_wrote = True
+
+
+def replica_configured(app):
+    """True si une réplique est déclarée dans SQLALCHEMY_BINDS."""
+    return REPLICA_BIND in (app.config.get('SQLALCHEMY_BINDS') or {})
+
+
+def measure_replica_lag(engine):
+    """
+    Retard de la réplique en secondes
+
+    Returns:
+        float: 0 hors PostgreSQL (pas de réplication à mesurer)
+    """
+    if engine.dialect.name != 'postgresql':
+        return 0.0
+    with engine.connect() as connection:
+        return float(connection.execute(text(REPLICA_LAG_QUERY)).scalar() or 0)
+
+
+def replica_available():
+    """
+    True si la réplique est joignable et assez à jour
+
+    Un seul thread par worker refait la mesure quand elle est périmée ; les
+    autres utilisent le dernier résultat sans attendre.
+    """
+    config = current_app.config
+    now = time.monotonic()
+    if now - _replica_state['checked_at'] < config['REPLICA_CHECK_SECONDS']:
+        return _replica_state['usable']
+    if not _replica_lock.acquire(blocking=False):
+        return _replica_state['usable']
+    try:
+        from models import db
+
+        was_usable = _replica_state['usable']
+        try:
+            lag = measure_replica_lag(db.engines[REPLICA_BIND])
+            usable = lag <= config['REPLICA_MAX_LAG_SECONDS']
+            if not usable and was_usable:
+                logger.warning(f"⚠️  Réplique en retard ({lag:.1f}s > {config['REPLICA_MAX_LAG_SECONDS']}s) : "
+                               f"lectures sur la base principale", extra={'event': 'replica_lagging', 'lag': lag})
+        except Exception as e:
+            lag, usable = None, False
+            if was_usable or _replica_state['checked_at'] == 0.0:
+                logger.warning(f"⚠️  Réplique indisponible, lectures sur la base principale: {e}",
+                               extra={'event': 'replica_unavailable'})
+        if usable and not was_usable:
+            logger.info(f"✅ Réplique utilisée pour les lectures publiques (retard {lag:.1f}s)",
+                        extra={'event': 'replica_usable', 'lag': lag})
+        _replica_state.update(checked_at=time.monotonic(), usable=usable, lag=lag)
+        return usable
+    finally:
+        _replica_lock.release()
+
+
+def use_primary():
+    """
+    Lit sur la base principale pour le reste de la requête
+
+    Pour les contenus mis en cache jusqu'au prochain changement des données
+    (voir data_version.py) : une réplique en retard y figerait des données
+    périmées.
+    """
+    g.db_replica = False
+
+
+def _select_database():
+    """Choisit la base de la requête (avant les routes)."""
+    g.db_replica = (
+        request.method in ('GET', 'HEAD')
+        and request.blueprint in REPLICA_BLUEPRINTS
+        and not session.get('admin_logged_in')
+        and session.get('primary_until', 0) < time.time()
+        and replica_available()
+    )
+
+
+def _stick_to_primary(response):
+    """Après une écriture, garde la session sur la base principale le temps que la réplique rattrape."""
+    if g.get('db_wrote'):
+        config = current_app.config
+        session['primary_until'] = time.time() + config['REPLICA_MAX_LAG_SECONDS'] + config['REPLICA_CHECK_SECONDS']
+    return response
+
+
+def init_replica_routing(app):
+    """Active le routage vers la réplique si DATABASE_REPLICA_URL est configurée."""
+    if not replica_configured(app):
+        return
+    app.before_request(_select_database)
+    app.after_request(_stick_to_primary)
+    logger.info("🔀 Réplique en lecture configurée pour les pages publiques")
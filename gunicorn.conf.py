@@ -0,0 +1,100 @@
+"""
+Configuration Gunicorn - Application Villa à Vendre Marrakech
+
+Chargée automatiquement par gunicorn lancé depuis ce répertoire
+(gunicorn main:app).
+
+Type de workers (GUNICORN_WORKER_CLASS) :
+
+- sync (défaut) : un worker = une requête à la fois. Un appel OpenRouter
+  (jusqu'à 120 s) immobilise le worker entier pendant toute sa durée.
+- gevent (pip install gevent) : chaque requête est une greenlet ; pendant
+  qu'un appel IA attend la réponse, le worker continue de servir les pages
+  publiques (jusqu'à GUNICORN_WORKER_CONNECTIONS requêtes simultanées par
+  worker). requests et les sockets sont patchés par gevent ; psycopg2 est
+  rendu coopératif à chaque fork (db_pool.make_psycopg2_green).
+  Voir benchmarks/async_workers.py.
+
+Elle prépare aussi les fichiers partagés par les workers :
+
+- RATE_LIMIT_FILE (seaux de la limitation de débit, voir rate_limit.py) :
+  s'il n'est pas défini, un fichier temporaire propre à ce serveur est
+  créé, puis supprimé à l'arrêt
+- le répertoire des métriques Prometheus (voir metrics.py) :
+
+  - PROMETHEUS_MULTIPROC_DIR défini (.env ou environnement) : le
+    répertoire est créé si besoin et ses fichiers de métriques (*.db) sont
+    effacés au démarrage du serveur
+  - sinon : un répertoire temporaire propre à ce serveur est créé, puis
+    supprimé à l'arrêt (plusieurs services gunicorn sur la même machine ne
+    mélangent pas leurs métriques)
+
+Les fichiers d'un worker arrêté sont marqués morts : ses gauges ne
+comptent plus, ses compteurs et histogrammes restent additionnés.
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import glob
+import os
+import shutil
+import sys
+import tempfile
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# Répertoire des métriques et fichier des seaux créés par ce serveur (supprimés à l'arrêt)
+_temporary_metrics_dir = None
+_temporary_rate_limit_file = None
+
+
+def on_starting(server):
+    """Prépare les fichiers partagés avant le lancement des workers."""
+    global _temporary_metrics_dir, _temporary_rate_limit_file
+
+    if not os.environ.get('RATE_LIMIT_FILE'):
+        handle, _temporary_rate_limit_file = tempfile.mkstemp(prefix='villa-ratelimit-')
+        os.close(handle)
+        os.environ['RATE_LIMIT_FILE'] = _temporary_rate_limit_file
+
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, '*.db')):
+            os.remove(path)
+    else:
+        directory = _temporary_metrics_dir = tempfile.mkdtemp(prefix='villa-metrics-')
+        os.environ['PROMETHEUS_MULTIPROC_DIR'] = directory
+    server.log.info(f"📊 Métriques Prometheus des workers dans {directory}")
+
+
+def post_fork(server, worker):
+    """Rend psycopg2 coopératif dans les workers gevent."""
+    ggevent = sys.modules.get('gunicorn.workers.ggevent')
+    if ggevent and isinstance(worker, ggevent.GeventWorker):
+        from db_pool import make_psycopg2_green
+
+        make_psycopg2_green()
+
+
+def child_exit(server, worker):
+    """Retire les gauges d'un worker arrêté des métriques agrégées."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    """Supprime le répertoire des métriques et le fichier des seaux temporaires créés au démarrage."""
+    if _temporary_metrics_dir:
+        shutil.rmtree(_temporary_metrics_dir, ignore_errors=True)
+    if _temporary_rate_limit_file and os.path.exists(_temporary_rate_limit_file):
+        os.remove(_temporary_rate_limit_file)
@@ -0,0 +1,70 @@
+"""
+Traitement des Images - Application Villa à Vendre Marrakech
+
+Ce fichier regroupe la validation et l'optimisation des photos uploadées
+(redimensionnement et conversion JPEG avec Pillow).
+
+Il n'est importé qu'à la première utilisation (upload d'images admin) :
+les workers qui ne servent que le site public ne chargent pas Pillow.
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import logging
+import os
+import time
+
+from PIL import Image
+
+from metrics import observe_image
+
+# Extensions de fichiers autorisées pour les uploads d'images
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp'}
+
+logger = logging.getLogger('villa.images')
+
+
+def allowed_file(filename):
+    """Vérifie si le fichier a une extension autorisée."""
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def optimize_image(filepath):
+    """
+    Optimise une image pour le web:
+    - Convertit en RGB si nécessaire
+    - Redimensionne à max 1920x1080
+    - Convertit en JPEG avec qualité 85
+    - Supprime le fichier original
+
+    La durée et les octets gagnés alimentent les métriques Prometheus et le journal.
+    """
+    try:
+        start = time.perf_counter()
+        original_size = os.path.getsize(filepath)
+        img = Image.open(filepath)
+        if img.mode in ('RGBA', 'LA', 'P'):
+            img = img.convert('RGB')
+        img.thumbnail((1920, 1080), Image.Resampling.LANCZOS)
+        
+        base, ext = os.path.splitext(filepath)
+        new_filepath = base + '.jpg'
+        img.save(new_filepath, 'JPEG', quality=85, optimize=True)
+        
+        if filepath != new_filepath and os.path.exists(filepath):
+            os.remove(filepath)
+        
+        seconds = time.perf_counter() - start
+        optimized_size = os.path.getsize(new_filepath)
+        observe_image(seconds, original_size, optimized_size)
+        logger.info(f"🖼️ Image optimized: {os.path.basename(new_filepath)}", extra={
+            'event': 'image_optimized', 'duration_ms': round(seconds * 1000, 1),
+            'bytes_before': original_size, 'bytes_after': optimized_size
+        })
+        return new_filepath
+    except Exception as e:
+        logger.warning(f"Error optimizing image: {e}", extra={'event': 'image_error'})
+        return filepath
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Script d'import en masse de brochures PDF
+
+Importe un répertoire complet de brochures PDF (onboarding d'une nouvelle
+agence) sans passer par l'upload manuel du panneau d'administration :
+1. Extraction du texte des PDF (pool de processus)
+2. Extraction structurée et traduction anglaise via IA (concurrence bornée)
+3. Insertion des villas par lots dans la base de données
+
+La progression est enregistrée dans un fichier d'état : un import interrompu
+reprend là où il s'était arrêté. Les extractions déjà présentes dans le cache
+(table pdf_extraction) ne sont pas refaites.
+
+Usage:
+    python import_brochures.py /chemin/vers/brochures
+    python import_brochures.py /chemin/vers/brochures --concurrency 8 --batch-size 50
+    python import_brochures.py /chemin/vers/brochures --dry-run
+    python import_brochures.py /chemin/vers/brochures --activate
+
+Options:
+    --concurrency N   Nombre de traitements simultanés (défaut: 4)
+    --batch-size N    Nombre de villas insérées par transaction (défaut: 20)
+    --state-file F    Fichier de progression (défaut: <répertoire>/.import_progress.json)
+    --activate        Publie immédiatement les villas importées (is_active)
+    --force           Ignore le cache d'extraction et le fichier de progression
+    --dry-run         Extrait uniquement le texte et affiche ce qui serait importé,
+                      sans appel IA ni écriture en base
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from dotenv import load_dotenv
+from sqlalchemy.exc import IntegrityError
+
+load_dotenv()
+
+# Colonnes de Villa alimentées par l'extraction IA (hors champs numériques)
+TEXT_FIELDS = [
+    'title', 'title_en', 'location', 'distance_city', 'description', 'description_en',
+    'pool_size', 'features', 'features_en', 'equipment', 'equipment_en',
+    'business_info', 'business_info_en', 'investment_benefits', 'investment_benefits_en',
+    'documents', 'documents_en', 'contact_phone', 'contact_email', 'contact_website',
+    'hero_subtitle_en', 'contact_button_en', 'description_title_en', 'whatsapp_button_en',
+    'why_choose_title_en', 'why_card1_title_en', 'why_card1_desc_en',
+    'why_card2_title_en', 'why_card2_desc_en', 'why_card3_title_en', 'why_card3_desc_en',
+    'why_card4_title_en', 'why_card4_desc_en', 'contact_title_en', 'contact_subtitle_en'
+]
+INT_FIELDS = ['price', 'terrain_area', 'built_area', 'bedrooms']
+
+
+def file_sha256(path):
+    """Calcule l'empreinte SHA-256 d'un fichier."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_state(state_file):
+    """Charge le fichier de progression (dictionnaire sha256 -> statut)."""
+    if os.path.exists(state_file):
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state_file, state):
+    """Enregistre le fichier de progression de manière atomique."""
+    temp_file = state_file + '.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(temp_file, state_file)
+
+
+def extract_text_job(path, max_pages, max_chars):
+    """Extraction du texte d'un PDF (exécutée dans un processus du pool)."""
+    from pdf_extraction import extract_pdf_text
+    start = time.perf_counter()
+    try:
+        result = extract_pdf_text(path, max_pages=max_pages, max_chars=max_chars, workers=1)
+        return result['text'], None, time.perf_counter() - start
+    except Exception as e:
+        return '', str(e), time.perf_counter() - start
+
+
+def ai_job(pdf_text):
+    """Extraction structurée puis traduction anglaise (exécutée dans un thread)."""
+    from ai_services import extract_villa_data_with_ai, translate_villa_data_to_english
+    start = time.perf_counter()
+    villa_data = extract_villa_data_with_ai(pdf_text)
+    if not villa_data:
+        return None, 'AI extraction failed', time.perf_counter() - start
+    english_translations = translate_villa_data_to_english(villa_data)
+    if english_translations:
+        villa_data.update(english_translations)
+    return villa_data, None, time.perf_counter() - start
+
+
+def build_villa(villa_data, sha256, used_references, activate):
+    """Construit une Villa à partir des données extraites, avec une référence unique."""
+    from app import safe_int
+    from models import Villa
+
+    reference = (str(villa_data.get('reference') or '').strip() or f"PDF-{sha256[:8]}")[:50]
+    if reference in used_references:
+        reference = f"{reference[:41]}-{sha256[:8]}"
+    used_references.add(reference)
+
+    villa = Villa(reference=reference, is_active=activate)
+    for field in TEXT_FIELDS:
+        setattr(villa, field, str(villa_data.get(field) or ''))
+    for field in INT_FIELDS:
+        setattr(villa, field, safe_int(villa_data.get(field), 0))
+    villa.set_images_list([])
+    return villa
+
+
+def insert_batch(db, batch, state):
+    """
+    Insère un lot de villas en une transaction.
+    En cas de conflit, le lot est rejoué ligne par ligne pour isoler les erreurs.
+    """
+    db.session.add_all([villa for _, villa in batch])
+    try:
+        db.session.commit()
+        for sha256, villa in batch:
+            state[sha256].update({'status': 'imported', 'reference': villa.reference, 'error': None})
+        return
+    except IntegrityError:
+        db.session.rollback()
+
+    for sha256, villa in batch:
+        db.session.add(villa)
+        try:
+            db.session.commit()
+            state[sha256].update({'status': 'imported', 'reference': villa.reference, 'error': None})
+        except IntegrityError as e:
+            db.session.rollback()
+            state[sha256].update({'status': 'failed', 'error': f'Insert failed: {e.orig}'})
+
+
+def import_brochures(directory, concurrency=4, batch_size=20, state_file=None,
+                     activate=False, force=False, dry_run=False):
+    """Importe toutes les brochures PDF d'un répertoire. Retourne True si aucun échec."""
+    from app import create_app
+    from models import PdfExtraction, Villa, db
+    from pdf_extraction import process_context
+
+    # Sans appel IA en dry-run : la clé OpenRouter n'est pas exigée
+    app = create_app({'AI_REQUIRED': not dry_run})
+
+    state_file = state_file or os.path.join(directory, '.import_progress.json')
+    state = {} if force else load_state(state_file)
+
+    pdf_files = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith('.pdf')
+    )
+    print(f"📂 {len(pdf_files)} brochures PDF trouvées dans {directory}")
+
+    started = time.perf_counter()
+    stats = {'skipped': 0, 'cached': 0, 'imported': 0, 'failed': 0, 'text_seconds': 0.0, 'ai_seconds': 0.0}
+    failures = []
+
+    with app.app_context():
+        # Fichiers à traiter (les doublons de contenu ne sont traités qu'une fois)
+        todo = {}
+        for path in pdf_files:
+            sha256 = file_sha256(path)
+            if sha256 in todo or state.get(sha256, {}).get('status') == 'imported':
+                stats['skipped'] += 1
+                continue
+            todo[sha256] = path
+            state[sha256] = {'file': os.path.basename(path), 'status': 'pending', 'reference': None, 'error': None}
+
+        print(f"⏭️  {stats['skipped']} déjà importées ou en double, {len(todo)} à traiter")
+        if not todo:
+            return True
+
+        cache = {}
+        if not force:
+            for entry in PdfExtraction.query.filter(PdfExtraction.sha256.in_(list(todo))).all():
+                cache[entry.sha256] = entry
+
+        used_references = {ref for (ref,) in db.session.query(Villa.reference).all()}
+        pending_rows = []
+
+        def fail(sha256, error):
+            stats['failed'] += 1
+            state[sha256].update({'status': 'failed', 'error': error})
+            failures.append((state[sha256]['file'], error))
+
+        def record_villa(sha256, villa_data):
+            if dry_run:
+                stats['imported'] += 1
+                print(f"  🔎 {state[sha256]['file']}: {villa_data.get('title') or '(sans titre)'}")
+                return
+            pending_rows.append((sha256, build_villa(villa_data, sha256, used_references, activate)))
+            if len(pending_rows) >= batch_size:
+                flush()
+
+        def flush():
+            if not pending_rows:
+                return
+            insert_batch(db, pending_rows, state)
+            for sha256, _ in pending_rows:
+                if state[sha256]['status'] == 'imported':
+                    stats['imported'] += 1
+                else:
+                    stats['failed'] += 1
+                    failures.append((state[sha256]['file'], state[sha256]['error']))
+            pending_rows.clear()
+            save_state(state_file, state)
+            print(f"  💾 Lot inséré ({stats['imported']} villas importées)")
+
+        def store_cache(sha256, pdf_text=None, villa_data=None):
+            if dry_run:
+                return
+            entry = cache.get(sha256) or PdfExtraction(sha256=sha256)
+            if sha256 not in cache:
+                db.session.add(entry)
+                cache[sha256] = entry
+            if pdf_text is not None:
+                entry.pdf_text = pdf_text
+            if villa_data is not None:
+                entry.set_villa_data(villa_data)
+            db.session.commit()
+
+        # Les résultats déjà en cache sont insérés sans aucun traitement
+        need_text, need_ai = [], []
+        for sha256 in todo:
+            entry = cache.get(sha256)
+            villa_data = entry.get_villa_data() if entry else None
+            if villa_data:
+                stats['cached'] += 1
+                record_villa(sha256, villa_data)
+            elif entry and entry.pdf_text:
+                need_ai.append((sha256, entry.pdf_text))
+            else:
+                need_text.append(sha256)
+
+        # Texte et IA en un seul pipeline : l'appel IA d'une brochure part dès que son texte est extrait,
+        # et chaque résultat est enregistré à son arrivée, sans attendre la fin des autres extractions
+        with ProcessPoolExecutor(max_workers=concurrency, mp_context=process_context()) as text_pool, \
+                ThreadPoolExecutor(max_workers=concurrency) as ai_pool:
+            running = {}
+
+            def submit_ai(sha256, pdf_text):
+                if dry_run:
+                    print(f"  🔎 {state[sha256]['file']}: {len(pdf_text)} caractères extraits")
+                    stats['imported'] += 1
+                    return
+                running[ai_pool.submit(ai_job, pdf_text)] = ('ai', sha256)
+
+            for sha256, pdf_text in need_ai:
+                submit_ai(sha256, pdf_text)
+            for sha256 in need_text:
+                future = text_pool.submit(extract_text_job, todo[sha256], app.config['PDF_MAX_PAGES'],
+                                          app.config['PDF_MAX_CHARS'])
+                running[future] = ('text', sha256)
+
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step, sha256 = running.pop(future)
+                    if step == 'text':
+                        pdf_text, error, seconds = future.result()
+                        stats['text_seconds'] += seconds
+                        if error or not pdf_text.strip():
+                            fail(sha256, error or 'No text extracted')
+                            continue
+                        store_cache(sha256, pdf_text=pdf_text)
+                        submit_ai(sha256, pdf_text)
+                    else:
+                        villa_data, error, seconds = future.result()
+                        stats['ai_seconds'] += seconds
+                        if error:
+                            fail(sha256, error)
+                            continue
+                        store_cache(sha256, villa_data=villa_data)
+                        record_villa(sha256, villa_data)
+
+        flush()
+        if not dry_run:
+            save_state(state_file, state)
+
+    elapsed = time.perf_counter() - started
+    processed = stats['imported'] + stats['failed']
+    print()
+    print("=" * 80)
+    print("📊 RAPPORT D'IMPORT" + (" (DRY-RUN - aucune écriture)" if dry_run else ""))
+    print("=" * 80)
+    print(f"  Brochures trouvées    : {len(pdf_files)}")
+    print(f"  Déjà importées/doubles: {stats['skipped']}")
+    print(f"  Depuis le cache       : {stats['cached']}")
+    print(f"  {('Importables' if dry_run else 'Importées').ljust(22)}: {stats['imported']}")
+    print(f"  Échecs                : {stats['failed']}")
+    print(f"  Durée totale          : {elapsed:.1f}s")
+    if processed and elapsed > 0:
+        print(f"  Débit                 : {processed / elapsed * 60:.1f} brochures/min")
+    print(f"  Temps cumulé texte    : {stats['text_seconds']:.1f}s")
+    print(f"  Temps cumulé IA       : {stats['ai_seconds']:.1f}s")
+    if failures:
+        print()
+        print("❌ Échecs:")
+        for filename, error in failures:
+            print(f"  - {filename}: {error}")
+    return not failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import en masse de brochures PDF de villas")
+    parser.add_argument('directory', help="Répertoire contenant les brochures PDF")
+    parser.add_argument('--concurrency', type=int, default=4, help="Traitements simultanés (défaut: 4)")
+    parser.add_argument('--batch-size', type=int, default=20, help="Villas par transaction (défaut: 20)")
+    parser.add_argument('--state-file', help="Fichier de progression (défaut: <répertoire>/.import_progress.json)")
+    parser.add_argument('--activate', action='store_true', help="Publier immédiatement les villas importées")
+    parser.add_argument('--force', action='store_true', help="Ignorer le cache et la progression enregistrée")
+    parser.add_argument('--dry-run', action='store_true', help="Extraire le texte sans appel IA ni écriture en base")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        print(f"❌ Répertoire introuvable: {args.directory}")
+        return 1
+    if not args.dry_run and not os.environ.get('OPENROUTER_API_KEY'):
+        print("❌ Erreur: OPENROUTER_API_KEY non définie")
+        print("💡 Configurez cette variable dans les Secrets Replit ou le fichier .env")
+        return 1
+
+    print("=" * 80)
+    print("📚 IMPORT EN MASSE DE BROCHURES PDF")
+    print("=" * 80)
+    print()
+
+    success = import_brochures(
+        args.directory,
+        concurrency=max(1, args.concurrency),
+        batch_size=max(1, args.batch_size),
+        state_file=args.state_file,
+        activate=args.activate,
+        force=args.force,
+        dry_run=args.dry_run
+    )
+
+    print("=" * 80)
+    return 0 if success else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
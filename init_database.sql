@@ -3,7 +3,8 @@
 -- Villa à Vendre Marrakech - Immobilier de Luxe
 -- ============================================================
 -- 
--- Ce script crée la table villa avec toutes les colonnes nécessaires,
+-- Ce script crée la table villa avec toutes les colonnes nécessaires, la table
+-- villa_translation des textes localisés (une ligne par champ et par langue),
 -- les triggers pour updated_at et les index pour optimiser les performances.
 --
 -- UTILISATION:
@@ -27,11 +28,9 @@ CREATE TABLE IF NOT EXISTS villa (
     reference VARCHAR(50) UNIQUE NOT NULL,
     
     -- Informations principales
-    title VARCHAR(200) NOT NULL,
     price INTEGER NOT NULL,
     location VARCHAR(200) NOT NULL,
     distance_city VARCHAR(100),
-    description TEXT NOT NULL,
     
     -- Caractéristiques techniques
     terrain_area INTEGER,
@@ -39,13 +38,6 @@ CREATE TABLE IF NOT EXISTS villa (
     bedrooms INTEGER,
     pool_size VARCHAR(50),
     
-    -- Détails et équipements
-    features TEXT,
-    equipment TEXT,
-    business_info TEXT,
-    investment_benefits TEXT,
-    documents TEXT,
-    
     -- Médias
     images TEXT,
     
@@ -60,6 +52,44 @@ CREATE TABLE IF NOT EXISTS villa (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- ============================================================
+-- Textes localisés (titre, description, textes du site...)
+-- ============================================================
+-- Une ligne par (villa, langue, champ) : une nouvelle langue ne demande
+-- aucune modification du schéma. La clé primaire sert d'index de lecture
+-- de tous les textes d'une langue.
+
+CREATE TABLE IF NOT EXISTS villa_translation (
+    villa_id INTEGER NOT NULL REFERENCES villa(id) ON DELETE CASCADE,
+    lang VARCHAR(5) NOT NULL,
+    field VARCHAR(50) NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (villa_id, lang, field)
+);
+
+-- ============================================================
+-- Recherche plein texte (GET /api/search, voir villa_search.py)
+-- ============================================================
+-- tsvector généré pour les textes recherchables, avec la configuration de
+-- sa langue, et un index GIN partiel par langue. L'agrégat tsvector_agg
+-- réunit les textes d'une villa pour évaluer la requête complète.
+
+CREATE OR REPLACE AGGREGATE tsvector_agg(tsvector) (SFUNC = tsvector_concat, STYPE = tsvector, INITCOND = '');
+
+ALTER TABLE villa_translation ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        CASE WHEN field IN ('title', 'description', 'features', 'equipment') THEN
+            setweight(
+                to_tsvector(CASE lang WHEN 'fr' THEN 'french'::regconfig
+                                      WHEN 'en' THEN 'english'::regconfig
+                                      ELSE 'simple'::regconfig END, text),
+                (CASE field WHEN 'title' THEN 'A' WHEN 'description' THEN 'B' ELSE 'C' END)::"char")
+        END
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS ix_villa_translation_search_fr ON villa_translation USING gin (search_vector) WHERE lang = 'fr';
+CREATE INDEX IF NOT EXISTS ix_villa_translation_search_en ON villa_translation USING gin (search_vector) WHERE lang = 'en';
+
 -- ============================================================
 -- Fonction pour mettre à jour automatiquement updated_at
 -- ============================================================
@@ -102,26 +132,26 @@ CREATE INDEX IF NOT EXISTS idx_villa_is_active ON villa(is_active);
 -- Index sur reference pour recherche rapide
 CREATE INDEX IF NOT EXISTS idx_villa_reference ON villa(reference);
 
+-- Index composites du catalogue (/api/villas) : filtre is_active + critère,
+-- puis colonnes de tri (price, id) pour la pagination par clé
+CREATE INDEX IF NOT EXISTS ix_villa_active_price ON villa(is_active, price, id);
+CREATE INDEX IF NOT EXISTS ix_villa_active_bedrooms_price ON villa(is_active, bedrooms, price, id);
+CREATE INDEX IF NOT EXISTS ix_villa_active_location_price ON villa(is_active, location, price, id);
+CREATE INDEX IF NOT EXISTS ix_villa_active_id ON villa(is_active, id);
+
 -- ============================================================
 -- Commentaires sur la table et les colonnes
 -- ============================================================
 
 COMMENT ON TABLE villa IS 'Table principale contenant toutes les villas à vendre';
 COMMENT ON COLUMN villa.reference IS 'Référence unique de la villa (ex: VILLA-2025-001)';
-COMMENT ON COLUMN villa.title IS 'Titre de l''annonce de la villa';
 COMMENT ON COLUMN villa.price IS 'Prix de vente en MAD (Dirhams marocains)';
 COMMENT ON COLUMN villa.location IS 'Localisation de la villa à Marrakech';
 COMMENT ON COLUMN villa.distance_city IS 'Distance depuis le centre-ville';
-COMMENT ON COLUMN villa.description IS 'Description détaillée de la villa';
 COMMENT ON COLUMN villa.terrain_area IS 'Surface du terrain en m²';
 COMMENT ON COLUMN villa.built_area IS 'Surface construite en m²';
 COMMENT ON COLUMN villa.bedrooms IS 'Nombre de chambres';
 COMMENT ON COLUMN villa.pool_size IS 'Dimensions de la piscine';
-COMMENT ON COLUMN villa.features IS 'Caractéristiques principales';
-COMMENT ON COLUMN villa.equipment IS 'Équipements et installations';
-COMMENT ON COLUMN villa.business_info IS 'Informations commerciales';
-COMMENT ON COLUMN villa.investment_benefits IS 'Avantages de l''investissement';
-COMMENT ON COLUMN villa.documents IS 'Documents disponibles';
 COMMENT ON COLUMN villa.images IS 'JSON array des chemins des images';
 COMMENT ON COLUMN villa.contact_phone IS 'Numéro de téléphone de contact (WhatsApp)';
 COMMENT ON COLUMN villa.contact_email IS 'Email de contact';
@@ -129,6 +159,9 @@ COMMENT ON COLUMN villa.contact_website IS 'Site web (optionnel)';
 COMMENT ON COLUMN villa.is_active IS 'Indique si la villa est active (visible)';
 COMMENT ON COLUMN villa.created_at IS 'Date de création de l''enregistrement';
 COMMENT ON COLUMN villa.updated_at IS 'Date de dernière modification';
+COMMENT ON TABLE villa_translation IS 'Textes localisés des villas (un texte par champ et par langue)';
+COMMENT ON COLUMN villa_translation.field IS 'Nom du champ (title, description, hero_subtitle...)';
+COMMENT ON COLUMN villa_translation.lang IS 'Code langue (fr, en...)';
 
 -- ============================================================
 -- Vérification et affichage du résultat
@@ -153,9 +186,9 @@ BEGIN
     RAISE NOTICE '============================================================';
     RAISE NOTICE '';
     RAISE NOTICE 'Structure de la base de données:';
-    RAISE NOTICE '  • Table villa créée';
+    RAISE NOTICE '  • Tables villa et villa_translation créées';
     RAISE NOTICE '  • % colonnes configurées', col_count;
-    RAISE NOTICE '  • 5 index de performance';
+    RAISE NOTICE '  • 11 index de performance (dont 2 index de recherche plein texte)';
     RAISE NOTICE '  • 1 trigger automatique (updated_at)';
     RAISE NOTICE '';
     RAISE NOTICE 'Données:';
@@ -188,31 +221,36 @@ END $$;
 
 /*
 INSERT INTO villa (
-    reference, title, price, location, distance_city, description,
+    reference, price, location, distance_city,
     terrain_area, built_area, bedrooms, pool_size,
-    features, equipment, investment_benefits,
     contact_phone, contact_email,
     images, is_active
 ) VALUES (
     'VILLA-2025-001',
-    'Villa de Luxe avec Piscine - Route de Fès',
     4500000,
     'Route de Fès, Marrakech',
     '10 minutes du centre-ville',
-    'Magnifique villa de prestige située sur la Route de Fès, dans un quartier calme et résidentiel. Cette propriété exceptionnelle allie modernité et confort avec ses espaces généreux et ses finitions haut de gamme.',
     500,
     350,
     5,
     '12m x 6m',
-    E'Piscine chauffée\nArchitecture moderne\nJardin paysagé\nVue panoramique\nTerrasse spacieuse',
-    E'Climatisation centrale\nChauffage au sol\nCuisine équipée Siemens\nDomotique complète\nPortail automatique',
-    E'Emplacement stratégique\nFort potentiel de valorisation\nQuartier résidentiel en développement\nProximité écoles internationales',
     '+212 6 XX XX XX XX',
     'contact@villaavendremarrakech.com',
     '[]',
     TRUE
 );
 
+INSERT INTO villa_translation (villa_id, lang, field, text)
+SELECT id, 'fr', v.field, v.text
+FROM villa, (VALUES
+    ('title', 'Villa de Luxe avec Piscine - Route de Fès'),
+    ('description', 'Magnifique villa de prestige située sur la Route de Fès, dans un quartier calme et résidentiel. Cette propriété exceptionnelle allie modernité et confort avec ses espaces généreux et ses finitions haut de gamme.'),
+    ('features', E'Piscine chauffée\nArchitecture moderne\nJardin paysagé\nVue panoramique\nTerrasse spacieuse'),
+    ('equipment', E'Climatisation centrale\nChauffage au sol\nCuisine équipée Siemens\nDomotique complète\nPortail automatique'),
+    ('investment_benefits', E'Emplacement stratégique\nFort potentiel de valorisation\nQuartier résidentiel en développement\nProximité écoles internationales')
+) AS v(field, text)
+WHERE reference = 'VILLA-2025-001';
+
 RAISE NOTICE '📝 Exemple de villa inséré pour test';
 */
 
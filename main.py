@@ -2,7 +2,7 @@
 Main Entry Point - Application Flask Villa à Vendre Marrakech
 
 Ce fichier sert de point d'entrée principal pour l'application Flask.
-Il importe l'application depuis app.py et la rend disponible pour gunicorn.
+Il crée l'application avec la fabrique de app.py et la rend disponible pour gunicorn.
 
 Développé par: MOA Digital Agency LLC
 Développeur: Aisance KALONJI
@@ -10,8 +10,10 @@ Email: moa@myoneart.com
 Web: www.myoneart.com
 """
 
-# Import de l'application Flask depuis le module app
-from app import app
+# Création de l'application Flask par la fabrique du module app
+from app import create_app
+
+app = create_app()
 
 # Point d'entrée pour l'exécution directe en développement
 if __name__ == '__main__':
@@ -0,0 +1,227 @@
+"""
+Métriques Prometheus - Application Villa à Vendre Marrakech
+
+Ce fichier expose /metrics au format texte Prometheus :
+
+- villa_http_request_duration_seconds : latence par route (endpoint),
+  méthode et statut
+- villa_ai_request_duration_seconds, villa_ai_requests_total : durée et
+  résultat (success, failure, timeout) de chaque appel OpenRouter
+- villa_image_optimize_duration_seconds, villa_image_bytes_saved_total :
+  durée de optimize_image() et octets gagnés
+- villa_db_pool_* : connexions prises, taille des pools, prises de
+  connexion, attente et délais dépassés (base principale et réplique)
+- villa_cache_requests_total : succès et échecs des caches (ratio de
+  succès : hit / total)
+- villa_rate_limited_requests_total : requêtes refusées (429) par règle de
+  limitation de débit (voir rate_limit.py)
+- villa_log_entries_dropped_total : entrées de journal abandonnées, file
+  d'écriture pleine (voir app_logging.py)
+
+Avec gunicorn, chaque worker écrit ses valeurs dans PROMETHEUS_MULTIPROC_DIR
+(préparé par gunicorn.conf.py) et /metrics additionne celles de tous les
+workers, quel que soit celui qui répond. Sans cette variable (serveur de
+développement, scripts), les valeurs sont celles du processus courant.
+
+/metrics n'est pas public : il faut le jeton METRICS_TOKEN
+(Authorization: Bearer ...) ou une session administrateur ; sinon 404.
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import hmac
+import os
+import threading
+import time
+
+from flask import Response, abort, current_app, g, request, session
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge,
+                               Histogram, generate_latest, multiprocess)
+from sqlalchemy import event
+
+from app_logging import DroppingQueueHandler
+from db_pool import TimedQueuePool
+from models import db
+
+# ========== DÉFINITION DES MÉTRIQUES ==========
+
+HTTP_REQUEST_DURATION = Histogram(
+    'villa_http_request_duration_seconds', 'Durée des requêtes HTTP',
+    ['method', 'endpoint', 'status']
+)
+
+AI_REQUEST_DURATION = Histogram(
+    'villa_ai_request_duration_seconds', 'Durée des appels OpenRouter',
+    ['operation', 'model'],
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120)
+)
+AI_REQUESTS = Counter(
+    'villa_ai_requests', 'Appels OpenRouter par résultat (success, failure, timeout)',
+    ['operation', 'outcome']
+)
+
+IMAGE_OPTIMIZE_DURATION = Histogram(
+    'villa_image_optimize_duration_seconds', 'Durée de optimize_image()',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+IMAGE_BYTES_SAVED = Counter(
+    'villa_image_bytes_saved', "Octets gagnés par optimize_image() (0 si l'image grossit)"
+)
+
+# Gauges additionnées sur les workers vivants
+DB_POOL_CHECKED_OUT = Gauge(
+    'villa_db_pool_checked_out', 'Connexions actuellement prises',
+    ['database'], multiprocess_mode='livesum'
+)
+DB_POOL_SIZE = Gauge(
+    'villa_db_pool_size', 'Connexions gardées ouvertes par les pools (pool_size)',
+    ['database'], multiprocess_mode='livesum'
+)
+DB_POOL_MAX_CONNECTIONS = Gauge(
+    'villa_db_pool_max_connections', 'Connexions maximales des pools (pool_size + max_overflow)',
+    ['database'], multiprocess_mode='livesum'
+)
+DB_POOL_CHECKOUTS = Counter(
+    'villa_db_pool_checkouts', 'Prises de connexion', ['database']
+)
+DB_POOL_TIMEOUTS = Counter(
+    'villa_db_pool_timeouts', "Délais dépassés en attendant une connexion libre", ['database']
+)
+DB_POOL_WAIT = Counter(
+    'villa_db_pool_wait_seconds', "Temps total passé à attendre une connexion", ['database']
+)
+
+CACHE_REQUESTS = Counter(
+    'villa_cache_requests', 'Consultations des caches par résultat (hit, miss)',
+    ['cache', 'result']
+)
+
+RATE_LIMITED_REQUESTS = Counter(
+    'villa_rate_limited_requests', 'Requêtes refusées par la limitation de débit (429)', ['rule']
+)
+
+LOG_ENTRIES_DROPPED = Counter(
+    'villa_log_entries_dropped', "Entrées de journal abandonnées (file d'écriture pleine)"
+)
+
+
+# ========== ENREGISTREMENT ==========
+
+def observe_ai_request(operation, model, outcome, seconds):
+    """Enregistre un appel OpenRouter (outcome : 'success', 'failure' ou 'timeout')."""
+    AI_REQUEST_DURATION.labels(operation, model).observe(seconds)
+    AI_REQUESTS.labels(operation, outcome).inc()
+
+
+def observe_image(seconds, bytes_before, bytes_after):
+    """Enregistre une optimisation d'image."""
+    IMAGE_OPTIMIZE_DURATION.observe(seconds)
+    IMAGE_BYTES_SAVED.inc(max(bytes_before - bytes_after, 0))
+
+
+def count_cache(cache, hit):
+    """Compte une consultation de cache (succès ou échec)."""
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def count_rate_limited(rule):
+    """Compte une requête refusée par la limitation de débit."""
+    RATE_LIMITED_REQUESTS.labels(rule).inc()
+
+
+# ========== POOLS DE CONNEXIONS ==========
+
+# Derniers compteurs lus dans chaque pool (TimedQueuePool compte depuis le démarrage du worker)
+_pool_totals = {}
+_pool_lock = threading.Lock()
+
+
+def _watch_pool(name, engine):
+    """Suit les prises et retours de connexion d'un moteur."""
+    stats = engine.pool.statistics()
+    DB_POOL_SIZE.labels(name).set(stats['size'])
+    DB_POOL_MAX_CONNECTIONS.labels(name).set(stats['size'] + max(stats['max_overflow'], 0))
+    checked_out = DB_POOL_CHECKED_OUT.labels(name)
+    event.listen(engine, 'checkout', lambda *args: checked_out.inc())
+    event.listen(engine, 'checkin', lambda *args: checked_out.dec())
+
+
+def _collect_pool_counters(engines):
+    """Reporte dans les compteurs Prometheus ce que les pools ont compté depuis la dernière lecture."""
+    with _pool_lock:
+        for key, engine in engines.items():
+            if not isinstance(engine.pool, TimedQueuePool):
+                continue
+            name = key or 'primary'
+            stats = engine.pool.statistics()
+            totals = (stats['checkouts'], stats['timeouts'], stats['wait_ms_total'])
+            previous = _pool_totals.get(name, (0, 0, 0.0))
+            DB_POOL_CHECKOUTS.labels(name).inc(totals[0] - previous[0])
+            DB_POOL_TIMEOUTS.labels(name).inc(totals[1] - previous[1])
+            DB_POOL_WAIT.labels(name).inc(max(totals[2] - previous[2], 0) / 1000)
+            _pool_totals[name] = totals
+
+
+# ========== JOURNAUX ==========
+
+# Dernière valeur lue de DroppingQueueHandler.dropped (compté depuis le démarrage du worker)
+_logs_dropped = 0
+_logs_lock = threading.Lock()
+
+
+def _collect_dropped_logs():
+    """Reporte dans le compteur Prometheus les entrées de journal abandonnées depuis la dernière lecture."""
+    global _logs_dropped
+    with _logs_lock:
+        dropped = DroppingQueueHandler.dropped
+        LOG_ENTRIES_DROPPED.inc(max(dropped - _logs_dropped, 0))
+        _logs_dropped = dropped
+
+
+# ========== HOOKS ET ROUTE ==========
+
+def _observe_request(response):
+    started = g.get('request_started')
+    if started is not None and request.endpoint not in ('static', 'assets'):
+        HTTP_REQUEST_DURATION.labels(
+            request.method, request.endpoint or 'none', str(response.status_code)
+        ).observe(time.perf_counter() - started)
+        _collect_pool_counters(db.engines)
+        _collect_dropped_logs()
+    return response
+
+
+def metrics_authorized():
+    """True avec le jeton METRICS_TOKEN ou une session administrateur."""
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        supplied = request.headers.get('Authorization', '')
+        if hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode()):
+            return True
+    return bool(session.get('admin_logged_in'))
+
+
+def metrics_view():
+    """Métriques de tous les workers au format texte Prometheus."""
+    if not metrics_authorized():
+        abort(404)
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST,
+                    headers={'Cache-Control': 'no-store'})
+
+
+def init_metrics(app):
+    """Active les mesures Prometheus et la route /metrics (après init_request_timing)."""
+    with app.app_context():
+        for key, engine in db.engines.items():
+            if isinstance(engine.pool, TimedQueuePool):
+                _watch_pool(key or 'primary', engine)
+    app.after_request(_observe_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Migrations de Schéma Versionnées - Application Villa à Vendre Marrakech
+
+Ce fichier applique les évolutions du schéma de la base de données une seule
+fois, au déploiement (update_vps.sh), au lieu de les vérifier au démarrage
+de chaque worker gunicorn.
+
+- la table schema_version garde la liste des migrations appliquées
+- un verrou consultatif PostgreSQL (pg_advisory_lock) garantit qu'une seule
+  exécution migre la base, même lancée plusieurs fois en parallèle
+- chaque migration s'exécute dans sa propre transaction, avec
+  l'enregistrement de sa version : une erreur laisse la base dans l'état
+  de la migration précédente
+
+Pour modifier le schéma : ajouter une fonction décorée par
+@migration(<version suivante>, "<description>") à la fin de ce fichier.
+Les migrations doivent rester idempotentes (IF NOT EXISTS...) et ne pas
+dépendre des modèles actuels : leur SQL est figé, pour qu'une base vide
+migrée aujourd'hui ou dans un an reçoive exactement le même schéma. La
+première crée le schéma de référence (tables villa, villa_translation et
+pdf_extraction) ; toute évolution des modèles passe par une nouvelle
+migration.
+
+Usage:
+    python migrations.py            # Applique les migrations en attente
+    python migrations.py --status   # Affiche les migrations appliquées / en attente
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import argparse
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+from models import db
+from villa_search import ensure_search_schema
+
+# Clé du verrou consultatif PostgreSQL réservé aux migrations
+MIGRATION_LOCK_ID = 7420193
+
+# Migrations enregistrées : [(version, description, fonction(connexion)), ...]
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Décorateur enregistrant une migration de schéma."""
+    def register(function):
+        MIGRATIONS.append((version, description, function))
+        return function
+    return register
+
+
+# ========== SUIVI DES VERSIONS ==========
+
+def ensure_version_table(connection):
+    """Crée la table schema_version si elle n'existe pas."""
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, "
+        "description VARCHAR(200) NOT NULL, "
+        "applied_at TIMESTAMP NOT NULL, "
+        "duration_ms INTEGER)"
+    ))
+
+
+def applied_versions(connection):
+    """Versions déjà appliquées (ensemble d'entiers)."""
+    return {row[0] for row in connection.execute(text("SELECT version FROM schema_version"))}
+
+
+def record_version(connection, version, description, duration_ms):
+    """Enregistre (ou met à jour, en réparation forcée) une migration appliquée."""
+    params = {'version': version, 'description': description,
+              'applied_at': datetime.utcnow(), 'duration_ms': duration_ms}
+    updated = connection.execute(text(
+        "UPDATE schema_version SET description = :description, applied_at = :applied_at, "
+        "duration_ms = :duration_ms WHERE version = :version"
+    ), params)
+    if not updated.rowcount:
+        connection.execute(text(
+            "INSERT INTO schema_version (version, description, applied_at, duration_ms) "
+            "VALUES (:version, :description, :applied_at, :duration_ms)"
+        ), params)
+
+
+@contextmanager
+def migration_lock(engine):
+    """
+    Verrou consultatif tenu pendant toute l'exécution des migrations
+
+    Un second déploiement lancé en parallèle attend la fin du premier, puis
+    ne trouve plus rien à appliquer. Sans effet hors PostgreSQL.
+    """
+    if engine.dialect.name != 'postgresql':
+        yield
+        return
+    with engine.connect() as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {'key': MIGRATION_LOCK_ID})
+        connection.commit()
+        try:
+            yield
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': MIGRATION_LOCK_ID})
+            connection.commit()
+
+
+def run_migrations(engine, force=False):
+    """
+    Applique les migrations en attente, dans l'ordre des versions
+
+    Args:
+        engine: Moteur SQLAlchemy de la base à migrer
+        force (bool): Rejouer toutes les migrations (réparation, voir fix_database.py)
+
+    Returns:
+        list: Versions appliquées par cet appel
+    """
+    applied_now = []
+    with migration_lock(engine):
+        with engine.begin() as connection:
+            ensure_version_table(connection)
+            applied = applied_versions(connection)
+
+        for version, description, function in sorted(MIGRATIONS, key=lambda m: m[0]):
+            if version in applied and not force:
+                continue
+            print(f"🔄 Migration {version}: {description}...")
+            start = time.perf_counter()
+            with engine.begin() as connection:
+                function(connection)
+                duration_ms = int((time.perf_counter() - start) * 1000)
+                record_version(connection, version, description, duration_ms)
+            print(f"   ✅ Migration {version} appliquée ({duration_ms} ms)")
+            applied_now.append(version)
+
+    if not applied_now:
+        print("✅ Schéma de la base de données à jour")
+    return applied_now
+
+
+def migration_status(engine):
+    """
+    État des migrations
+
+    Returns:
+        list: [(version, description, appliquée le ou None), ...]
+    """
+    with engine.begin() as connection:
+        ensure_version_table(connection)
+        applied = dict(connection.execute(text("SELECT version, applied_at FROM schema_version")).all())
+    return [(version, description, applied.get(version))
+            for version, description, _ in sorted(MIGRATIONS, key=lambda m: m[0])]
+
+
+# ========== MIGRATIONS ==========
+
+# Colonnes de la table villa dans le schéma de référence (migration 1)
+BASELINE_VILLA_COLUMNS = (
+    ('reference', 'VARCHAR(50) NOT NULL'),
+    ('price', 'INTEGER NOT NULL'),
+    ('location', 'VARCHAR(200) NOT NULL'),
+    ('distance_city', 'VARCHAR(100)'),
+    ('terrain_area', 'INTEGER'),
+    ('built_area', 'INTEGER'),
+    ('bedrooms', 'INTEGER'),
+    ('pool_size', 'VARCHAR(50)'),
+    ('images', 'TEXT'),
+    ('contact_phone', 'VARCHAR(50)'),
+    ('contact_email', 'VARCHAR(100)'),
+    ('contact_website', 'VARCHAR(200)'),
+    ('is_active', 'BOOLEAN'),
+    ('created_at', 'TIMESTAMP'),
+    ('updated_at', 'TIMESTAMP'),
+)
+
+# Table des textes localisés du schéma de référence (migrations 1 et 2)
+VILLA_TRANSLATION_TABLE = (
+    "CREATE TABLE IF NOT EXISTS villa_translation ("
+    "villa_id INTEGER NOT NULL, "
+    "lang VARCHAR(5) NOT NULL, "
+    "field VARCHAR(50) NOT NULL, "
+    "text TEXT NOT NULL, "
+    "PRIMARY KEY (villa_id, lang, field), "
+    "FOREIGN KEY (villa_id) REFERENCES villa (id) ON DELETE CASCADE)"
+)
+
+BASELINE_TABLES = (
+    "CREATE TABLE IF NOT EXISTS villa ("
+    "id {id_type} NOT NULL, "
+    + ''.join(f"{name} {definition}, " for name, definition in BASELINE_VILLA_COLUMNS)
+    + "PRIMARY KEY (id), "
+    "UNIQUE (reference))",
+
+    VILLA_TRANSLATION_TABLE,
+
+    "CREATE TABLE IF NOT EXISTS pdf_extraction ("
+    "sha256 VARCHAR(64) NOT NULL, "
+    "pdf_text TEXT, "
+    "villa_data TEXT, "
+    "created_at TIMESTAMP, "
+    "updated_at TIMESTAMP, "
+    "PRIMARY KEY (sha256))",
+)
+
+
+@migration(1, "Tables initiales et colonnes manquantes de la table villa")
+def _initial_schema(connection):
+    """
+    Crée les tables du schéma de référence et ajoute à villa ses colonnes manquantes
+
+    Les bases créées avant les migrations (tables créées au démarrage)
+    reçoivent les colonnes de référence qui leur manquent ; les contraintes
+    NOT NULL ne sont pas ajoutées à une table existante.
+    """
+    id_type = 'SERIAL' if connection.dialect.name == 'postgresql' else 'INTEGER'
+    for statement in BASELINE_TABLES:
+        connection.execute(text(statement.format(id_type=id_type)))
+    existing_columns = {column['name'] for column in inspect(connection).get_columns('villa')}
+    for name, definition in BASELINE_VILLA_COLUMNS:
+        if name in existing_columns:
+            continue
+        column_type = definition.replace(' NOT NULL', '')
+        connection.execute(text(f'ALTER TABLE villa ADD COLUMN {name} {column_type}'))
+        print(f"   ✅ Colonne ajoutée: {name} ({column_type})")
+
+
+# Anciennes colonnes de textes localisés de la table villa, figées pour la migration 2 :
+# {nom de colonne: (champ, langue)}
+LEGACY_LOCALIZED_COLUMNS = {
+    'title': ('title', 'fr'), 'title_en': ('title', 'en'),
+    'description': ('description', 'fr'), 'description_en': ('description', 'en'),
+    'features': ('features', 'fr'), 'features_en': ('features', 'en'),
+    'equipment': ('equipment', 'fr'), 'equipment_en': ('equipment', 'en'),
+    'business_info': ('business_info', 'fr'), 'business_info_en': ('business_info', 'en'),
+    'investment_benefits': ('investment_benefits', 'fr'), 'investment_benefits_en': ('investment_benefits', 'en'),
+    'documents': ('documents', 'fr'), 'documents_en': ('documents', 'en'),
+    'hero_subtitle_fr': ('hero_subtitle', 'fr'), 'hero_subtitle_en': ('hero_subtitle', 'en'),
+    'contact_button_fr': ('contact_button', 'fr'), 'contact_button_en': ('contact_button', 'en'),
+    'description_title_fr': ('description_title', 'fr'), 'description_title_en': ('description_title', 'en'),
+    'whatsapp_button_fr': ('whatsapp_button', 'fr'), 'whatsapp_button_en': ('whatsapp_button', 'en'),
+    'why_choose_title_fr': ('why_choose_title', 'fr'), 'why_choose_title_en': ('why_choose_title', 'en'),
+    'why_card1_title_fr': ('why_card1_title', 'fr'), 'why_card1_title_en': ('why_card1_title', 'en'),
+    'why_card1_desc_fr': ('why_card1_desc', 'fr'), 'why_card1_desc_en': ('why_card1_desc', 'en'),
+    'why_card2_title_fr': ('why_card2_title', 'fr'), 'why_card2_title_en': ('why_card2_title', 'en'),
+    'why_card2_desc_fr': ('why_card2_desc', 'fr'), 'why_card2_desc_en': ('why_card2_desc', 'en'),
+    'why_card3_title_fr': ('why_card3_title', 'fr'), 'why_card3_title_en': ('why_card3_title', 'en'),
+    'why_card3_desc_fr': ('why_card3_desc', 'fr'), 'why_card3_desc_en': ('why_card3_desc', 'en'),
+    'why_card4_title_fr': ('why_card4_title', 'fr'), 'why_card4_title_en': ('why_card4_title', 'en'),
+    'why_card4_desc_fr': ('why_card4_desc', 'fr'), 'why_card4_desc_en': ('why_card4_desc', 'en'),
+    'contact_title_fr': ('contact_title', 'fr'), 'contact_title_en': ('contact_title', 'en'),
+    'contact_subtitle_fr': ('contact_subtitle', 'fr'), 'contact_subtitle_en': ('contact_subtitle', 'en'),
+}
+
+
+@migration(2, "Textes localisés déplacés dans villa_translation")
+def _localized_texts_table(connection):
+    """
+    Copie les anciennes colonnes *_fr / *_en dans villa_translation puis les supprime
+
+    Les textes déjà présents dans villa_translation ne sont pas écrasés.
+    """
+    existing_columns = {column['name'] for column in inspect(connection).get_columns('villa')}
+    legacy = {column: key for column, key in LEGACY_LOCALIZED_COLUMNS.items()
+              if column in existing_columns}
+    if not legacy:
+        return
+
+    connection.execute(text(VILLA_TRANSLATION_TABLE))
+    copied = 0
+    for column, (field, lang) in sorted(legacy.items()):
+        result = connection.execute(text(
+            f"INSERT INTO villa_translation (villa_id, lang, field, text) "
+            f"SELECT id, :lang, :field, {column} FROM villa "
+            f"WHERE {column} IS NOT NULL AND {column} <> '' "
+            f"AND NOT EXISTS (SELECT 1 FROM villa_translation t "
+            f"WHERE t.villa_id = villa.id AND t.lang = :lang AND t.field = :field)"
+        ), {'lang': lang, 'field': field})
+        copied += max(result.rowcount or 0, 0)
+    for column in sorted(legacy):
+        connection.execute(text(f'ALTER TABLE villa DROP COLUMN {column}'))
+    print(f"   ✅ {copied} textes copiés, {len(legacy)} colonnes supprimées de 'villa'")
+
+
+# Index composites du catalogue (Villa.__table_args__), figés pour la migration 3
+CATALOG_INDEXES = (
+    ('ix_villa_active_price', 'is_active, price, id'),
+    ('ix_villa_active_bedrooms_price', 'is_active, bedrooms, price, id'),
+    ('ix_villa_active_location_price', 'is_active, location, price, id'),
+    ('ix_villa_active_id', 'is_active, id'),
+)
+
+
+@migration(3, "Index composites du catalogue")
+def _catalog_indexes(connection):
+    """Crée les index composites du catalogue absents."""
+    existing_indexes = {index['name'] for index in inspect(connection).get_indexes('villa')}
+    for name, columns in CATALOG_INDEXES:
+        if name not in existing_indexes:
+            connection.execute(text(f'CREATE INDEX {name} ON villa ({columns})'))
+            print(f"   ✅ Index créé: {name}")
+
+
+@migration(4, "Recherche plein texte (tsvector généré et index GIN)")
+def _full_text_search(connection):
+    """Colonne search_vector et index GIN par langue (PostgreSQL uniquement)."""
+    if not ensure_search_schema(connection):
+        print("   ℹ️  Base non PostgreSQL : recherche LIKE de secours")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrations de schéma versionnées")
+    parser.add_argument('--status', action='store_true', help="Afficher l'état des migrations")
+    args = parser.parse_args()
+
+    from app import create_app
+
+    with create_app().app_context():
+        if args.status:
+            for version, description, applied_at in migration_status(db.engine):
+                state = f"appliquée le {str(applied_at)[:16]}" if applied_at else "EN ATTENTE"
+                print(f"  {version:>3}  {description:<60} {state}")
+        else:
+            run_migrations(db.engine)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,8 @@
 Modèles de Base de Données - Application Villa à Vendre Marrakech
 
 Ce fichier définit les modèles SQLAlchemy pour la base de données PostgreSQL.
-Actuellement, il contient le modèle Villa qui représente une villa de luxe à vendre.
+Il contient le modèle Villa qui représente une villa de luxe à vendre, ses
+textes localisés (VillaTranslation) et le cache des extractions PDF.
 
 Développé par: MOA Digital Agency LLC
 Développeur: Aisance KALONJI
@@ -11,11 +12,38 @@ Web: www.myoneart.com
 """
 
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import undefer_group
 from datetime import datetime
 import json
 
-# Initialisation de l'extension SQLAlchemy
-db = SQLAlchemy()
+from db_routing import RoutingSession
+
+# Initialisation de l'extension SQLAlchemy (sessions routées vers la réplique, voir db_routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+class VillaTranslation(db.Model):
+    """
+    Textes localisés d'une villa (une ligne par champ et par langue)
+    
+    Remplace les paires de colonnes *_fr / *_en de la table villa : ajouter
+    une langue (ex: arabe) ou un nouveau texte ne demande aucune modification
+    du schéma. Seuls les textes non vides sont stockés.
+    
+    La clé primaire (villa_id, lang, field) sert d'index : tous les textes
+    d'une langue pour une ou plusieurs villas sont lus par un seul parcours
+    de plage. Le texte n'y est pas inclus (INCLUDE) car les descriptions
+    dépassent la taille maximale d'une entrée d'index B-tree (~2,7 Ko).
+    """
+    
+    __tablename__ = 'villa_translation'
+    
+    villa_id = db.Column(db.Integer, db.ForeignKey('villa.id', ondelete='CASCADE'), primary_key=True)
+    lang = db.Column(db.String(5), primary_key=True)  # Code langue ('fr', 'en', 'ar'...)
+    field = db.Column(db.String(50), primary_key=True)  # Nom du champ ('title', 'hero_subtitle'...)
+    text = db.Column(db.Text, nullable=False)  # Texte dans la langue
+    
+    villa = db.relationship('Villa', back_populates='translations')
 
 
 class Villa(db.Model):
@@ -24,27 +52,35 @@ class Villa(db.Model):
     
     Ce modèle stocke toutes les informations nécessaires pour présenter
     une villa de prestige sur le site, incluant:
-    - Informations générales (référence, titre, prix, localisation)
+    - Informations générales (référence, prix, localisation)
     - Caractéristiques techniques (surfaces, chambres, piscine)
-    - Détails marketing (équipements, avantages investisseurs)
     - Médias (images)
     - Coordonnées de contact
+    
+    Les textes localisés (titre, description, équipements, textes du site...)
+    sont stockés dans VillaTranslation et restent accessibles par les attributs
+    historiques : villa.title / villa.title_en, villa.hero_subtitle_fr, etc.
     """
     
     __tablename__ = 'villa'
     
+    # Index composites du catalogue : filtre is_active + critère de recherche,
+    # suivis des colonnes de tri (price, id) pour la pagination par clé
+    __table_args__ = (
+        db.Index('ix_villa_active_price', 'is_active', 'price', 'id'),
+        db.Index('ix_villa_active_bedrooms_price', 'is_active', 'bedrooms', 'price', 'id'),
+        db.Index('ix_villa_active_location_price', 'is_active', 'location', 'price', 'id'),
+        db.Index('ix_villa_active_id', 'is_active', 'id'),
+    )
+    
     # ========== IDENTIFIANT UNIQUE ==========
     id = db.Column(db.Integer, primary_key=True)
     
     # ========== INFORMATIONS PRINCIPALES ==========
     reference = db.Column(db.String(50), unique=True, nullable=False)  # Référence unique de la villa (ex: "VL-001")
-    title = db.Column(db.String(200), nullable=False)  # Titre attractif de l'annonce (français)
-    title_en = db.Column(db.String(200))  # Titre en anglais
     price = db.Column(db.Integer, nullable=False)  # Prix en euros
     location = db.Column(db.String(200), nullable=False)  # Localisation (quartier, zone)
     distance_city = db.Column(db.String(100))  # Distance depuis le centre-ville
-    description = db.Column(db.Text, nullable=False)  # Description complète et détaillée (français)
-    description_en = db.Column(db.Text)  # Description en anglais
     
     # ========== CARACTÉRISTIQUES TECHNIQUES ==========
     terrain_area = db.Column(db.Integer)  # Surface du terrain en m²
@@ -52,18 +88,6 @@ class Villa(db.Model):
     bedrooms = db.Column(db.Integer)  # Nombre de chambres/suites
     pool_size = db.Column(db.String(50))  # Dimensions de la piscine (ex: "12m x 6m")
     
-    # ========== DÉTAILS MARKETING ==========
-    features = db.Column(db.Text)  # Équipements principaux (un par ligne) - français
-    features_en = db.Column(db.Text)  # Équipements principaux - anglais
-    equipment = db.Column(db.Text)  # Équipement et confort (un par ligne) - français
-    equipment_en = db.Column(db.Text)  # Équipement et confort - anglais
-    business_info = db.Column(db.Text)  # Informations sur l'exploitation commerciale - français
-    business_info_en = db.Column(db.Text)  # Informations sur l'exploitation commerciale - anglais
-    investment_benefits = db.Column(db.Text)  # Atouts pour investisseurs - français
-    investment_benefits_en = db.Column(db.Text)  # Atouts pour investisseurs - anglais
-    documents = db.Column(db.Text)  # Documents disponibles (titre de propriété, etc.) - français
-    documents_en = db.Column(db.Text)  # Documents disponibles - anglais
-    
     # ========== MÉDIAS ==========
     images = db.Column(db.Text)  # Liste des noms de fichiers d'images (format JSON)
     
@@ -72,58 +96,172 @@ class Villa(db.Model):
     contact_email = db.Column(db.String(100))  # Email de contact
     contact_website = db.Column(db.String(200))  # Site web de l'agence
     
-    # ========== TEXTES PERSONNALISABLES DU SITE WEB ==========
-    # Section Héro
-    hero_subtitle_fr = db.Column(db.String(200))  # Sous-titre héro (français)
-    hero_subtitle_en = db.Column(db.String(200))  # Sous-titre héro (anglais)
-    contact_button_fr = db.Column(db.String(100))  # Texte bouton contact (français)
-    contact_button_en = db.Column(db.String(100))  # Texte bouton contact (anglais)
-    
-    # Section Description
-    description_title_fr = db.Column(db.String(200))  # Titre section description (français)
-    description_title_en = db.Column(db.String(200))  # Titre section description (anglais)
-    whatsapp_button_fr = db.Column(db.String(100))  # Texte bouton WhatsApp (français)
-    whatsapp_button_en = db.Column(db.String(100))  # Texte bouton WhatsApp (anglais)
-    
-    # Section "Pourquoi Choisir Cette Villa"
-    why_choose_title_fr = db.Column(db.String(200))  # Titre section (français)
-    why_choose_title_en = db.Column(db.String(200))  # Titre section (anglais)
-    
-    # Carte 1 - Emplacement
-    why_card1_title_fr = db.Column(db.String(200))
-    why_card1_title_en = db.Column(db.String(200))
-    why_card1_desc_fr = db.Column(db.Text)
-    why_card1_desc_en = db.Column(db.Text)
-    
-    # Carte 2 - Architecture
-    why_card2_title_fr = db.Column(db.String(200))
-    why_card2_title_en = db.Column(db.String(200))
-    why_card2_desc_fr = db.Column(db.Text)
-    why_card2_desc_en = db.Column(db.Text)
-    
-    # Carte 3 - Finitions
-    why_card3_title_fr = db.Column(db.String(200))
-    why_card3_title_en = db.Column(db.String(200))
-    why_card3_desc_fr = db.Column(db.Text)
-    why_card3_desc_en = db.Column(db.Text)
-    
-    # Carte 4 - Espaces Extérieurs
-    why_card4_title_fr = db.Column(db.String(200))
-    why_card4_title_en = db.Column(db.String(200))
-    why_card4_desc_fr = db.Column(db.Text)
-    why_card4_desc_en = db.Column(db.Text)
-    
-    # Section Contact
-    contact_title_fr = db.Column(db.String(200))  # Titre contact (français)
-    contact_title_en = db.Column(db.String(200))  # Titre contact (anglais)
-    contact_subtitle_fr = db.Column(db.String(200))  # Sous-titre contact (français)
-    contact_subtitle_en = db.Column(db.String(200))  # Sous-titre contact (anglais)
-    
     # ========== MÉTADONNÉES ==========
     is_active = db.Column(db.Boolean, default=True)  # Villa active/visible sur le site
     created_at = db.Column(db.DateTime, default=datetime.utcnow)  # Date de création
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Date de dernière mise à jour
     
+    # ========== TEXTES LOCALISÉS ==========
+    translations = db.relationship('VillaTranslation', back_populates='villa',
+                                   cascade='all, delete-orphan', passive_deletes=True)
+    
+    # Langues gérées : ajouter un code ici suffit pour une nouvelle langue
+    LANGUAGES = ('fr', 'en')
+    
+    # Contenus principaux : attribut français sans suffixe (title), autres langues suffixées (title_en)
+    CONTENT_FIELDS = ('title', 'description', 'features', 'equipment', 'business_info',
+                      'investment_benefits', 'documents')
+    
+    # Textes personnalisables du site : attributs toujours suffixés (hero_subtitle_fr, hero_subtitle_en)
+    SITE_TEXT_FIELDS = ('hero_subtitle', 'contact_button', 'description_title', 'whatsapp_button',
+                        'why_choose_title',
+                        'why_card1_title', 'why_card1_desc', 'why_card2_title', 'why_card2_desc',
+                        'why_card3_title', 'why_card3_desc', 'why_card4_title', 'why_card4_desc',
+                        'contact_title', 'contact_subtitle')
+    
+    LOCALIZED_FIELDS = CONTENT_FIELDS + SITE_TEXT_FIELDS
+    
+    # Colonnes nécessaires à to_summary_dict (listes du catalogue), le titre étant chargé à part
+    SUMMARY_COLUMNS = ('id', 'reference', 'price', 'location',
+                       'bedrooms', 'built_area', 'terrain_area', 'images')
+    
+    @classmethod
+    def attribute_name(cls, field, lang):
+        """
+        Nom de l'attribut historique d'un texte localisé
+        
+        Exemples: ('title', 'fr') -> 'title', ('title', 'en') -> 'title_en',
+        ('hero_subtitle', 'fr') -> 'hero_subtitle_fr'
+        """
+        if lang == 'fr' and field in cls.CONTENT_FIELDS:
+            return field
+        return f'{field}_{lang}'
+    
+    @classmethod
+    def public_options(cls):
+        """
+        Options de chargement pour une lecture publique
+        
+        Identiques pour toutes les langues : la ligne villa ne contient que des
+        colonnes communes, et seuls les indicateurs de présence (has_description,
+        ...) sont ajoutés au SELECT. La langue n'intervient qu'ensuite, dans
+        load_translations(), qui ne lit que les textes de la langue affichée.
+        
+        Usage:
+            villa = Villa.query.options(*Villa.public_options()).first()
+            Villa.load_translations([villa], 'en')
+        
+        Returns:
+            list: Options de requête SQLAlchemy
+        """
+        return [undefer_group('presence')]
+    
+    @classmethod
+    def load_translations(cls, villas, lang, fields=None):
+        """
+        Charge en une seule requête les textes d'une langue pour plusieurs villas
+        
+        Les textes sont placés dans un cache de l'instance, lu en priorité par
+        les attributs localisés : aucun texte des autres langues n'est chargé.
+        
+        Args:
+            villas (list): Villas à compléter (les None sont ignorés)
+            lang (str): Code langue
+            fields (tuple): Champs à charger (None = tous)
+        """
+        villas = [villa for villa in villas if villa is not None and villa.id is not None]
+        if not villas:
+            return
+        query = db.session.query(VillaTranslation.villa_id, VillaTranslation.field, VillaTranslation.text).filter(
+            VillaTranslation.lang == lang,
+            VillaTranslation.villa_id.in_([villa.id for villa in villas])
+        )
+        if fields:
+            query = query.filter(VillaTranslation.field.in_(fields))
+        texts = {villa.id: {} for villa in villas}
+        for villa_id, field, text in query:
+            texts[villa_id][field] = text
+        for villa in villas:
+            villa.__dict__.setdefault('_loaded_texts', {})[lang] = (texts[villa.id], fields)
+    
+    def get_text(self, field, lang):
+        """
+        Retourne un texte localisé ('' s'il n'existe pas dans cette langue,
+        comme les anciennes colonnes NOT NULL : les templates peuvent découper
+        ou afficher le texte sans tester None)
+        
+        Args:
+            field (str): Nom du champ ('title', 'hero_subtitle'...)
+            lang (str): Code langue
+        """
+        loaded = self.__dict__.get('_loaded_texts', {}).get(lang)
+        if loaded is not None:
+            texts, fields = loaded
+            if fields is None or field in fields:
+                return texts.get(field, '')
+        for translation in self.translations:
+            if translation.field == field and translation.lang == lang:
+                return translation.text
+        return ''
+    
+    def set_text(self, field, lang, value):
+        """
+        Enregistre un texte localisé (une valeur vide supprime la ligne)
+        
+        Args:
+            field (str): Nom du champ ('title', 'hero_subtitle'...)
+            lang (str): Code langue
+            value (str): Texte
+        """
+        self.__dict__.get('_loaded_texts', {}).pop(lang, None)
+        existing = None
+        for translation in self.translations:
+            if translation.field == field and translation.lang == lang:
+                existing = translation
+                break
+        if existing is not None and existing.text == value:
+            return
+        if not value:
+            if existing is None:
+                return
+            self.translations.remove(existing)
+        elif existing is not None:
+            existing.text = value
+        else:
+            self.translations.append(VillaTranslation(field=field, lang=lang, text=value))
+        # La ligne villa n'est pas modifiée : la date de mise à jour est tenue à jour ici
+        self.updated_at = datetime.utcnow()
+    
+    def apply_changes(self, values):
+        """
+        Applique des valeurs de formulaire en ne modifiant que celles qui diffèrent
+        
+        Les colonnes inchangées ne sont pas assignées (l'UPDATE ne porte que sur
+        les colonnes modifiées) et les textes localisés inchangés ne touchent pas
+        à villa_translation. Sans aucun changement, updated_at n'est pas modifié
+        et la session n'a rien à écrire.
+        
+        Args:
+            values (dict): {nom d'attribut: valeur} ('price', 'title_en', 'hero_subtitle_fr'...)
+        
+        Returns:
+            list: Noms des attributs modifiés (dans l'ordre de values)
+        """
+        localized = {self.attribute_name(field, lang)
+                     for field in self.LOCALIZED_FIELDS for lang in self.LANGUAGES}
+        changed = []
+        # Pas d'autoflush pendant la comparaison : le chargement des textes
+        # n'écrit pas la ligne villa avant la fin (un seul UPDATE au commit)
+        with db.session.no_autoflush:
+            for name, value in values.items():
+                current = getattr(self, name)
+                # Texte localisé absent ('') et valeur vide ou None sont équivalents (aucune ligne)
+                if current == value or (name in localized and not current and not value):
+                    continue
+                setattr(self, name, value)
+                changed.append(name)
+        return changed
+    
     # ========== MÉTHODES UTILITAIRES ==========
     
     def get_images_list(self):
@@ -163,6 +301,34 @@ class Villa(db.Model):
             return self.features.split('\n')
         return []
     
+    def to_summary_dict(self, lang='fr'):
+        """
+        Convertit l'objet Villa en résumé léger pour les listes du catalogue
+        
+        Seules les colonnes de SUMMARY_COLUMNS et le titre sont utilisés : charger
+        les villas avec load_only(SUMMARY_COLUMNS) puis
+        load_translations(villas, lang, fields=('title',)).
+        
+        Args:
+            lang (str): Langue souhaitée ('fr' ou 'en')
+        
+        Returns:
+            dict: Résumé de la villa (titre, prix, localisation, image principale...)
+        """
+        images = self.get_images_list()
+        return {
+            'id': self.id,
+            'reference': self.reference,
+            'title': self.get_text('title', lang),
+            'price': self.price,
+            'location': self.location,
+            'bedrooms': self.bedrooms,
+            'built_area': self.built_area,
+            'terrain_area': self.terrain_area,
+            'image': images[0] if images else None,
+            'url': f'/villa/{self.reference}'
+        }
+    
     def to_dict(self, lang='fr'):
         """
         Convertit l'objet Villa en dictionnaire pour l'API JSON
@@ -170,9 +336,12 @@ class Villa(db.Model):
         Utile pour les endpoints API qui doivent retourner les données
         de la villa en format JSON.
         
-        IMPORTANT: Pour la langue anglaise, les champs retournent None si la traduction
-        n'existe pas (pas de fallback vers le français) pour garantir une expérience
-        bilingue pure sans mélange de langues.
+        IMPORTANT: Pour une autre langue que le français, les champs sont vides ('')
+        si la traduction n'existe pas (pas de fallback vers le français) pour garantir
+        une expérience bilingue pure sans mélange de langues.
+        
+        Seuls les textes de la langue demandée sont lus : ils peuvent être
+        préchargés avec Villa.load_translations([villa], lang).
         
         Args:
             lang (str): Langue souhaitée ('fr' ou 'en')
@@ -180,51 +349,96 @@ class Villa(db.Model):
         Returns:
             dict: Dictionnaire contenant toutes les données de la villa
         """
-        if lang == 'en':
-            return {
-                'id': self.id,
-                'reference': self.reference,
-                'title': self.title_en,
-                'price': self.price,
-                'location': self.location,
-                'distance_city': self.distance_city,
-                'description': self.description_en,
-                'terrain_area': self.terrain_area,
-                'built_area': self.built_area,
-                'bedrooms': self.bedrooms,
-                'pool_size': self.pool_size,
-                'features': self.features_en,
-                'equipment': self.equipment_en,
-                'business_info': self.business_info_en,
-                'investment_benefits': self.investment_benefits_en,
-                'documents': self.documents_en,
-                'images': self.get_images_list(),
-                'contact_phone': self.contact_phone,
-                'contact_email': self.contact_email,
-                'contact_website': self.contact_website,
-                'is_active': self.is_active
-            }
-        else:
-            return {
-                'id': self.id,
-                'reference': self.reference,
-                'title': self.title,
-                'price': self.price,
-                'location': self.location,
-                'distance_city': self.distance_city,
-                'description': self.description,
-                'terrain_area': self.terrain_area,
-                'built_area': self.built_area,
-                'bedrooms': self.bedrooms,
-                'pool_size': self.pool_size,
-                'features': self.features,
-                'equipment': self.equipment,
-                'business_info': self.business_info,
-                'investment_benefits': self.investment_benefits,
-                'documents': self.documents,
-                'images': self.get_images_list(),
-                'contact_phone': self.contact_phone,
-                'contact_email': self.contact_email,
-                'contact_website': self.contact_website,
-                'is_active': self.is_active
-            }
+        return {
+            'id': self.id,
+            'reference': self.reference,
+            'title': self.get_text('title', lang),
+            'price': self.price,
+            'location': self.location,
+            'distance_city': self.distance_city,
+            'description': self.get_text('description', lang),
+            'terrain_area': self.terrain_area,
+            'built_area': self.built_area,
+            'bedrooms': self.bedrooms,
+            'pool_size': self.pool_size,
+            'features': self.get_text('features', lang),
+            'equipment': self.get_text('equipment', lang),
+            'business_info': self.get_text('business_info', lang),
+            'investment_benefits': self.get_text('investment_benefits', lang),
+            'documents': self.get_text('documents', lang),
+            'images': self.get_images_list(),
+            'contact_phone': self.contact_phone,
+            'contact_email': self.contact_email,
+            'contact_website': self.contact_website,
+            'is_active': self.is_active
+        }
+
+
+def _localized_property(field, lang):
+    """Attribut historique (villa.title_en...) adossé à la table villa_translation."""
+    def getter(self):
+        return self.get_text(field, lang)
+    
+    def setter(self, value):
+        self.set_text(field, lang, value)
+    
+    return property(getter, setter, doc=f"Texte '{field}' ({lang})")
+
+
+for _field in Villa.LOCALIZED_FIELDS:
+    for _lang in Villa.LANGUAGES:
+        setattr(Villa, Villa.attribute_name(_field, _lang), _localized_property(_field, _lang))
+
+
+def _presence_flag(field):
+    """Vrai si le texte existe dans au moins une langue (calculé en SQL)."""
+    return db.column_property(
+        db.exists().where(VillaTranslation.villa_id == Villa.id, VillaTranslation.field == field),
+        deferred=True, group='presence')
+
+
+# Indicateurs de présence : la page publique peut décider d'afficher une
+# section sans charger le texte des autres langues
+Villa.has_description = _presence_flag('description')
+Villa.has_features = _presence_flag('features')
+Villa.has_equipment = _presence_flag('equipment')
+Villa.has_investment_benefits = _presence_flag('investment_benefits')
+
+
+class PdfExtraction(db.Model):
+    """
+    Cache des extractions de brochures PDF
+    
+    Chaque brochure est identifiée par l'empreinte SHA-256 de son contenu.
+    Le texte extrait par PyPDF2 et le résultat structuré de l'IA (données
+    françaises + traductions anglaises) sont conservés, de sorte qu'un même
+    PDF uploadé plusieurs fois est traité instantanément.
+    """
+    
+    __tablename__ = 'pdf_extraction'
+    
+    sha256 = db.Column(db.String(64), primary_key=True)  # Empreinte SHA-256 du PDF
+    pdf_text = db.Column(db.Text)  # Texte brut extrait du PDF
+    villa_data = db.Column(db.Text)  # Données structurées extraites par l'IA (format JSON)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)  # Date de première extraction
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Date de dernière extraction
+    
+    def get_villa_data(self):
+        """
+        Retourne les données structurées sous forme de dictionnaire
+        
+        Returns:
+            dict: Données de la villa, ou None si l'extraction IA n'a pas encore réussi
+        """
+        if self.villa_data:
+            return json.loads(self.villa_data)
+        return None
+    
+    def set_villa_data(self, data):
+        """
+        Enregistre les données structurées en JSON
+        
+        Args:
+            data (dict): Données de la villa extraites par l'IA
+        """
+        self.villa_data = json.dumps(data, ensure_ascii=False)
@@ -0,0 +1,356 @@
+"""
+Extraction de Texte PDF - Application Villa à Vendre Marrakech
+
+Ce fichier regroupe l'extraction du texte des brochures PDF avec PyPDF2.
+Les pages sont réparties sur un pool de processus pour les gros documents
+(brochures scannées de 50 à 100 pages), et le texte est accumulé dans une
+liste jointe une seule fois à la fin plutôt que par concaténations successives.
+
+Le pool est créé une fois par processus, au premier gros document, avec
+forkserver (spawn à défaut) : ses processus ne sont jamais copiés d'un
+worker web en cours d'exécution (threads, connexions ouvertes). Sous gevent,
+l'extraction reste dans la greenlet, page par page, en rendant la main aux
+autres requêtes entre deux pages.
+
+Les uploads sont écrits directement par le parseur de formulaire : en mémoire
+pour les petits fichiers, dans un fichier temporaire hors de la racine web
+(répertoire temporaire système) pour les gros, avec contrôle de la taille
+au fil de la lecture.
+
+Des plafonds configurables limitent le nombre de pages lues et la taille du
+texte produit, et la durée d'extraction de chaque page est mesurée pour
+repérer les pages pathologiques.
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PyPDF2 import PdfReader
+
+# ========== CONFIGURATION PAR DÉFAUT ==========
+DEFAULT_MAX_PAGES = 100  # Nombre maximum de pages lues par document
+DEFAULT_MAX_CHARS = 200000  # Taille maximum du texte envoyé à l'IA
+DEFAULT_PARALLEL_MIN_PAGES = 8  # En dessous, le pool coûte plus qu'il ne rapporte
+DEFAULT_SLOW_PAGE_SECONDS = 2.0  # Seuil de signalement d'une page lente
+DEFAULT_SPOOL_THRESHOLD = 4 * 1024 * 1024  # Au-delà, l'upload est écrit sur disque
+
+logger = logging.getLogger('villa.pdf')
+
+# Pool de processus partagé par les extractions de ce processus (créé au premier gros document)
+_pool = None
+_pool_lock = threading.Lock()
+
+# Dans un processus du pool : (jeton de l'extraction, lecteur PDF) du dernier document lu
+_worker_reader = (None, None)
+
+
+class UploadTooLarge(Exception):
+    """Levée quand un upload dépasse la taille maximale autorisée."""
+
+
+class SpooledPdf:
+    """
+    PDF uploadé, écrit au fil de la lecture de la requête sans passer par static/uploads.
+
+    Sert de flux de fichier au parseur de formulaire de Werkzeug (voir
+    AppRequest dans app.py) : le PDF n'est écrit qu'une fois, et la taille
+    maximale est contrôlée pendant la réception. Le contenu reste en mémoire
+    tant qu'il est sous le seuil, puis bascule dans un fichier temporaire du
+    répertoire système.
+    L'empreinte SHA-256 est calculée pendant l'écriture. S'utilise comme
+    gestionnaire de contexte : le fichier temporaire éventuel est supprimé à
+    la sortie.
+
+    Attributs:
+        source: bytes (en mémoire) ou chemin du fichier temporaire
+        sha256 (str): Empreinte hexadécimale du contenu
+        size (int): Taille en octets
+    """
+
+    def __init__(self, max_bytes=None, spool_threshold=DEFAULT_SPOOL_THRESHOLD, spool_dir=None):
+        self.size = 0
+        self._max_bytes = max_bytes
+        self._spool_threshold = spool_threshold
+        self._spool_dir = spool_dir
+        self._digest = hashlib.sha256()
+        self._buffer = io.BytesIO()
+        self._file = None
+        self._temp_path = None
+
+    def write(self, chunk):
+        """Ajoute un morceau du PDF (UploadTooLarge au-delà de max_bytes)."""
+        self.size += len(chunk)
+        if self._max_bytes and self.size > self._max_bytes:
+            # Le parseur abandonne ce flux sans le fermer : le fichier temporaire est supprimé ici
+            self.close()
+            raise UploadTooLarge(f"PDF exceeds {self._max_bytes} bytes")
+        self._digest.update(chunk)
+        if self._file is None and self.size > self._spool_threshold:
+            fd, self._temp_path = tempfile.mkstemp(suffix='.pdf', dir=self._spool_dir)
+            self._file = os.fdopen(fd, 'w+b')
+            self._file.write(self._buffer.getbuffer())
+            self._buffer = None
+        self._storage.write(chunk)
+        return len(chunk)
+
+    @property
+    def _storage(self):
+        return self._file if self._file is not None else self._buffer
+
+    def read(self, size=-1):
+        return self._storage.read(size)
+
+    def readline(self, size=-1):
+        return self._storage.readline(size)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._storage.seek(offset, whence)
+
+    def tell(self):
+        return self._storage.tell()
+
+    @property
+    def sha256(self):
+        return self._digest.hexdigest()
+
+    @property
+    def source(self):
+        """Contenu en bytes, ou chemin du fichier temporaire (écrit sur disque avant d'être rendu)."""
+        if self._file is not None:
+            self._file.flush()
+            return self._temp_path
+        return self._buffer.getvalue()
+
+    @property
+    def in_memory(self):
+        return self._temp_path is None
+
+    def close(self):
+        """Supprime le fichier temporaire éventuel."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._temp_path and os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+        self._temp_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _open_reader(source):
+    """Ouvre un PdfReader depuis un chemin, des bytes ou un objet fichier."""
+    if isinstance(source, (bytes, bytearray)):
+        return PdfReader(io.BytesIO(source))
+    return PdfReader(source)
+
+
+
+
+def _extract_page(reader, index):
+    """Extrait le texte d'une page et mesure sa durée d'extraction."""
+    start = time.perf_counter()
+    try:
+        text = reader.pages[index].extract_text() or ""
+        error = None
+    except Exception as e:
+        text = ""
+        error = str(e)
+    return index, text, time.perf_counter() - start, error
+
+
+def _extract_pages_in_worker(token, path, indices):
+    """Point d'entrée exécuté dans un processus du pool : le document est ouvert une fois par extraction."""
+    global _worker_reader
+    if _worker_reader[0] != token:
+        _worker_reader = (token, _open_reader(path))
+    return [_extract_page(_worker_reader[1], index) for index in indices]
+
+
+def _serial_pages(reader, count, cooperative):
+    for index in range(count):
+        yield _extract_page(reader, index)
+        if cooperative:
+            # time.sleep est remplacé par gevent.sleep : les autres greenlets s'exécutent entre deux pages
+            time.sleep(0)
+
+
+def _gevent_patched():
+    """True dans un worker gevent (threading remplacé par des greenlets)."""
+    monkey = sys.modules.get('gevent.monkey')
+    return bool(monkey and monkey.is_module_patched('threading'))
+
+
+def _default_workers():
+    """Nombre de processus par défaut : les cœurs disponibles, plafonnés à 4."""
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+def process_context():
+    """
+    Contexte multiprocessing des pools d'extraction : forkserver, spawn à défaut.
+    Jamais fork : un processus copié hériterait des threads (journaux) et des
+    connexions à la base ouvertes par le processus parent.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def _get_pool(workers):
+    """Pool de processus de ce processus, créé au premier appel avec workers processus."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=process_context())
+        return _pool
+
+
+def _discard_pool(pool):
+    """Oublie un pool cassé (processus tué) : le prochain document en recrée un."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _pooled_pages(source, count, workers):
+    """
+    Pages extraites par le pool, dans l'ordre
+
+    Les pages sont envoyées par lots ; les processus ouvrent le document
+    depuis son chemin (les bytes sont d'abord écrits dans un fichier
+    temporaire). Les lots restants sont annulés si la lecture s'arrête
+    avant la fin (plafond de caractères).
+    """
+    temp_path = None
+    if isinstance(source, (bytes, bytearray)):
+        fd, temp_path = tempfile.mkstemp(suffix='.pdf')
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(source)
+        source = temp_path
+    pool = _get_pool(workers)
+    token = uuid.uuid4().hex
+    chunksize = max(1, count // (workers * 4))
+    futures = [pool.submit(_extract_pages_in_worker, token, os.fspath(source),
+                           range(start, min(start + chunksize, count)))
+               for start in range(0, count, chunksize)]
+    try:
+        for future in futures:
+            yield from future.result()
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
+        if temp_path:
+            os.remove(temp_path)
+
+
+def extract_pdf_text(source, max_pages=DEFAULT_MAX_PAGES, max_chars=DEFAULT_MAX_CHARS,
+                     workers=None, parallel_min_pages=DEFAULT_PARALLEL_MIN_PAGES,
+                     slow_page_seconds=DEFAULT_SLOW_PAGE_SECONDS):
+    """
+    Extrait le texte d'un PDF avec statistiques par page.
+
+    Les pages sont lues dans l'ordre et leur texte est ajouté à un tampon
+    (liste) au fil de l'eau. Dès que le plafond de caractères est atteint,
+    les pages restantes sont abandonnées.
+
+    Args:
+        source: Chemin du fichier, contenu en bytes ou objet fichier
+        max_pages (int): Nombre maximum de pages lues (None = toutes)
+        max_chars (int): Nombre maximum de caractères retournés (None = illimité)
+        workers (int): Nombre de processus du pool (None = automatique, 1 = série) ;
+            le pool est créé au premier appel et réutilisé ensuite
+        parallel_min_pages (int): Nombre de pages à partir duquel le pool est utilisé
+        slow_page_seconds (float): Seuil au-delà duquel une page est signalée lente
+
+    Returns:
+        dict: {
+            'text': texte extrait,
+            'page_count': nombre total de pages du document,
+            'pages_processed': nombre de pages effectivement lues,
+            'truncated': True si un plafond a coupé l'extraction,
+            'duration': durée totale en secondes,
+            'pages': [{'page', 'seconds', 'chars', 'error'}, ...],
+            'slow_pages': numéros des pages dépassant le seuil
+        }
+    """
+    start = time.perf_counter()
+    reader = _open_reader(source)
+    page_count = len(reader.pages)
+    pages_to_read = page_count if not max_pages else min(page_count, max_pages)
+
+    if workers is None:
+        workers = _default_workers()
+    # Un objet fichier ne peut pas être partagé entre processus : lecture en série
+    can_share = isinstance(source, (str, bytes, bytearray, os.PathLike))
+    cooperative = _gevent_patched()
+    use_pool = can_share and not cooperative and workers > 1 and pages_to_read >= parallel_min_pages
+
+    buffer = []
+    char_count = 0
+    pages = []
+    truncated = pages_to_read < page_count
+
+    def consume(results):
+        nonlocal char_count, truncated
+        for index, text, seconds, error in results:
+            pages.append({
+                'page': index + 1,
+                'seconds': round(seconds, 4),
+                'chars': len(text),
+                'error': error
+            })
+            if max_chars and char_count + len(text) + 1 > max_chars:
+                buffer.append(text[:max(0, max_chars - char_count)])
+                char_count = max_chars
+                truncated = True
+                return
+            buffer.append(text)
+            buffer.append("\n")
+            char_count += len(text) + 1
+
+    if use_pool:
+        results = _pooled_pages(source, pages_to_read, workers)
+        try:
+            consume(results)
+        finally:
+            results.close()
+    else:
+        consume(_serial_pages(reader, pages_to_read, cooperative))
+
+    slow_pages = [p['page'] for p in pages if p['seconds'] >= slow_page_seconds]
+    if slow_pages:
+        logger.warning(f"🐢 Slow PDF pages (>= {slow_page_seconds}s): {slow_pages}",
+                       extra={'event': 'pdf_slow_pages', 'pages': slow_pages})
+
+    return {
+        'text': "".join(buffer),
+        'page_count': page_count,
+        'pages_processed': len(pages),
+        'truncated': truncated,
+        'duration': round(time.perf_counter() - start, 4),
+        'pages': pages,
+        'slow_pages': slow_pages
+    }
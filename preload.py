@@ -0,0 +1,86 @@
+"""
+Préchargement - Application Villa à Vendre Marrakech
+
+Ce fichier annonce au navigateur, dès les en-têtes de la réponse, les
+ressources dont la page d'une villa a besoin pour son premier affichage :
+
+- la feuille style.css (fichier construit par assets.py)
+- la première photo du hero, que le navigateur ne découvrirait qu'en
+  lisant le HTML jusqu'au diaporama
+
+L'en-tête Link (rel=preload) est calculé depuis la villa que la route a
+déjà chargée pour la page (signal template_rendered) : aucune requête SQL
+supplémentaire. Avec EARLY_HINTS=1 et un serveur qui le permet (gunicorn :
+environ['wsgi.early_hints']), les liens sont aussi envoyés dans une réponse
+103 Early Hints avant l'exécution de la route : la feuille de style, et la
+photo du hero retenue au dernier affichage de la page pour la version
+courante des données (data_version.py, une entrée par villa existante). Le
+navigateur télécharge la feuille et la photo pendant que la page est
+générée. À n'activer que si le proxy transmet les réponses 103 (Nginx
+1.29+ avec early_hints, Cloudflare) ; sinon l'en-tête Link suffit.
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+from flask import current_app, g, request, template_rendered, url_for
+
+from assets import asset_url
+from data_version import cached, peek
+
+# Pages de villa : accueil et /villa/<référence>
+PRELOAD_ENDPOINTS = {'public.index', 'public.villa_page'}
+
+# Clé de la page d'accueil parmi les références
+HOME = None
+
+
+def _image_link(filename):
+    return f"<{url_for('static', filename=f'uploads/{filename}')}>; rel=preload; as=image; fetchpriority=high"
+
+
+def _stylesheet_link():
+    return f"<{asset_url('css/style.css')}>; rel=preload; as=style"
+
+
+def _send_early_hints():
+    if request.endpoint not in PRELOAD_ENDPOINTS or request.method != 'GET':
+        return
+    g.preload_page = HOME if request.endpoint == 'public.index' else request.view_args.get('reference')
+    early_hints = request.environ.get('wsgi.early_hints')
+    if current_app.config['EARLY_HINTS'] and early_hints:
+        # Photo connue seulement si la page a déjà été affichée pour cette version des données
+        links = [_stylesheet_link()] + [link for link in [peek(('preload_image', g.preload_page))] if link]
+        early_hints([('Link', link) for link in links])
+
+
+def _note_villa(sender, template, context, **extra):
+    """Liens de la page depuis la villa chargée par la route (index.html)."""
+    if 'preload_page' not in g or template.name != 'index.html':
+        return
+    villa = context.get('villa')
+    if villa is None:
+        return
+    images = villa.get_images_list()
+    image = _image_link(images[0]) if images else None
+    page = g.pop('preload_page')
+    # Une entrée par villa active : une référence inconnue n'ajoute rien au cache
+    if villa.is_active:
+        cached(('preload_image', page), lambda: image)
+    g.preload_links = [_stylesheet_link()] + ([image] if image else [])
+
+
+def _add_link_header(response):
+    links = g.pop('preload_links', None)
+    if links and response.status_code == 200 and response.mimetype == 'text/html':
+        response.headers['Link'] = ', '.join(links)
+    return response
+
+
+def init_preload(app):
+    """Active les en-têtes Link (après la limitation de débit : une requête refusée n'envoie pas de 103)."""
+    app.before_request(_send_early_hints)
+    template_rendered.connect(_note_villa, app)
+    app.after_request(_add_link_header)
@@ -0,0 +1,164 @@
+"""
+Profilage à la Demande - Application Villa à Vendre Marrakech
+
+Ce fichier profile une requête précise avec cProfile, à la demande d'un
+administrateur connecté :
+
+- déclenchement : en-tête X-Profile: 1 ou paramètre ?_profile=1, pris en
+  compte seulement avec une session administrateur
+- mesure : toute la requête, de la première fonction before_request à la
+  dernière after_request (route, rendu des templates, SQLAlchemy et
+  pilote de la base)
+- résultat : fichier .prof (format pstats : snakeviz, flameprof, gprof2dot)
+  et fiche .json (route, statut, durée, temps SQL / template) dans
+  PROFILE_DIR, hors de la racine web ; seuls les PROFILE_KEEP derniers
+  profils sont conservés. La réponse indique le nom du profil dans
+  l'en-tête X-Profile-Id.
+
+Les profils sont listés sur /admin/profiles. Une requête sans drapeau ne
+paie que la lecture d'un en-tête et d'un paramètre.
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import time
+
+from flask import current_app, g, request, session
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_QUERY_FLAG = '_profile'
+
+# Noms générés par save_profile (aucun séparateur de chemin possible)
+PROFILE_NAME = re.compile(r'^[\w-]+$')
+
+logger = logging.getLogger('villa.profiler')
+
+# Tris proposés pour le rapport texte (clés de pstats)
+REPORT_SORTS = ('cumulative', 'tottime', 'ncalls')
+
+
+def profile_requested():
+    """True si la requête demande un profil et vient d'un administrateur connecté."""
+    flag = request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_QUERY_FLAG)
+    return bool(flag) and flag not in ('0', 'false') and bool(session.get('admin_logged_in'))
+
+
+def _profile_name(timestamp):
+    slug = re.sub(r'[^\w]+', '-', request.path).strip('-')[:60] or 'index'
+    milliseconds = int(timestamp * 1000) % 1000
+    return (f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(timestamp))}{milliseconds:03d}"
+            f"-{os.getpid()}-{request.method.lower()}-{slug}")
+
+
+def save_profile(profiler, directory, keep, response, duration_ms):
+    """
+    Enregistre le profil de la requête et sa fiche, puis supprime les plus anciens
+
+    Returns:
+        str: Nom du profil
+    """
+    os.makedirs(directory, exist_ok=True)
+    timestamp = time.time()
+    name = _profile_name(timestamp)
+    profiler.dump_stats(os.path.join(directory, f'{name}.prof'))
+    details = {
+        'name': name,
+        'created': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp)),
+        'timestamp': timestamp,
+        'method': request.method,
+        'path': request.path,
+        'query': {key: value for key, value in request.args.items() if key != PROFILE_QUERY_FLAG},
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        'duration_ms': round(duration_ms, 2),
+        'timings': {key: dict(entry, ms=round(entry['ms'], 2)) for key, entry in g.get('timings', {}).items()},
+    }
+    with open(os.path.join(directory, f'{name}.json'), 'w') as handle:
+        json.dump(details, handle, ensure_ascii=False)
+
+    for old in list_profiles(directory)[keep:]:
+        for extension in ('.prof', '.json'):
+            try:
+                os.remove(os.path.join(directory, old['name'] + extension))
+            except OSError:
+                pass
+    return name
+
+
+def list_profiles(directory):
+    """Fiches des profils enregistrés, du plus récent au plus ancien."""
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for filename in os.listdir(directory):
+        if not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as handle:
+                profiles.append(json.load(handle))
+        except (OSError, ValueError):
+            continue
+    return sorted(profiles, key=lambda profile: profile.get('timestamp', 0), reverse=True)
+
+
+def profile_path(directory, name):
+    """Chemin du fichier .prof d'un profil, ou None si le nom est invalide ou inconnu."""
+    if not PROFILE_NAME.match(name):
+        return None
+    path = os.path.join(directory, f'{name}.prof')
+    return path if os.path.exists(path) else None
+
+
+def profile_report(path, sort='cumulative', limit=60):
+    """Rapport texte pstats des `limit` fonctions les plus coûteuses."""
+    output = io.StringIO()
+    stats = pstats.Stats(path, stream=output)
+    stats.strip_dirs().sort_stats(sort if sort in REPORT_SORTS else 'cumulative').print_stats(limit)
+    return output.getvalue()
+
+
+def _start_profile():
+    if not profile_requested():
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Un autre profileur est déjà actif dans ce processus
+        return
+    g.profiler = profiler
+    g.profile_started = time.perf_counter()
+
+
+def _finish_profile(response):
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    profiler.disable()
+    duration_ms = (time.perf_counter() - g.profile_started) * 1000
+    try:
+        name = save_profile(profiler, current_app.config['PROFILE_DIR'],
+                            current_app.config['PROFILE_KEEP'], response, duration_ms)
+    except OSError as e:
+        logger.warning(f"⚠️  Profil non enregistré: {e}", extra={'event': 'profile_error'})
+        return response
+    response.headers['X-Profile-Id'] = name
+    logger.info(f"🔬 Profil {name}", extra={'event': 'profile_saved', 'profile': name,
+                                              'duration_ms': round(duration_ms, 2)})
+    return response
+
+
+def init_profiler(app):
+    """Active le profilage à la demande (à appeler avant les autres hooks de requête)."""
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
@@ -0,0 +1,286 @@
+"""
+Routes Publiques - Application Villa à Vendre Marrakech
+
+Ce fichier regroupe les routes du site public (pages des villas, langue,
+connexion administrateur) et l'API JSON (catalogue, recherche, villa).
+
+Il n'importe que Flask et la base de données : les sous-systèmes lourds
+(IA, images, PDF) ne sont chargés que par les routes admin.
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import base64
+import json
+
+from flask import Blueprint, current_app, g, jsonify, redirect, render_template, request, send_from_directory, session, url_for
+from sqlalchemy import tuple_
+from sqlalchemy.orm import load_only
+
+from app import safe_int
+from data_version import cached, current_version
+from db_routing import use_primary
+from models import Villa
+from sitemap import build_sitemap
+from villa_search import search_villas
+
+bp = Blueprint('public', __name__)
+
+# ========== ROUTES PUBLIQUES ==========
+
+@bp.route('/')
+def index():
+    """
+    Page d'accueil publique affichant la villa active (textes de la langue courante uniquement).
+    Avec plusieurs villas actives, celle de plus petit id (comme le sitemap et le préchargement).
+    """
+    villa = Villa.query.options(*Villa.public_options()).filter_by(is_active=True).order_by(Villa.id).first()
+    Villa.load_translations([villa], g.lang)
+    return render_template('index.html', villa=villa)
+
+@bp.route('/villa/<reference>')
+def villa_page(reference):
+    """Page publique d'une villa du catalogue, identifiée par sa référence."""
+    query = Villa.query.options(*Villa.public_options()).filter_by(reference=reference)
+    if not session.get('admin_logged_in'):
+        query = query.filter_by(is_active=True)
+    villa = query.first()
+    if not villa:
+        return render_template('index.html', villa=None), 404
+    Villa.load_translations([villa], g.lang)
+    return render_template('index.html', villa=villa)
+
+@bp.route('/robots.txt')
+def robots():
+    return send_from_directory('static', 'robots.txt', mimetype='text/plain')
+
+@bp.route('/sitemap.xml')
+def sitemap():
+    """
+    Sitemap généré depuis les villas, régénéré seulement quand les données changent.
+
+    Les URL viennent de SITE_URL, jamais de l'en-tête Host envoyé par le
+    client : le XML est partagé par tous les visiteurs et les caches. Sans
+    SITE_URL (développement), il est construit à chaque requête depuis
+    l'URL de la requête et n'est mis en cache nulle part.
+    """
+    site_url = current_app.config['SITE_URL']
+    if not site_url:
+        response = current_app.response_class(build_sitemap(request.url_root), mimetype='application/xml')
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    def build():
+        use_primary()
+        return build_sitemap(site_url.rstrip('/') + '/')
+
+    version = current_version()
+    response = current_app.response_class(cached(('sitemap',), build), mimetype='application/xml')
+    response.set_etag(f'{version[0]}-{version[1]}')
+    response.headers['Cache-Control'] = 'public, max-age=3600'
+    return response.make_conditional(request)
+
+# ========== LANGUE ==========
+
+@bp.route('/set-language/<lang>')
+def set_language(lang):
+    """Change la langue de l'interface."""
+    if lang in ['fr', 'en']:
+        session['language'] = lang
+    return redirect(request.referrer or url_for('public.index'))
+
+# ========== ROUTES D'AUTHENTIFICATION ==========
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    """Page de connexion administrateur avec vérification du mot de passe."""
+    if request.method == 'POST':
+        password = request.form.get('password')
+        if password == current_app.config['ADMIN_PASSWORD']:
+            session['admin_logged_in'] = True
+            return redirect(url_for('admin.admin'))
+        else:
+            return render_template('login.html', error='Mot de passe incorrect')
+    return render_template('login.html')
+
+@bp.route('/logout')
+def logout():
+    session.pop('admin_logged_in', None)
+    return redirect(url_for('public.login'))
+
+# ========== API JSON ==========
+
+# Tris disponibles pour le catalogue : colonnes de la clé de pagination et sens
+CATALOG_SORTS = {
+    'price_asc': ('price', 'id'),
+    'price_desc': ('price', 'id'),
+    'newest': ('id',)
+}
+CATALOG_DEFAULT_LIMIT = 20
+CATALOG_MAX_LIMIT = 100
+SEARCH_DEFAULT_LIMIT = 10
+SEARCH_MAX_LIMIT = 50
+SEARCH_MAX_QUERY_LENGTH = 200
+
+def encode_cursor(sort, values):
+    """Encode la position de la dernière villa d'une page en curseur opaque."""
+    raw = json.dumps([sort] + list(values), separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, sort):
+    """Décode un curseur de pagination. Lève ValueError s'il est invalide."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or not values or values[0] != sort \
+            or len(values) != len(CATALOG_SORTS[sort]) + 1 \
+            or not all(isinstance(v, int) for v in values[1:]):
+        raise ValueError('Invalid cursor')
+    return values[1:]
+
+@bp.route('/api/villas', methods=['GET'])
+def list_villas():
+    """
+    API JSON du catalogue des villas, avec filtres et pagination par clé (keyset).
+    
+    Paramètres (query string):
+        min_price, max_price: fourchette de prix en euros
+        bedrooms, min_bedrooms: nombre de chambres exact ou minimum
+        location: localisation exacte
+        sort: price_asc (défaut), price_desc ou newest
+        limit: taille de page (max 100)
+        cursor: valeur next_cursor de la page précédente
+        active: 'false' ou 'all' pour inclure les villas inactives (admin uniquement)
+    
+    La pagination reprend après la dernière ligne vue (WHERE (price, id) > ...)
+    au lieu d'un OFFSET : le coût d'une page reste constant quelle que soit sa
+    position, grâce aux index composites (is_active, ..., price, id).
+    """
+    args = request.args
+    sort = args.get('sort', 'price_asc')
+    if sort not in CATALOG_SORTS:
+        return jsonify({'error': f"Invalid sort. Use one of: {', '.join(CATALOG_SORTS)}"}), 400
+    limit = min(max(safe_int(args.get('limit'), CATALOG_DEFAULT_LIMIT), 1), CATALOG_MAX_LIMIT)
+    lang = args.get('lang') if args.get('lang') in ('fr', 'en') else g.lang
+    
+    query = Villa.query.options(load_only(*[getattr(Villa, c) for c in Villa.SUMMARY_COLUMNS]))
+    
+    active = args.get('active', 'true').lower()
+    if active != 'true' and session.get('admin_logged_in'):
+        if active == 'false':
+            query = query.filter(Villa.is_active.is_(False))
+    else:
+        query = query.filter(Villa.is_active.is_(True))
+    
+    if args.get('min_price'):
+        query = query.filter(Villa.price >= safe_int(args.get('min_price')))
+    if args.get('max_price'):
+        query = query.filter(Villa.price <= safe_int(args.get('max_price')))
+    if args.get('bedrooms'):
+        query = query.filter(Villa.bedrooms == safe_int(args.get('bedrooms')))
+    elif args.get('min_bedrooms'):
+        query = query.filter(Villa.bedrooms >= safe_int(args.get('min_bedrooms')))
+    if args.get('location'):
+        query = query.filter(Villa.location == args.get('location'))
+    
+    key_columns = [getattr(Villa, c) for c in CATALOG_SORTS[sort]]
+    descending = sort != 'price_asc'
+    
+    if args.get('cursor'):
+        try:
+            last_values = decode_cursor(args.get('cursor'), sort)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        key = tuple_(*key_columns) if len(key_columns) > 1 else key_columns[0]
+        last = tuple_(*last_values) if len(last_values) > 1 else last_values[0]
+        query = query.filter(key < last if descending else key > last)
+    
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in key_columns])
+    
+    # Une ligne de plus que la page pour savoir s'il existe une page suivante
+    villas = query.limit(limit + 1).all()
+    has_more = len(villas) > limit
+    villas = villas[:limit]
+    Villa.load_translations(villas, lang, fields=('title',))
+    
+    next_cursor = None
+    if has_more:
+        last_villa = villas[-1]
+        next_cursor = encode_cursor(sort, [getattr(last_villa, c) for c in CATALOG_SORTS[sort]])
+    
+    return jsonify({
+        'items': [villa.to_summary_dict(lang) for villa in villas],
+        'next_cursor': next_cursor
+    })
+
+@bp.route('/api/search', methods=['GET'])
+def search():
+    """
+    Recherche plein texte dans les annonces (titre, description, caractéristiques, équipements)
+    
+    Paramètres (query string):
+        q: texte recherché (syntaxe web : "expression exacte", -mot exclu, or)
+        lang: fr | en (langue courante par défaut)
+        limit: nombre de résultats (défaut 10, max 50)
+        offset: position de départ (valeur next_offset de la page précédente)
+    
+    Les résultats sont classés par pertinence ; chacun contient un extrait HTML
+    (snippet) où seuls les termes trouvés sont entourés de <mark>.
+    """
+    args = request.args
+    query = (args.get('q') or '').strip()[:SEARCH_MAX_QUERY_LENGTH]
+    if not query:
+        return jsonify({'error': 'Missing q parameter'}), 400
+    lang = args.get('lang') if args.get('lang') in ('fr', 'en') else g.lang
+    limit = min(max(safe_int(args.get('limit'), SEARCH_DEFAULT_LIMIT), 1), SEARCH_MAX_LIMIT)
+    offset = max(safe_int(args.get('offset'), 0), 0)
+    include_inactive = args.get('active') == 'all' and session.get('admin_logged_in')
+    
+    # Un résultat de plus que la page pour savoir s'il existe une page suivante
+    hits = search_villas(query, lang, limit + 1, offset, include_inactive=bool(include_inactive))
+    has_more = len(hits) > limit
+    hits = hits[:limit]
+    
+    villas = Villa.query.options(load_only(*[getattr(Villa, c) for c in Villa.SUMMARY_COLUMNS])).filter(
+        Villa.id.in_([hit['villa_id'] for hit in hits])
+    ).all()
+    Villa.load_translations(villas, lang, fields=('title',))
+    villas_by_id = {villa.id: villa for villa in villas}
+    
+    items = []
+    for hit in hits:
+        villa = villas_by_id.get(hit['villa_id'])
+        if villa:
+            item = villa.to_summary_dict(lang)
+            item.update({'rank': round(hit['rank'], 4), 'matched_field': hit['field'], 'snippet': hit['snippet']})
+            items.append(item)
+    
+    return jsonify({
+        'query': query,
+        'items': items,
+        'next_offset': offset + limit if has_more else None
+    })
+
+@bp.route('/api/villa/<reference>', methods=['GET'])
+def get_villa_by_reference(reference):
+    """API JSON pour récupérer une villa active du catalogue par sa référence."""
+    lang = request.args.get('lang') if request.args.get('lang') in ('fr', 'en') else g.lang
+    villa = Villa.query.options(*Villa.public_options()).filter_by(reference=reference, is_active=True).first()
+    if villa:
+        Villa.load_translations([villa], lang)
+        return jsonify(villa.to_dict(lang))
+    return jsonify({'error': 'No villa found'}), 404
+
+@bp.route('/api/villa', methods=['GET'])
+def get_villa():
+    """API JSON pour récupérer les données de la villa active."""
+    villa = Villa.query.options(*Villa.public_options()).filter_by(is_active=True).order_by(Villa.id).first()
+    if villa:
+        Villa.load_translations([villa], 'fr')
+        return jsonify(villa.to_dict())
+    return jsonify({'error': 'No villa found'}), 404
@@ -0,0 +1,260 @@
+"""
+Limitation de Débit - Application Villa à Vendre Marrakech
+
+Ce fichier protège PostgreSQL et OpenRouter des rafales (robots, scrapers,
+session qui répète /api/enhance) avec des seaux à jetons :
+
+- par client et par route : chaque client (adresse IP, derrière PROXY_COUNT
+  proxys) a son seau pour chaque route de la règle qui la couvre
+- global : un seau commun à tous les clients des pages publiques plafonne
+  le débit total envoyé à la base
+- partagés entre les workers : les seaux sont dans un fichier projeté en
+  mémoire (RATE_LIMIT_FILE, préparé par gunicorn.conf.py) et verrouillé
+  avec flock ; sans fichier (serveur de développement), ils restent dans
+  la mémoire du processus
+
+Règles (RATE_LIMITS, "règle=nombre/période:rafale", période s, m ou h) :
+- public : pages publiques et API JSON, par client et par route
+- global : toutes les pages publiques, tous clients confondus
+- ai : /api/enhance et /admin/upload-pdf, par client
+- login : POST /login, par client (essais de mot de passe)
+Défaut : DEFAULT_RATE_LIMITS ; RATE_LIMITS=off désactive la limitation.
+
+Une requête refusée reçoit 429 et Retry-After (secondes avant le prochain
+jeton). Voie prioritaire : un administrateur connecté n'est soumis qu'à la
+règle ai ; ses enregistrements passent même quand les pages publiques
+sont saturées. Avec des workers qui servent plusieurs requêtes à la fois
+(gevent, gthread), les pages publiques ne peuvent pas non plus occuper plus
+de RATE_LIMIT_PUBLIC_CONCURRENCY requêtes simultanées par worker (défaut :
+taille du pool de connexions moins une, réservée à l'administration). Un
+worker sync ne sert qu'une requête à la fois : cette limite ne s'y applique
+pas, sauf valeur explicite (serveur de développement multi-thread).
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import fcntl
+import hashlib
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+
+from flask import current_app, g, jsonify, request, session
+
+from metrics import count_rate_limited
+
+logger = logging.getLogger('villa.ratelimit')
+
+DEFAULT_RATE_LIMITS = 'public=10/s:40, global=200/s:400, ai=30/m:10, login=10/m:5'
+
+# Routes de la règle ai (appels OpenRouter)
+AI_ENDPOINTS = {'admin.enhance', 'admin.upload_pdf'}
+
+# Workers gunicorn servant plusieurs requêtes à la fois (limite de requêtes publiques simultanées)
+CONCURRENT_WORKER_CLASSES = {'gevent', 'gthread'}
+
+# Attente maximale d'une place parmi les requêtes publiques en cours (secondes)
+ADMISSION_WAIT_SECONDS = 1.0
+
+# Seaux du fichier partagé : empreinte de la clé, jetons restants, dernière mise à jour
+SLOT = struct.Struct('<Qdd')
+SLOTS = 8192
+PROBES = 8
+
+RULE = re.compile(r'^(\w+)=(\d+(?:\.\d+)?)/(s|m|h):(\d+)$')
+PERIODS = {'s': 1, 'm': 60, 'h': 3600}
+
+
+class BucketStore:
+    """
+    Seaux à jetons partagés entre processus
+
+    Un seau absent est considéré plein. Faute de place parmi les PROBES
+    emplacements d'une clé, le seau le moins récemment utilisé est
+    remplacé : avec SLOTS emplacements, c'est en pratique un seau inactif,
+    qui se serait de toute façon rempli entre-temps.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        # Un worker issu d'un fork rouvre le fichier : flock verrouille par descripteur ouvert
+        if self._pid == os.getpid():
+            return
+        size = SLOT.size * SLOTS
+        if self.path:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(self._fd).st_size < size:
+                    os.ftruncate(self._fd, size)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            self._map = mmap.mmap(self._fd, size)
+        else:
+            self._fd = None
+            self._map = mmap.mmap(-1, size)
+        self._pid = os.getpid()
+
+    def take(self, key, rate, burst, now=None):
+        """
+        Prend un jeton dans le seau `key` (rate jetons par seconde, au plus burst)
+
+        Returns:
+            float: 0 si la requête passe, sinon secondes avant le prochain jeton
+        """
+        digest = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little') | 1
+        now = time.time() if now is None else now
+        with self._lock:
+            self._open()
+            if self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                return self._take(digest, rate, burst, now)
+            finally:
+                if self._fd is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _take(self, digest, rate, burst, now):
+        start = digest % SLOTS
+        chosen, oldest = None, None
+        for probe in range(PROBES):
+            offset = ((start + probe) % SLOTS) * SLOT.size
+            slot_digest, tokens, updated = SLOT.unpack_from(self._map, offset)
+            if slot_digest == digest:
+                # Horloge reculée (redémarrage, NTP) : pas de jetons négatifs
+                tokens = min(burst, tokens + max(now - updated, 0) * rate)
+                chosen = offset
+                break
+            if slot_digest == 0 or oldest is None or updated < oldest:
+                chosen, oldest = offset, (-1 if slot_digest == 0 else updated)
+        else:
+            tokens = burst
+        if tokens >= 1:
+            SLOT.pack_into(self._map, chosen, digest, tokens - 1, now)
+            return 0.0
+        SLOT.pack_into(self._map, chosen, digest, tokens, now)
+        return (1 - tokens) / rate
+
+
+def parse_rate_limits(value):
+    """
+    Règles depuis RATE_LIMITS
+
+    Exemple: "public=10/s:40, ai=30/m:10" -> {'public': (10.0, 40), 'ai': (0.5, 10)}
+    (jetons par seconde, rafale). "off" ou une chaîne vide : aucune règle.
+    """
+    rules = {}
+    if not value or value.strip().lower() == 'off':
+        return rules
+    for item in value.split(','):
+        match = RULE.match(item.strip())
+        if not match:
+            raise ValueError(f"RATE_LIMITS invalide: {item.strip()!r} (attendu: règle=nombre/s|m|h:rafale)")
+        name, count, period, burst = match.groups()
+        if float(count) <= 0 or int(burst) < 1:
+            raise ValueError(f"RATE_LIMITS invalide: {item.strip()!r} (débit et rafale doivent être positifs)")
+        rules[name] = (float(count) / PERIODS[period], int(burst))
+    return rules
+
+
+def client_key():
+    """Adresse du client (déjà corrigée par ProxyFix derrière le proxy)."""
+    return request.remote_addr or 'unknown'
+
+
+def _limits_for_request():
+    """Seaux à consulter : [(règle, clé)], vide pour une requête non limitée."""
+    endpoint = request.endpoint
+    if endpoint in (None, 'static', 'assets', 'metrics'):
+        return []
+    if endpoint in AI_ENDPOINTS:
+        return [('ai', f'ai:{client_key()}')]
+    if session.get('admin_logged_in'):
+        return []
+    if endpoint == 'public.login' and request.method == 'POST':
+        return [('login', f'login:{client_key()}')]
+    if request.blueprint == 'public':
+        return [('public', f'public:{endpoint}:{client_key()}'), ('global', 'global')]
+    return []
+
+
+def _too_many_requests(rule, retry_after):
+    seconds = max(1, math.ceil(retry_after))
+    count_rate_limited(rule)
+    logger.info(f"⛔ Rate limited ({rule})", extra={
+        'event': 'rate_limited', 'rule': rule, 'endpoint': request.endpoint,
+        'client': client_key(), 'retry_after': seconds
+    })
+    if request.path.startswith('/api/') or request.endpoint in AI_ENDPOINTS:
+        response = jsonify({'error': 'Too many requests', 'retry_after': seconds})
+    else:
+        response = current_app.response_class('Trop de requêtes, réessayez dans quelques instants.',
+                                              mimetype='text/plain')
+    response.status_code = 429
+    response.headers['Retry-After'] = str(seconds)
+    return response
+
+
+def _admit_request():
+    rules = current_app.extensions['rate_limit']['rules']
+    for rule, key in _limits_for_request():
+        if rule not in rules:
+            continue
+        rate, burst = rules[rule]
+        retry_after = current_app.extensions['rate_limit']['store'].take(key, rate, burst)
+        if retry_after:
+            return _too_many_requests(rule, retry_after)
+
+    slots = current_app.extensions['rate_limit']['public_slots']
+    if slots is not None and request.blueprint == 'public' and not session.get('admin_logged_in'):
+        if not slots.acquire(timeout=ADMISSION_WAIT_SECONDS):
+            return _too_many_requests('concurrency', 1)
+        g.public_slot = slots
+
+
+def _release_slot(exc):
+    slots = g.pop('public_slot', None)
+    if slots is not None:
+        slots.release()
+
+
+def _public_concurrency(app):
+    configured = app.config['RATE_LIMIT_PUBLIC_CONCURRENCY']
+    if configured:
+        return configured
+    if app.config['WORKER_CLASS'] not in CONCURRENT_WORKER_CLASSES:
+        # Worker sync : une seule requête à la fois, la limite ne serait jamais atteinte
+        return None
+    options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    if 'pool_size' not in options:
+        return None
+    # Une connexion du pool reste disponible pour l'administration
+    return max(options['pool_size'] + max(options.get('max_overflow', 0), 0) - 1, 1)
+
+
+def init_rate_limiting(app):
+    """Active la limitation de débit (après init_metrics, avant les hooks qui lisent la base)."""
+    configured = app.config['RATE_LIMITS']
+    rules = parse_rate_limits(DEFAULT_RATE_LIMITS if configured is None else configured)
+    if not rules:
+        return
+    concurrency = _public_concurrency(app)
+    app.extensions['rate_limit'] = {
+        'rules': rules,
+        'store': BucketStore(app.config['RATE_LIMIT_FILE']),
+        'public_slots': threading.BoundedSemaphore(concurrency) if concurrency else None,
+    }
+    app.before_request(_admit_request)
+    app.teardown_request(_release_slot)
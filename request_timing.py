@@ -0,0 +1,141 @@
+"""
+Chronométrage des Requêtes - Application Villa à Vendre Marrakech
+
+Ce fichier mesure où passe le temps de chaque requête :
+
+- db : requêtes SQL (durée cumulée et nombre), via les événements SQLAlchemy
+- template : rendu des templates Jinja
+- image, pdf, openrouter-* : sections chronométrées avec timed() dans le
+  traitement des images, l'extraction PDF et chaque appel OpenRouter
+- total : durée complète de la requête
+
+Le détail est envoyé dans l'en-tête Server-Timing pour les administrateurs
+connectés (onglet Réseau des outils de développement du navigateur) et
+journalisé pour toutes les requêtes (logger 'villa.request', événement
+'request', échantillonnable avec LOG_SAMPLING) :
+{"event": "request", "method": "GET", "path": "/", "status": 200,
+ "duration_ms": 12.4, "timings": {"db": {"ms": 3.1, "count": 2}, ...}}
+
+En dehors d'une requête (scripts, threads de l'import en masse), timed()
+ne mesure rien.
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+
+from flask import before_render_template, g, has_request_context, request, session, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('villa.request')
+
+
+def record(name, seconds, description=None):
+    """Ajoute une durée à la mesure `name` de la requête en cours."""
+    if not has_request_context() or 'timings' not in g:
+        return
+    entry = g.timings.setdefault(name, {'ms': 0.0, 'count': 0})
+    entry['ms'] += seconds * 1000
+    entry['count'] += 1
+    if description:
+        entry['desc'] = description
+
+
+@contextmanager
+def timed(name, description=None):
+    """
+    Chronomètre un bloc de code pour la requête en cours
+
+    Usage:
+        with timed('image'):
+            optimize_image(path)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start, description)
+
+
+# ========== REQUÊTES SQL ==========
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('query_started')
+    if started:
+        record('db', time.perf_counter() - started.pop())
+
+
+# ========== TEMPLATES ==========
+
+def _template_started(sender, template, context, **extra):
+    g.template_started = time.perf_counter()
+
+
+def _template_finished(sender, template, context, **extra):
+    started = g.pop('template_started', None)
+    if started is not None:
+        record('template', time.perf_counter() - started, template.name)
+
+
+# ========== EN-TÊTE ET JOURNAL ==========
+
+def server_timing_header(timings, total_ms):
+    """
+    Valeur de l'en-tête Server-Timing
+
+    Exemple: db;dur=3.1;desc="2 queries", template;dur=5.0;desc="index.html", total;dur=12.4
+    """
+    metrics = []
+    for name, entry in timings.items():
+        description = entry.get('desc') or (f"{entry['count']} queries" if name == 'db' else None)
+        metric = f"{name};dur={entry['ms']:.1f}"
+        if description:
+            metric += ';desc="{}"'.format(description.replace('"', "'"))
+        metrics.append(metric)
+    metrics.append(f"total;dur={total_ms:.1f}")
+    return ', '.join(metrics)
+
+
+def _start_timing():
+    g.timings = {}
+    g.request_started = time.perf_counter()
+
+
+def _finish_timing(response):
+    if 'request_started' not in g:
+        return response
+    total_ms = (time.perf_counter() - g.request_started) * 1000
+    timings = g.timings
+    if session.get('admin_logged_in'):
+        response.headers['Server-Timing'] = server_timing_header(timings, total_ms)
+    if request.endpoint not in ('static', 'assets'):
+        logger.info(f"{request.method} {request.path} {response.status_code}", extra={
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'duration_ms': round(total_ms, 2),
+            'timings': {name: dict(entry, ms=round(entry['ms'], 2)) for name, entry in timings.items()},
+        })
+    return response
+
+
+def init_request_timing(app):
+    """Active le chronométrage des requêtes (à appeler avant les autres hooks de requête)."""
+    app.before_request(_start_timing)
+    app.after_request(_finish_timing)
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_finished, app)
@@ -0,0 +1,86 @@
+"""
+Sitemap XML - Application Villa à Vendre Marrakech
+
+Ce fichier génère /sitemap.xml depuis les villas actives :
+
+- une entrée pour l'accueil et pour chaque page /villa/<référence>, avec
+  lastmod tiré de updated_at
+- les versions de chaque page par langue (?lang=fr, ?lang=en) et la
+  version par défaut, liées entre elles (xhtml:link hreflang)
+- une entrée image:image par photo (l'accueil reprend les photos de la
+  villa qu'il affiche)
+
+Le XML est mis en cache dans chaque worker et régénéré seulement quand les
+données changent (data_version.py) : un robot qui parcourt le site ne
+déclenche pas de requête SQL.
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+from urllib.parse import quote
+from xml.sax.saxutils import escape, quoteattr
+
+from sqlalchemy.orm import load_only
+
+from models import Villa
+
+SITEMAP_NAMESPACES = (
+    'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"\n'
+    '        xmlns:image="http://www.google.com/schemas/sitemap-image/1.1"\n'
+    '        xmlns:xhtml="http://www.w3.org/1999/xhtml"'
+)
+
+
+def _lastmod(moment):
+    return moment.strftime('%Y-%m-%dT%H:%M:%S+00:00') if moment else None
+
+
+def _url_entry(loc, lastmod, images, base_url):
+    """Versions par langue d'une page, chacune avec toutes les alternatives."""
+    separator = '&' if '?' in loc else '?'
+    versions = [(lang, f'{loc}{separator}lang={lang}') for lang in Villa.LANGUAGES] + [('x-default', loc)]
+    alternates = ''.join(
+        f'    <xhtml:link rel="alternate" hreflang="{lang}" href={quoteattr(href)}/>\n'
+        for lang, href in versions
+    )
+    entries = []
+    for lang, href in versions:
+        lines = [f'  <url>\n    <loc>{escape(href)}</loc>\n']
+        if lastmod:
+            lines.append(f'    <lastmod>{lastmod}</lastmod>\n')
+        lines.append(alternates)
+        if lang == 'x-default':
+            # Les photos ne sont déclarées qu'une fois par page
+            lines.extend(f'    <image:image><image:loc>{escape(f"{base_url}static/uploads/{quote(name)}")}'
+                         f'</image:loc></image:image>\n' for name in images)
+        lines.append('  </url>\n')
+        entries.append(''.join(lines))
+    return entries
+
+
+def build_sitemap(base_url):
+    """
+    XML du sitemap (une requête SQL)
+
+    Args:
+        base_url (str): URL du site terminée par '/' (ex. https://villaavendremarrakech.com/)
+    """
+    villas = (Villa.query
+              .options(load_only(Villa.reference, Villa.images, Villa.updated_at))
+              .filter_by(is_active=True)
+              .order_by(Villa.id)
+              .all())
+    entries = []
+    if villas:
+        home = villas[0]
+        latest = max((villa.updated_at for villa in villas if villa.updated_at), default=None)
+        entries += _url_entry(base_url, _lastmod(latest), home.get_images_list(), base_url)
+    else:
+        entries += _url_entry(base_url, None, [], base_url)
+    for villa in villas:
+        entries += _url_entry(f'{base_url}villa/{quote(villa.reference)}', _lastmod(villa.updated_at),
+                              villa.get_images_list(), base_url)
+    return f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset {SITEMAP_NAMESPACES}>\n{"".join(entries)}</urlset>\n'
@@ -14,7 +14,7 @@ Fonctionnalités principales:
 7. Réinitialisation complète de la base de données
 
 API Endpoints utilisés:
-- POST /admin/upload-pdf : Upload PDF et extraction IA (60-90s)
+- POST /admin/upload-pdf : Upload PDF et extraction IA (60-90s, instantané si déjà en cache)
 - POST /admin/upload : Upload et optimisation d'image
 - POST /admin/save : Enregistrement de la villa (mode PDF ou formulaire)
 - POST /api/enhance : Amélioration de texte via IA
@@ -63,6 +63,9 @@ document.getElementById('pdfUpload')?.addEventListener('change', async function(
 
     const formData = new FormData();
     formData.append('pdf', file);
+    if (document.getElementById('pdfForce')?.checked) {
+        formData.append('force', '1');
+    }
 
     try {
         const response = await fetch('/admin/upload-pdf', {
@@ -73,7 +76,8 @@ document.getElementById('pdfUpload')?.addEventListener('change', async function(
         const result = await response.json();
 
         if (result.success && result.data) {
-            statusDiv.innerHTML = '<div class="pdf-success">✅ PDF analysé avec succès ! Les données ont été extraites. Ajoutez maintenant les photos puis cliquez sur Enregistrer.</div>';
+            const origin = result.cached ? ' (résultat en cache, cochez « Forcer une nouvelle extraction » pour relancer l\'IA)' : '';
+            statusDiv.innerHTML = `<div class="pdf-success">✅ PDF analysé avec succès${origin} ! Les données ont été extraites. Ajoutez maintenant les photos puis cliquez sur Enregistrer.</div>`;
             
             // Stocker les données extraites temporairement
             window.pdfExtractedData = result.data;
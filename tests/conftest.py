@@ -0,0 +1,67 @@
+"""
+Fixtures des tests - Application Villa à Vendre Marrakech
+
+Une application (create_app) par session de tests, sur une base SQLite
+temporaire dont le schéma est créé par migrations.py.
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('villa')
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{directory / 'villa.db'}",
+        'SESSION_SECRET': 'test',
+        'OPENROUTER_API_KEY': 'test',
+        'ADMIN_PASSWORD': 'test',
+        'DATA_VERSION_FILE': str(directory / 'data_version'),
+        'RATE_LIMITS': 'off',
+        'LOG_LEVEL': 'WARNING',
+    })
+    from app import create_app
+    from migrations import run_migrations
+    from models import db
+
+    application = create_app({'TESTING': True})
+    with application.app_context():
+        run_migrations(db.engine)
+    return application
+
+
+@pytest.fixture
+def villa_factory(app):
+    """Crée des villas actives, supprimées à la fin du test."""
+    from models import Villa, VillaTranslation, db
+
+    created = []
+
+    def create(reference, texts=None, **columns):
+        with app.app_context():
+            villa = Villa(reference=reference, price=1000000, location='Palmeraie', is_active=True, **columns)
+            for name, value in (texts or {}).items():
+                setattr(villa, name, value)
+            db.session.add(villa)
+            db.session.commit()
+            created.append(reference)
+
+    yield create
+    with app.app_context():
+        for reference in created:
+            villa = Villa.query.filter_by(reference=reference).one()
+            # SQLite n'applique pas ON DELETE CASCADE sans PRAGMA foreign_keys
+            VillaTranslation.query.filter_by(villa_id=villa.id).delete()
+            db.session.delete(villa)
+        db.session.commit()
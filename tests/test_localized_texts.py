@@ -0,0 +1,32 @@
+"""
+Textes localisés manquants : pages et API restent valides (chaînes vides)
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+
+def test_page_renders_with_missing_translation(app, villa_factory):
+    # Seule la description anglaise existe : la page française n'a ni titre ni description
+    villa_factory('MISSING-FR', {'description_en': 'Only in English'})
+
+    response = app.test_client().get('/villa/MISSING-FR?lang=fr')
+
+    assert response.status_code == 200
+    assert 'None' not in response.get_data(as_text=True)
+
+
+def test_missing_texts_are_empty_strings(app, villa_factory):
+    from models import Villa
+
+    villa_factory('MISSING-EN', {'title': 'Titre seulement'})
+
+    with app.app_context():
+        villa = Villa.query.filter_by(reference='MISSING-EN').one()
+        assert villa.title_en == ''
+        assert villa.hero_subtitle_fr == ''
+        assert villa.to_dict('en')['description'] == ''
+        Villa.load_translations([villa], 'en')
+        assert villa.description_en == ''
@@ -0,0 +1,52 @@
+"""
+Tests des métriques - Application Villa à Vendre Marrakech
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+from app_logging import DroppingQueueHandler
+
+
+def test_dropped_log_entries_are_exported(app, monkeypatch):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+    client.get('/robots.txt')
+    before = client.get('/metrics').get_data(as_text=True)
+
+    monkeypatch.setattr(DroppingQueueHandler, 'dropped', DroppingQueueHandler.dropped + 3)
+    client.get('/robots.txt')
+    after = client.get('/metrics').get_data(as_text=True)
+
+    def dropped(text):
+        line = next(line for line in text.splitlines() if line.startswith('villa_log_entries_dropped_total'))
+        return float(line.split()[-1])
+
+    assert dropped(after) - dropped(before) == 3
+
+
+def test_data_version_cache_is_counted(app, villa_factory, monkeypatch):
+    import data_version
+
+    monkeypatch.setattr(data_version, '_cache', {})
+    monkeypatch.setitem(app.config, 'SITE_URL', 'https://villaavendremarrakech.com')
+    villa_factory('METRICS-1')
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+
+    def sitemap_counts():
+        text = client.get('/metrics').get_data(as_text=True)
+        return {result: float(line.split()[-1]) for result in ('hit', 'miss') for line in text.splitlines()
+                if line.startswith(f'villa_cache_requests_total{{cache="sitemap",result="{result}"}}')}
+
+    before = sitemap_counts()
+    client.get('/sitemap.xml')
+    client.get('/sitemap.xml')
+    after = sitemap_counts()
+
+    assert after['miss'] - before.get('miss', 0) == 1
+    assert after['hit'] - before.get('hit', 0) == 1
@@ -0,0 +1,43 @@
+"""
+Tests des migrations de schéma - Application Villa à Vendre Marrakech
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+from sqlalchemy import create_engine, inspect, text
+
+from migrations import run_migrations
+from models import db
+
+
+def test_migrations_build_the_model_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    run_migrations(engine)
+    inspector = inspect(engine)
+
+    for table in db.metadata.sorted_tables:
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        assert {column.name for column in table.columns} <= columns, table.name
+        indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        assert {index.name for index in table.indexes} <= indexes, table.name
+    assert run_migrations(engine) == []
+
+
+def test_legacy_localized_columns_are_moved(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        # Table villa créée au démarrage, avant les migrations
+        connection.execute(text("CREATE TABLE villa (id INTEGER PRIMARY KEY, reference VARCHAR(50), "
+                                "title VARCHAR(200), title_en VARCHAR(200), hero_subtitle_fr TEXT)"))
+        connection.execute(text("INSERT INTO villa (id, reference, title, title_en, hero_subtitle_fr) "
+                                "VALUES (1, 'V1', 'Villa', 'House', '')"))
+    run_migrations(engine)
+
+    with engine.connect() as connection:
+        texts = set(connection.execute(text("SELECT villa_id, lang, field, text FROM villa_translation")).all())
+    assert texts == {(1, 'fr', 'title', 'Villa'), (1, 'en', 'title', 'House')}
+    columns = {column['name'] for column in inspect(engine).get_columns('villa')}
+    assert not columns & {'title', 'title_en', 'hero_subtitle_fr'}
@@ -0,0 +1,45 @@
+"""
+Tests de l'extraction PDF - Application Villa à Vendre Marrakech
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import pdf_extraction  # noqa: E402
+from media_processing import text_pdf  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def brochure():
+    return text_pdf(12, seed=1, lines=4)
+
+
+def test_pool_matches_serial_and_is_reused(brochure, tmp_path):
+    path = tmp_path / 'brochure.pdf'
+    path.write_bytes(brochure)
+    serial = pdf_extraction.extract_pdf_text(brochure, workers=1)
+
+    from_bytes = pdf_extraction.extract_pdf_text(brochure, workers=2)
+    pool = pdf_extraction._pool
+    from_path = pdf_extraction.extract_pdf_text(str(path), workers=2)
+
+    assert pool is not None and pdf_extraction._pool is pool
+    assert from_bytes['text'] == from_path['text'] == serial['text']
+    assert from_bytes['pages_processed'] == serial['pages_processed'] == 12
+
+
+def test_pool_stops_at_max_chars(brochure):
+    serial = pdf_extraction.extract_pdf_text(brochure, workers=1, max_chars=500)
+    pooled = pdf_extraction.extract_pdf_text(brochure, workers=2, max_chars=500)
+
+    assert pooled['truncated'] and len(pooled['text']) == 500
+    assert pooled['text'] == serial['text']
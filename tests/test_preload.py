@@ -0,0 +1,44 @@
+"""
+Tests des en-têtes de préchargement - Application Villa à Vendre Marrakech
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import data_version
+from preload import HOME
+
+
+def test_link_header_from_rendered_villa(app, villa_factory, monkeypatch):
+    monkeypatch.setattr(data_version, '_cache', {})
+    villa_factory('PRELOAD-1', images='["hero.webp", "salon.webp"]')
+    client = app.test_client()
+
+    response = client.get('/villa/PRELOAD-1')
+    missing = client.get('/villa/UNKNOWN-REF')
+
+    assert response.status_code == 200
+    assert '/static/uploads/hero.webp>; rel=preload; as=image' in response.headers['Link']
+    assert 'rel=preload; as=style' in response.headers['Link']
+    assert missing.status_code == 404 and 'Link' not in missing.headers
+    # Seules les pages affichées avec une villa sont retenues pour les Early Hints
+    assert set(data_version._cache) == {('preload_image', 'PRELOAD-1')}
+    with app.app_context():
+        assert data_version.peek(('preload_image', 'PRELOAD-1')).startswith('</static/uploads/hero.webp>')
+
+
+def test_early_hints_use_remembered_photo(app, villa_factory, monkeypatch):
+    monkeypatch.setattr(data_version, '_cache', {})
+    monkeypatch.setitem(app.config, 'EARLY_HINTS', True)
+    villa_factory('PRELOAD-2', images='["front.webp"]')
+    sent = []
+    client = app.test_client()
+
+    client.get('/', environ_base={'wsgi.early_hints': sent.append})
+    client.get('/', environ_base={'wsgi.early_hints': sent.append})
+
+    assert [len(headers) for headers in sent] == [1, 2]
+    with app.app_context():
+        assert data_version.peek(('preload_image', HOME)) in [value for _, value in sent[1]]
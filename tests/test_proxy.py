@@ -0,0 +1,26 @@
+"""
+Tests des en-têtes de proxy - Application Villa à Vendre Marrakech
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+from flask import request, request_started
+
+from rate_limit import client_key
+
+
+def test_forwarded_for_ignored_without_proxy_count(app):
+    seen = []
+
+    def record(sender, **extra):
+        seen.append((request.remote_addr, client_key()))
+
+    with request_started.connected_to(record, app):
+        app.test_client().get('/robots.txt', environ_base={'REMOTE_ADDR': '203.0.113.7'},
+                              headers={'X-Forwarded-For': '198.51.100.1'})
+
+    assert app.config['PROXY_COUNT'] == 0
+    assert seen == [('203.0.113.7', '203.0.113.7')]
@@ -0,0 +1,27 @@
+"""
+Tests de la limitation de débit - Application Villa à Vendre Marrakech
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+from types import SimpleNamespace
+
+from rate_limit import _public_concurrency
+
+
+def worker_app(worker_class, concurrency=0):
+    return SimpleNamespace(config={
+        'RATE_LIMIT_PUBLIC_CONCURRENCY': concurrency,
+        'WORKER_CLASS': worker_class,
+        'SQLALCHEMY_ENGINE_OPTIONS': {'pool_size': 10, 'max_overflow': 10},
+    })
+
+
+def test_public_concurrency_only_for_concurrent_workers():
+    assert _public_concurrency(worker_app('gevent')) == 19
+    assert _public_concurrency(worker_app('gthread')) == 19
+    assert _public_concurrency(worker_app('sync')) is None
+    assert _public_concurrency(worker_app('sync', concurrency=4)) == 4
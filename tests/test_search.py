@@ -0,0 +1,42 @@
+"""
+Tests de la recherche plein texte - Application Villa à Vendre Marrakech
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+from sqlalchemy.dialects import postgresql
+
+from villa_search import _headline_query, _ranking_query, search_schema_statements
+
+
+def compile_postgresql(statement, **params):
+    return str(statement.bindparams(**params).compile(dialect=postgresql.dialect()))
+
+
+def test_ranking_query_uses_language_index():
+    sql = compile_postgresql(_ranking_query('fr', include_inactive=False),
+                             config='french', query='piscine', limit=10, offset=0)
+
+    assert 'tsvector_agg(t.search_vector)' in sql
+    assert "t.lang = 'fr'" in sql
+    assert 'AND v.is_active' in sql
+    assert 'AND v.is_active' not in compile_postgresql(_ranking_query('en', include_inactive=True),
+                                                       config='english', query='pool', limit=10, offset=0)
+
+
+def test_headline_query_expands_page_ids():
+    sql = str(_headline_query('en').compile(dialect=postgresql.dialect()))
+
+    assert 'ts_headline(CAST(%(config)s AS regconfig), t.text' in sql
+    assert "t.lang = 'en'" in sql
+    assert 't.villa_id IN (__[POSTCOMPILE_ids])' in sql
+
+
+def test_schema_declares_aggregate_and_partial_indexes():
+    statements = search_schema_statements()
+
+    assert statements[0].startswith('CREATE OR REPLACE AGGREGATE tsvector_agg(tsvector)')
+    assert any("WHERE lang = 'fr'" in statement for statement in statements)
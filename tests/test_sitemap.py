@@ -0,0 +1,37 @@
+"""
+Tests du sitemap - Application Villa à Vendre Marrakech
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import data_version
+
+
+def test_sitemap_ignores_client_host(app, villa_factory, monkeypatch):
+    monkeypatch.setitem(app.config, 'SITE_URL', 'https://villaavendremarrakech.com')
+    villa_factory('SITEMAP-1')
+    client = app.test_client()
+
+    first = client.get('/sitemap.xml', headers={'Host': 'evil.example'})
+    second = client.get('/sitemap.xml', headers={'Host': 'other.example'})
+
+    assert first.status_code == second.status_code == 200
+    assert first.data == second.data
+    assert b'https://villaavendremarrakech.com/villa/SITEMAP-1' in first.data
+    assert b'evil.example' not in first.data
+    assert [key for key in data_version._cache if key[0] == 'sitemap'] == [('sitemap',)]
+
+
+def test_sitemap_without_site_url_is_not_cached(app, villa_factory, monkeypatch):
+    monkeypatch.setitem(app.config, 'SITE_URL', None)
+    monkeypatch.setattr(data_version, '_cache', {})
+    villa_factory('SITEMAP-2')
+
+    response = app.test_client().get('/sitemap.xml', headers={'Host': 'localhost:5000'})
+
+    assert b'http://localhost:5000/villa/SITEMAP-2' in response.data
+    assert response.headers['Cache-Control'] == 'no-store'
+    assert not data_version._cache
@@ -0,0 +1,85 @@
+"""
+Tests de l'upload de brochures PDF - Application Villa à Vendre Marrakech
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import hashlib
+import io
+
+import pytest
+
+import ai_services
+import admin_routes
+from models import PdfExtraction, db
+
+PDF = b'%PDF-1.4 brochure'
+
+
+def test_concurrent_first_upload_reuses_row(app, monkeypatch):
+    sha256 = hashlib.sha256(PDF).hexdigest()
+
+    def extract_while_other_request_inserts(source):
+        # L'autre requête enregistre le même PDF pendant l'extraction
+        with db.engine.begin() as connection:
+            connection.execute(PdfExtraction.__table__.insert().values(sha256=sha256, pdf_text='Villa'))
+        return {'text': 'Villa', 'page_count': 1, 'pages_processed': 1, 'truncated': False,
+                'duration': 0.0, 'pages': [], 'slow_pages': []}
+
+    monkeypatch.setattr(admin_routes, 'extract_text_from_pdf', extract_while_other_request_inserts)
+    monkeypatch.setattr(ai_services, 'extract_villa_data_with_ai', lambda text: {'reference': 'PDF-1'})
+    monkeypatch.setattr(ai_services, 'translate_villa_data_to_english', lambda data: {})
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+
+    response = client.post('/admin/upload-pdf', data={'pdf': (io.BytesIO(PDF), 'brochure.pdf')})
+
+    assert response.status_code == 200
+    assert response.get_json()['data'] == {'reference': 'PDF-1'}
+    with app.app_context():
+        assert db.session.get(PdfExtraction, sha256).get_villa_data() == {'reference': 'PDF-1'}
+        db.session.delete(db.session.get(PdfExtraction, sha256))
+        db.session.commit()
+
+
+def test_oversized_upload_rejected_while_reading(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'PDF_MAX_BYTES', 1024)
+    monkeypatch.setattr(admin_routes, 'extract_text_from_pdf', lambda source: pytest.fail('PDF should not be read'))
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+
+    response = client.post('/admin/upload-pdf', data={'pdf': (io.BytesIO(PDF + b'0' * 4096), 'brochure.pdf')})
+
+    assert response.status_code == 413
+    assert 'too large' in response.get_json()['error']
+
+
+def test_upload_is_spooled_by_form_parser(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'PDF_SPOOL_THRESHOLD', 8)
+    seen = {}
+
+    def extract(source):
+        # Au-delà du seuil, le parseur a écrit le PDF dans un fichier temporaire
+        with open(source, 'rb') as handle:
+            seen['content'] = handle.read()
+        return {'text': 'Villa', 'page_count': 1, 'pages_processed': 1, 'truncated': False,
+                'duration': 0.0, 'pages': [], 'slow_pages': []}
+
+    monkeypatch.setattr(admin_routes, 'extract_text_from_pdf', extract)
+    monkeypatch.setattr(ai_services, 'extract_villa_data_with_ai', lambda text: None)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+
+    response = client.post('/admin/upload-pdf', data={'pdf': (io.BytesIO(PDF), 'brochure.pdf')})
+
+    assert response.status_code == 400
+    assert seen['content'] == PDF
+    with app.app_context():
+        db.session.delete(db.session.get(PdfExtraction, hashlib.sha256(PDF).hexdigest()))
+        db.session.commit()
@@ -14,11 +14,13 @@ if not os.environ.get('OPENROUTER_API_KEY'):
     print("💡 Configurez cette variable dans les Secrets Replit")
     sys.exit(1)
 
-from app import app, db, translate_villa_data_to_english
-from models import Villa
+from ai_services import translate_villa_data_to_english
+from app import create_app
+from models import db, Villa
 
 def translate_villa():
     """Traduit automatiquement la villa existante du français vers l'anglais."""
+    app = create_app()
     with app.app_context():
         villa = Villa.query.first()
         
@@ -121,6 +121,12 @@ check_and_create_env() {
         else
             log_success "Toutes les variables obligatoires sont présentes"
         fi
+        
+        # Nginx devant gunicorn : l'adresse du client vient de X-Forwarded-For (défaut de l'application : 0)
+        if ! grep -q '^PROXY_COUNT=' .env; then
+            printf "\n# Proxys devant l'application (Nginx)\nPROXY_COUNT=1\n" >> .env
+            log_info "PROXY_COUNT=1 ajouté au fichier .env (Nginx)"
+        fi
     else
         log_warning "Fichier .env non trouvé, création automatique..."
         
@@ -162,6 +168,12 @@ PGHOST=localhost
 PGPORT=5432
 PGDATABASE=villa_sales
 
+# === PROXY ===
+
+# Nombre de proxys devant gunicorn (Nginx) : adresse du client lue dans X-Forwarded-For
+# 0 si gunicorn est exposé directement
+PROXY_COUNT=1
+
 # === NOTES ===
 # - SESSION_SECRET a été générée automatiquement (ne pas modifier)
 # - OPENROUTER_API_KEY : obligatoire pour l'IA (extraction PDF, traduction)
@@ -357,6 +369,43 @@ update_dependencies() {
     return 1
 }
 
+# Appliquer les migrations de schéma en attente (une seule fois, avant le redémarrage des workers)
+migrate_database() {
+    log_info "Mise à jour du schéma de la base de données..."
+    cd "$APP_DIR" || return 1
+    
+    if [ -d "$VENV_DIR" ]; then
+        source "$VENV_DIR/bin/activate" 2>/dev/null || true
+    fi
+    
+    if python3 migrations.py; then
+        log_success "Schéma de la base de données à jour"
+        return 0
+    fi
+    
+    log_error "Échec de la mise à jour du schéma de la base de données"
+    return 1
+}
+
+# Construire les CSS / JS minifiés et précompressés (static/dist/, lus au démarrage des workers)
+build_assets() {
+    log_info "Construction des assets statiques..."
+    cd "$APP_DIR" || return 1
+    
+    if [ -d "$VENV_DIR" ]; then
+        source "$VENV_DIR/bin/activate" 2>/dev/null || true
+    fi
+    
+    if python3 assets.py; then
+        log_success "Assets statiques construits"
+        return 0
+    fi
+    
+    # L'ancienne construction (ou les fichiers sources) reste servie
+    log_warning "Échec de la construction des assets, les fichiers précédents restent servis"
+    return 1
+}
+
 # Redémarrer l'application selon l'environnement
 restart_services() {
     log_info "Redémarrage de l'application..."
@@ -543,6 +592,15 @@ full_update() {
         exit 1
     fi
     
+    # Schéma de la base de données
+    if ! migrate_database; then
+        log_warning "Restaurez la sauvegarde ou corrigez l'erreur avant de redémarrer"
+        exit 1
+    fi
+    
+    # CSS / JS
+    build_assets
+    
     # Permissions
     fix_permissions
     
@@ -573,6 +631,8 @@ quick_update() {
     create_rollback_point
     update_code
     update_dependencies
+    migrate_database || exit 1
+    build_assets
     fix_permissions
     restart_services
     health_check
@@ -595,6 +655,8 @@ update_no_restart() {
     backup_database
     update_code
     update_dependencies
+    migrate_database
+    build_assets
     fix_permissions
     
     log_success "=== MISE À JOUR TERMINÉE (sans redémarrage) ==="
@@ -648,6 +710,7 @@ Workflow typique:
      ✓ Backup de la base de données
      ✓ git pull depuis GitHub
      ✓ Installation des dépendances Python
+     ✓ Migrations du schéma de la base (migrations.py)
      ✓ Redémarrage de l'application
      ✓ Test de santé
 
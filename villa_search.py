@@ -0,0 +1,261 @@
+"""
+Recherche Plein Texte - Application Villa à Vendre Marrakech
+
+Ce fichier regroupe la recherche dans les annonces (titre, description,
+caractéristiques, équipements) en français et en anglais.
+
+Sur PostgreSQL, chaque ligne de villa_translation porte une colonne générée
+search_vector (tsvector calculé avec la configuration de sa langue :
+french, english...) indexée par un index GIN partiel par langue. Une
+recherche ne lit que les textes contenant les termes (index), classe les
+villas par ts_rank_cd, et les extraits surlignés (ts_headline) ne sont
+calculés que pour la page renvoyée.
+
+Sur les autres bases (SQLite en développement), une recherche LIKE de
+secours (villas contenant au moins un des termes) renvoie des résultats au
+même format, sans passer à l'échelle.
+
+Développé par: MOA Digital Agency LLC
+Développeur: Aisance KALONJI
+Email: moa@myoneart.com
+Web: www.myoneart.com
+"""
+
+import re
+
+from markupsafe import escape
+from sqlalchemy import bindparam, event, func, or_, text
+
+from models import db, Villa, VillaTranslation
+
+# ========== CONFIGURATION ==========
+
+# Configuration de recherche PostgreSQL par langue (les autres langues utilisent 'simple')
+SEARCH_CONFIGS = {'fr': 'french', 'en': 'english'}
+
+# Champs indexés et leur poids dans le classement (A = le plus fort)
+SEARCH_WEIGHTS = {'title': 'A', 'description': 'B', 'features': 'C', 'equipment': 'C'}
+
+# Marqueurs de surlignage : remplacés par <mark> après échappement du texte
+HIGHLIGHT_START = '{{{'
+HIGHLIGHT_STOP = '}}}'
+HEADLINE_OPTIONS = (f'MaxFragments=2, MaxWords=18, MinWords=6, FragmentDelimiter=" … ", '
+                    f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}')
+
+SNIPPET_RADIUS = 80  # Caractères autour du premier terme trouvé (recherche de secours)
+
+
+def search_config(lang):
+    """Configuration PostgreSQL de recherche d'une langue."""
+    return SEARCH_CONFIGS.get(lang, 'simple')
+
+
+def search_schema_statements():
+    """
+    Instructions DDL de la recherche plein texte (PostgreSQL, idempotentes)
+
+    - agrégat tsvector_agg (concaténation des tsvector des textes d'une villa)
+    - colonne générée search_vector sur villa_translation (NULL pour les
+      textes non indexés : boutons, titres de section...)
+    - un index GIN partiel par langue, utilisé par les requêtes lang = '..'
+    """
+    config_case = ' '.join(f"WHEN '{lang}' THEN '{config}'::regconfig" for lang, config in SEARCH_CONFIGS.items())
+    weight_case = ' '.join(f"WHEN '{field}' THEN '{weight}'" for field, weight in SEARCH_WEIGHTS.items())
+    fields = ', '.join(f"'{field}'" for field in SEARCH_WEIGHTS)
+    statements = [
+        "CREATE OR REPLACE AGGREGATE tsvector_agg(tsvector) "
+        "(SFUNC = tsvector_concat, STYPE = tsvector, INITCOND = '')",
+        f"ALTER TABLE villa_translation ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS (CASE WHEN field IN ({fields}) THEN setweight("
+        f"to_tsvector(CASE lang {config_case} ELSE 'simple'::regconfig END, text), "
+        f"(CASE field {weight_case} END)::\"char\") END) STORED"
+    ]
+    for lang in Villa.LANGUAGES:
+        statements.append(
+            f"CREATE INDEX IF NOT EXISTS ix_villa_translation_search_{lang} "
+            f"ON villa_translation USING gin (search_vector) WHERE lang = '{lang}'"
+        )
+    return statements
+
+
+def ensure_search_schema(connection):
+    """
+    Crée la colonne et les index de recherche s'ils n'existent pas
+
+    Args:
+        connection: Connexion SQLAlchemy (dans une transaction)
+
+    Returns:
+        bool: False si la base n'est pas PostgreSQL (recherche LIKE de secours)
+    """
+    if connection.dialect.name != 'postgresql':
+        return False
+    for statement in search_schema_statements():
+        connection.execute(text(statement))
+    return True
+
+
+@event.listens_for(VillaTranslation.__table__, 'after_create')
+def _create_search_schema(target, connection, **kw):
+    """Ajoute la recherche plein texte quand db.create_all() crée la table."""
+    ensure_search_schema(connection)
+
+
+def search_villas(query, lang, limit, offset=0, include_inactive=False):
+    """
+    Recherche les villas correspondant à une requête, classées par pertinence
+
+    Args:
+        query (str): Texte recherché (syntaxe web : "expression exacte", -exclu, or)
+        lang (str): Langue des textes recherchés ('fr' ou 'en')
+        limit (int): Nombre maximum de résultats
+        offset (int): Nombre de résultats à sauter
+        include_inactive (bool): Inclure les villas inactives (admin)
+
+    Returns:
+        list: [{'villa_id', 'rank', 'field', 'snippet'}, ...] par pertinence décroissante ;
+              snippet est du HTML échappé où seuls les termes trouvés sont entourés de <mark>
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return _search_postgresql(query, lang, limit, offset, include_inactive)
+    return _search_like(query, lang, limit, offset, include_inactive)
+
+
+def _highlight(snippet):
+    """Échappe un extrait puis remplace les marqueurs de surlignage par <mark>."""
+    if not snippet:
+        return None
+    html = str(escape(snippet))
+    return html.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_STOP, '</mark>')
+
+
+# Termes de la requête (q), et n'importe lequel de ses termes (any_term) pour l'index GIN
+QUERY_TERMS = """
+    WITH q AS (SELECT websearch_to_tsquery(CAST(:config AS regconfig), :query) AS query),
+    any_term AS (
+        SELECT CAST(regexp_replace(querytree(query), '&|<->|<[0-9]+>', '|', 'g') AS tsquery) AS query
+        FROM q WHERE numnode(query) > 0 AND querytree(query) <> 'T'
+    )
+"""
+
+
+def _ranking_query(lang, include_inactive):
+    """
+    Requête des villas classées par pertinence (paramètres config, query, limit, offset)
+
+    La langue est écrite en littéral (valeur validée par l'appelant) : le
+    planificateur peut ainsi choisir l'index partiel WHERE lang = '..'
+    """
+    active_filter = '' if include_inactive else 'AND v.is_active'
+    return text(QUERY_TERMS + f"""
+        , candidates AS (
+            SELECT DISTINCT t.villa_id FROM any_term, villa_translation t
+            WHERE t.lang = '{lang}' AND t.search_vector @@ any_term.query
+        )
+        SELECT t.villa_id, ts_rank_cd(tsvector_agg(t.search_vector), (SELECT query FROM q)) AS rank
+        FROM candidates c
+        JOIN villa v ON v.id = c.villa_id
+        JOIN villa_translation t ON t.villa_id = c.villa_id AND t.lang = '{lang}'
+        WHERE t.search_vector IS NOT NULL {active_filter}
+        GROUP BY t.villa_id
+        HAVING tsvector_agg(t.search_vector) @@ (SELECT query FROM q)
+        ORDER BY rank DESC, t.villa_id
+        LIMIT :limit OFFSET :offset
+    """)
+
+
+def _headline_query(lang):
+    """
+    Requête des extraits surlignés d'une page de résultats (paramètres config, query, options, ids) :
+    le texte le plus pertinent de chaque villa, hors titre (déjà affiché)
+    """
+    return text(QUERY_TERMS + f"""
+        SELECT DISTINCT ON (t.villa_id) t.villa_id, t.field,
+               ts_headline(CAST(:config AS regconfig), t.text, (SELECT query FROM q), :options)
+        FROM any_term, villa_translation t
+        WHERE t.lang = '{lang}' AND t.villa_id IN :ids AND t.field <> 'title'
+              AND t.search_vector @@ any_term.query
+        ORDER BY t.villa_id, ts_rank_cd(t.search_vector, any_term.query) DESC
+    """).bindparams(bindparam('ids', expanding=True))
+
+
+def _search_postgresql(query, lang, limit, offset, include_inactive):
+    """
+    Recherche plein texte (tsvector + index GIN partiel de la langue)
+
+    Chaque texte d'une villa a son propre tsvector : l'index sélectionne les
+    villas contenant au moins un des termes, puis la requête complète (tous
+    les termes, expressions, exclusions) est évaluée sur l'ensemble des
+    textes de la villa réunis par tsvector_agg. Ainsi « piscine hammam »
+    trouve une villa dont la piscine est dans la description et le hammam
+    dans les équipements.
+    """
+    if lang not in Villa.LANGUAGES:
+        raise ValueError(f"Unsupported language: {lang}")
+    ranked = db.session.execute(_ranking_query(lang, include_inactive), {
+        'config': search_config(lang), 'query': query, 'limit': limit, 'offset': offset
+    }).all()
+    if not ranked:
+        return []
+
+    # Extraits calculés seulement pour la page renvoyée
+    headlines = db.session.execute(_headline_query(lang), {
+        'config': search_config(lang), 'query': query, 'options': HEADLINE_OPTIONS,
+        'ids': [villa_id for villa_id, _ in ranked]
+    }).all()
+    snippets = {villa_id: (field, snippet) for villa_id, field, snippet in headlines}
+
+    results = []
+    for villa_id, rank in ranked:
+        field, snippet = snippets.get(villa_id, ('title', None))
+        results.append({'villa_id': villa_id, 'rank': float(rank), 'field': field,
+                        'snippet': _highlight(snippet)})
+    return results
+
+
+def _like_snippet(value, terms):
+    """Extrait autour du premier terme trouvé, termes entourés des marqueurs."""
+    lowered = value.lower()
+    positions = [lowered.find(term) for term in terms if lowered.find(term) >= 0]
+    if not positions:
+        return None
+    start = max(0, min(positions) - SNIPPET_RADIUS)
+    end = min(len(value), min(positions) + SNIPPET_RADIUS)
+    excerpt = value[start:end]
+    pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+    excerpt = pattern.sub(lambda m: f'{HIGHLIGHT_START}{m.group(0)}{HIGHLIGHT_STOP}', excerpt)
+    return ('… ' if start > 0 else '') + excerpt + (' …' if end < len(value) else '')
+
+
+def _search_like(query, lang, limit, offset, include_inactive):
+    """Recherche de secours sans index (SQLite en développement)."""
+    terms = [term.lower() for term in re.findall(r'\w+', query) if len(term) > 1][:10]
+    if not terms:
+        return []
+    matches = or_(*[func.lower(VillaTranslation.text).contains(term, autoescape=True) for term in terms])
+    base = (db.session.query(VillaTranslation)
+            .join(Villa, Villa.id == VillaTranslation.villa_id)
+            .filter(VillaTranslation.lang == lang,
+                    VillaTranslation.field.in_(SEARCH_WEIGHTS), matches))
+    if not include_inactive:
+        base = base.filter(Villa.is_active.is_(True))
+    rank = func.count(VillaTranslation.field)
+    ranked = (base.with_entities(VillaTranslation.villa_id, rank)
+              .group_by(VillaTranslation.villa_id)
+              .order_by(rank.desc(), VillaTranslation.villa_id)
+              .limit(limit).offset(offset).all())
+
+    rows = base.filter(VillaTranslation.villa_id.in_([villa_id for villa_id, _ in ranked])).all()
+    snippets = {}
+    for row in rows:
+        if row.field != 'title' and row.villa_id not in snippets:
+            snippet = _like_snippet(row.text, terms)
+            if snippet:
+                snippets[row.villa_id] = (row.field, snippet)
+
+    results = []
+    for villa_id, count in ranked:
+        field, snippet = snippets.get(villa_id, ('title', None))
+        results.append({'villa_id': villa_id, 'rank': float(count), 'field': field,
+                        'snippet': _highlight(snippet)})
+    return results